@@ -4,20 +4,22 @@ import sys
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
-def add_user_to_group(user_id, invite_code='TEST001'):
-    # Load environment variables
-    load_dotenv('.env')
-    load_dotenv('frontend/.env.local')
-    
-    supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-    service_role_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-    
-    if not supabase_url or not service_role_key:
-        print("❌ Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
-        return
+def add_user_to_group(user_id, invite_code='TEST001', supabase=None):
+    if supabase is None:
+        # Load environment variables
+        load_dotenv('.env')
+        load_dotenv('frontend/.env.local')
+        
+        supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+        service_role_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        
+        if not supabase_url or not service_role_key:
+            print("❌ Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+            return
     
     try:
-        supabase: Client = create_client(supabase_url, service_role_key)
+        if supabase is None:
+            supabase = create_client(supabase_url, service_role_key)
         print("✅ Connected to Supabase\n")
         
         # Find the group by invite code
@@ -30,24 +32,19 @@ def add_user_to_group(user_id, invite_code='TEST001'):
         group = group_response.data
         print(f"✅ Found group: {group['name']} (ID: {group['id']})")
         
-        # Check if user is already in the group
-        existing_member = supabase.table('group_members').select('*').eq('user_id', user_id).eq('group_id', group['id']).execute()
-        
-        if existing_member.data:
-            print(f"⚠️  User is already a member of this group")
-            return
-        
-        # Add user to group
-        insert_response = supabase.table('group_members').insert({
+        # Add user to group - one upsert instead of select-then-insert, so two
+        # concurrent joins cannot both insert (needs migration 021's unique index)
+        insert_response = supabase.table('group_members').upsert({
             'group_id': group['id'],
             'user_id': user_id,
             'role': 'member'
-        }).execute()
+        }, on_conflict='group_id,user_id', ignore_duplicates=True).execute()
+        
+        if not insert_response.data:
+            print(f"⚠️  User is already a member of this group")
+            return
         
-        if insert_response.data:
-            print(f"✅ Successfully added user {user_id} to group: {group['name']}")
-        else:
-            print(f"❌ Failed to add user to group")
+        print(f"✅ Successfully added user {user_id} to group: {group['name']}")
             
     except Exception as e:
         print(f"❌ Error: {e}")
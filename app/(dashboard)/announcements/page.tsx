@@ -1,16 +1,38 @@
+'use client';
+
 import DashboardHeader from '@/components/layout/DashboardHeader';
+import { useAnnouncements } from '@/lib/hooks/useAnnouncements';
 
 export default function AnnouncementsPage() {
+  const { announcements, loading, error } = useAnnouncements();
+
   return (
     <div>
       <DashboardHeader period={21} />
       <main className="max-w-md mx-auto px-4 py-6">
-        <div className="bg-yellow-100 border-4 border-yellow-400 rounded-lg p-8 text-center">
-          <h1 className="text-3xl font-bold mb-4 text-yellow-900">📢 公告頁面 (更新中)</h1>
-          <p className="text-lg text-yellow-800">這是公告頁面！導航成功了！</p>
+        <h1 className="text-2xl font-bold mb-4">📢 最新消息</h1>
+
+        {loading && <p className="text-gray-500 text-center py-8">載入中...</p>}
+
+        {error && (
+          <p className="text-red-600 text-center py-8">無法載入公告，請稍後再試。</p>
+        )}
+
+        {!loading && !error && announcements.length === 0 && (
+          <div className="bg-yellow-100 border-4 border-yellow-400 rounded-lg p-8 text-center">
+            <p className="text-lg text-yellow-800">暫時沒有公告，明天再來看看小組日報吧！</p>
+          </div>
+        )}
+
+        <div className="space-y-4">
+          {announcements.map((announcement) => (
+            <article key={announcement.id} className="bg-white rounded-lg shadow p-4">
+              <h2 className="text-lg font-semibold mb-2">{announcement.title}</h2>
+              <p className="text-gray-700 whitespace-pre-line leading-relaxed">{announcement.body}</p>
+            </article>
+          ))}
         </div>
       </main>
     </div>
   );
 }
-
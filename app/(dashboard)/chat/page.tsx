@@ -15,12 +15,13 @@ export default function ChatPage() {
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const supabase = createClient();
 
-  const { messages, loading, error, sendMessage } = useChat(currentGroupId);
+  const { messages, loading, loadingOlder, hasMore, error, sendMessage, loadOlder } = useChat(currentGroupId);
+  const newestMessageId = messages.length > 0 ? messages[messages.length - 1].id : null;
 
-  // Scroll to bottom when new messages arrive
+  // Scroll to bottom when new messages arrive (not when older ones are loaded above)
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
-  }, [messages]);
+  }, [newestMessageId]);
 
   // Mark messages as read when user is on chat page
   useEffect(() => {
@@ -167,6 +168,17 @@ export default function ChatPage() {
             </div>
           ) : (
             <>
+              {hasMore && (
+                <div className="flex justify-center mb-4">
+                  <button
+                    onClick={loadOlder}
+                    disabled={loadingOlder}
+                    className="text-sm text-gray-600 bg-gray-100 hover:bg-gray-200 rounded-full px-4 py-1 disabled:opacity-50"
+                  >
+                    {loadingOlder ? '載入中...' : '載入更早的訊息'}
+                  </button>
+                </div>
+              )}
               {messages.map((msg) => (
                 <ChatMessage
                   key={msg.id}
@@ -109,9 +109,17 @@ export default function TodayContentPage() {
           </h1>
           
           <div className="prose prose-gray max-w-none">
-            <div className="whitespace-pre-wrap text-gray-700 leading-relaxed">
-              {content.content}
-            </div>
+            {content.content_html ? (
+              // Rendered and sanitized at import time (scripts/lesson_render.py)
+              <div
+                className="text-gray-700 leading-relaxed"
+                dangerouslySetInnerHTML={{ __html: content.content_html }}
+              />
+            ) : (
+              <div className="whitespace-pre-wrap text-gray-700 leading-relaxed">
+                {content.content}
+              </div>
+            )}
           </div>
         </div>
 
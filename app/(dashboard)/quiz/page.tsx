@@ -74,6 +74,8 @@ export default function QuizPage() {
         p_day_number: day,
         p_score: finalScore,
         p_total_questions: questions.length,
+        // Graded again on the server (python main.py grade-quizzes)
+        p_answers: questions.map((_: any, index: number) => selectedAnswers[index] ?? null),
       };
 
       const { error } = await supabase.rpc('save_quiz_response', resultData);
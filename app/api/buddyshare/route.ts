@@ -34,131 +34,48 @@ export async function GET(request: NextRequest) {
     console.log('Debug - User ID:', user.id);
     console.log('Debug - Group ID:', groupId);
 
-    // Fetch text shares from group using group_id directly
-    const { data: textShares, error: textSharesError } = await supabase
-      .from('text_shares')
-      .select(`
-        id,
-        user_id,
-        content,
-        day_number,
-        created_at,
-        updated_at,
-        profiles (
-          display_name
-        )
-      `)
-      .eq('group_id', groupId)  // Direct group_id filter (efficient!)
+    // One indexed read of the materialized feed (python main.py feed keeps it
+    // current): names and like / comment counts are already filled in
+    const { data: feedRows, error: feedError } = await supabase
+      .from('buddyshare_feed')
+      .select('share_id, share_type, user_id, user_name, content, day_number, food_name, food_image_url, food_thumb_url, detected_foods, like_count, comment_count, created_at, updated_at')
+      .eq('group_id', groupId)
       .neq('user_id', user.id)  // Exclude own shares
       .order('created_at', { ascending: false })
-      .limit(20);
+      .limit(40);
 
-    if (textSharesError) {
-      console.error('Error fetching text shares:', textSharesError);
+    if (feedError) {
+      console.error('Error fetching feed:', feedError);
+      return NextResponse.json({ error: 'Failed to fetch shares' }, { status: 500 });
     }
-    console.log('Debug - Text shares found (from other users):', textShares?.length || 0);
-
-    // Fetch food logs from group using group_id directly
-    const { data: foodLogs, error: foodLogsError } = await supabase
-      .from('food_logs')
-      .select(`
-        id,
-        user_id,
-        food_name,
-        content,
-        image_url,
-        detected_foods,
-        created_at,
-        updated_at,
-        profiles (
-          display_name
-        )
-      `)
-      .eq('group_id', groupId)  // Direct group_id filter (efficient!)
-      .neq('user_id', user.id)  // Exclude own logs
-      .order('created_at', { ascending: false })
-      .limit(20);
-
-    if (foodLogsError) {
-      console.error('Error fetching food logs:', foodLogsError);
-    }
-    console.log('Debug - Food logs found (from other users):', foodLogs?.length || 0);
-
-    // Get comment counts for all shares
-    const shareIds: string[] = [];
-    if (textShares) {
-      shareIds.push(...textShares.map(share => share.id));
-    }
-    if (foodLogs) {
-      shareIds.push(...foodLogs.map(log => log.id));
-    }
-
-    const { data: commentCounts } = await supabase
-      .from('share_comments')
-      .select('share_id, share_type')
-      .in('share_id', shareIds);
-
-    // Get reaction counts for all shares
-    const { data: reactionCounts } = await supabase
-      .from('share_reactions')
-      .select('share_id, share_type')
-      .in('share_id', shareIds);
+    console.log('Debug - Feed rows found (from other users):', feedRows?.length || 0);
 
     // Get user's reactions
+    const shareIds = (feedRows || []).map(row => row.share_id);
     const { data: userReactions } = await supabase
       .from('share_reactions')
       .select('share_id, share_type')
       .eq('user_id', user.id)
       .in('share_id', shareIds);
 
-    // Transform text shares
-    const transformedTextShares: ShareItem[] = (textShares || []).map(share => {
-      const commentCount = commentCounts?.filter(c => c.share_id === share.id && c.share_type === 'text_share').length || 0;
-      const likeCount = reactionCounts?.filter(r => r.share_id === share.id && r.share_type === 'text_share').length || 0;
-      const isLiked = userReactions?.some(r => r.share_id === share.id && r.share_type === 'text_share') || false;
-
-      return {
-        id: share.id,
-        type: 'text_share' as const,
-        user_id: share.user_id,
-        user_name: share.profiles?.display_name || `用戶${share.user_id.slice(-4)}`,
-        content: share.content,
-        created_at: share.created_at,
-        updated_at: share.updated_at,
-        day_number: share.day_number,
-        like_count: likeCount,
-        comment_count: commentCount,
-        is_liked: isLiked,
-      };
-    });
-
-    // Transform food logs
-    const transformedFoodLogs: ShareItem[] = (foodLogs || []).map(log => {
-      const commentCount = commentCounts?.filter(c => c.share_id === log.id && c.share_type === 'food_log').length || 0;
-      const likeCount = reactionCounts?.filter(r => r.share_id === log.id && r.share_type === 'food_log').length || 0;
-      const isLiked = userReactions?.some(r => r.share_id === log.id && r.share_type === 'food_log') || false;
-
-      return {
-        id: log.id,
-        type: 'food_log' as const,
-        user_id: log.user_id,
-        user_name: log.profiles?.display_name || `用戶${log.user_id.slice(-4)}`,
-        content: log.content || '',
-        created_at: log.created_at,
-        updated_at: log.updated_at,
-        food_name: log.food_name,
-        food_image_url: log.image_url,
-        detected_foods: log.detected_foods || [],
-        day_number: 1, // Default day number for now
-        like_count: likeCount,
-        comment_count: commentCount,
-        is_liked: isLiked,
-      };
-    });
-
-    // Combine and sort by creation date
-    const allShares = [...transformedTextShares, ...transformedFoodLogs]
-      .sort((a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime());
+    const allShares: ShareItem[] = (feedRows || []).map(row => ({
+      id: row.share_id,
+      type: row.share_type,
+      user_id: row.user_id,
+      user_name: row.user_name,
+      content: row.content || '',
+      created_at: row.created_at,
+      updated_at: row.updated_at,
+      day_number: row.day_number,
+      like_count: row.like_count,
+      comment_count: row.comment_count,
+      is_liked: userReactions?.some(r => r.share_id === row.share_id && r.share_type === row.share_type) || false,
+      ...(row.share_type === 'food_log' && {
+        food_name: row.food_name,
+        food_image_url: row.food_thumb_url || row.food_image_url,
+        detected_foods: row.detected_foods || [],
+      }),
+    }));
 
     return NextResponse.json(allShares);
   } catch (error) {
@@ -1,6 +1,8 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { createClient } from '@/lib/supabase/server';
 import { GoogleGenerativeAI } from '@google/generative-ai';
+import { MAX_HASH_DISTANCE } from '@/lib/utils/imageHash';
+import { dhashFromImageBuffer } from '@/lib/utils/imageHashServer';
 
 export async function POST(request: NextRequest) {
   try {
@@ -35,6 +37,20 @@ export async function POST(request: NextRequest) {
       );
     }
 
+    // Same or near-identical photo analyzed before? (food_image_hashes, see scripts/food_image_cache.py)
+    // Hashed here from the uploaded bytes, exactly as the Python job hashes stored photos
+    const imageHash = await dhashFromImageBuffer(Buffer.from(image, 'base64')).catch(() => null);
+    if (imageHash) {
+      const { data: matches } = await supabase.rpc('match_food_image', {
+        p_hash: imageHash,
+        p_max_distance: MAX_HASH_DISTANCE,
+      });
+      const foods = matches?.[0]?.detected_foods;
+      if (Array.isArray(foods) && foods.length > 0) {
+        return NextResponse.json({ foods, cached: true }, { status: 200 });
+      }
+    }
+
     // Initialize Gemini AI
     const genAI = new GoogleGenerativeAI(apiKey);
     const model = genAI.getGenerativeModel({ model: 'gemini-2.0-flash-exp' });
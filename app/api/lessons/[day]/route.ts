@@ -0,0 +1,68 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { createClient } from '@/lib/supabase/server';
+
+// Pre-rendered lesson (see scripts/import_book_content.py) with a strong ETag,
+// so browsers and CDN edges can revalidate with If-None-Match and get a 304.
+// GET /api/lessons/7            -> sanitized HTML
+// GET /api/lessons/7?format=text -> plain text
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ day: string }> }
+) {
+  try {
+    const { day } = await params;
+    const dayNumber = Number(day);
+    if (!Number.isInteger(dayNumber) || dayNumber < 1 || dayNumber > 21) {
+      return NextResponse.json({ error: 'Invalid day number' }, { status: 400 });
+    }
+
+    const asText = request.nextUrl.searchParams.get('format') === 'text';
+    const supabase = await createClient();
+
+    // Check the ETag first so a revalidation never transfers the lesson body
+    const { data: row, error } = await supabase
+      .from('daily_content')
+      .select('content_etag, content_text_etag')
+      .eq('day_number', dayNumber)
+      .single();
+
+    const etag = asText ? row?.content_text_etag : row?.content_etag;
+    if (error || !etag) {
+      return NextResponse.json({ error: 'Lesson not found' }, { status: 404 });
+    }
+
+    const headers = {
+      ETag: etag,
+      'Cache-Control': 'public, max-age=300, stale-while-revalidate=86400',
+      Vary: 'Accept-Encoding',
+    };
+
+    const ifNoneMatch = request.headers.get('if-none-match');
+    if (ifNoneMatch && ifNoneMatch.split(',').some((tag) => tag.trim() === etag)) {
+      return new NextResponse(null, { status: 304, headers });
+    }
+
+    const column = asText ? 'content_text' : 'content_html';
+    const { data: lesson } = await supabase
+      .from('daily_content')
+      .select(column)
+      .eq('day_number', dayNumber)
+      .single();
+
+    const body = (lesson as Record<string, string> | null)?.[column];
+    if (!body) {
+      return NextResponse.json({ error: 'Lesson not found' }, { status: 404 });
+    }
+
+    return new NextResponse(body, {
+      status: 200,
+      headers: {
+        ...headers,
+        'Content-Type': asText ? 'text/plain; charset=utf-8' : 'text/html; charset=utf-8',
+      },
+    });
+  } catch (error) {
+    console.error('Error serving lesson:', error);
+    return NextResponse.json({ error: 'Internal server error' }, { status: 500 });
+  }
+}
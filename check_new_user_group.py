@@ -1,34 +1,136 @@
 #!/usr/bin/env python3
 import os
+import sys
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
-def check_user_group():
-    # Load environment variables
-    load_dotenv('.env')
-    load_dotenv('frontend/.env.local')
-    
-    supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-    service_role_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-    
-    if not supabase_url or not service_role_key:
-        print("❌ Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
-        return
+# PostgREST puts filters in the query string, so very long `in.(...)` lists
+# are split into chunks of this many ids
+IN_FILTER_CHUNK = 100
+
+# auth.admin.list_users page size (GoTrue caps this at 1000)
+USERS_PAGE_SIZE = 1000
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def find_users_by_email(supabase: Client, emails):
+    """
+    Look up auth users for many emails with a single paginated pass over
+    auth.admin.list_users (instead of one full listing per email).
+    Returns {email: user} for the emails that were found.
+    """
+    wanted = {email.strip().lower() for email in emails if email.strip()}
+    found = {}
+    page = 1
+    while wanted - found.keys():
+        users = supabase.auth.admin.list_users(page=page, per_page=USERS_PAGE_SIZE)
+        for u in users:
+            if u.email and u.email.lower() in wanted:
+                found[u.email.lower()] = u
+        if len(users) < USERS_PAGE_SIZE:
+            break
+        page += 1
+    return found
+
+
+def membership_report(supabase: Client, user_ids):
+    """
+    Return the group memberships of many users in a constant number of
+    round trips.
+
+    Group names come from the embedded `groups(name)` relation on
+    group_members, so there is no per-membership lookup. If the relation
+    is not exposed by PostgREST we fall back to one batched `in_` query
+    on groups.
+
+    Returns {user_id: [{group_id, group_name, role, joined_at}, ...]}
+    """
+    user_ids = list(dict.fromkeys(str(uid) for uid in user_ids))
+    report = {uid: [] for uid in user_ids}
+    if not user_ids:
+        return report
+
+    rows = []
+    embedded = True
+    for chunk in _chunks(user_ids, IN_FILTER_CHUNK):
+        try:
+            result = supabase.table('group_members') \
+                .select('user_id, group_id, role, joined_at, groups(name)') \
+                .in_('user_id', chunk) \
+                .order('joined_at') \
+                .execute()
+        except Exception:
+            # No FK relationship visible to PostgREST - select plain columns
+            embedded = False
+            result = supabase.table('group_members') \
+                .select('user_id, group_id, role, joined_at') \
+                .in_('user_id', chunk) \
+                .order('joined_at') \
+                .execute()
+        rows.extend(result.data or [])
+
+    group_names = {}
+    if not embedded:
+        group_ids = sorted({row['group_id'] for row in rows if row.get('group_id')})
+        for chunk in _chunks(group_ids, IN_FILTER_CHUNK):
+            groups = supabase.table('groups').select('id, name').in_('id', chunk).execute()
+            group_names.update({g['id']: g['name'] for g in groups.data or []})
+
+    for row in rows:
+        group = row.get('groups') or {}
+        report.setdefault(row['user_id'], []).append({
+            'group_id': row['group_id'],
+            'group_name': group.get('name') or group_names.get(row['group_id'], '(unknown group)'),
+            'role': row['role'],
+            'joined_at': row['joined_at'],
+        })
+    return report
+
+
+def print_membership_report(supabase: Client, emails):
+    """Print users, roles, join dates and group names for many emails"""
+    users = find_users_by_email(supabase, emails)
+    report = membership_report(supabase, [u.id for u in users.values()])
+
+    for email in emails:
+        user = users.get(email.strip().lower())
+        if not user:
+            print(f"❌ {email}: user not found")
+            continue
+        memberships = report.get(user.id, [])
+        print(f"👤 {user.email} ({user.id}) - {len(memberships)} group(s)")
+        for membership in memberships:
+            print(f"   - {membership['group_name']} | Role: {membership['role']} | Joined at: {membership['joined_at']}")
+        print()
+
+
+def check_user_group(supabase=None):
+    if supabase is None:
+        # Load environment variables
+        load_dotenv('.env')
+        load_dotenv('frontend/.env.local')
+        
+        supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+        service_role_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        
+        if not supabase_url or not service_role_key:
+            print("❌ Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+            return
     
     try:
-        supabase: Client = create_client(supabase_url, service_role_key)
+        if supabase is None:
+            supabase = create_client(supabase_url, service_role_key)
         print("✅ Connected to Supabase\n")
         
         # Get the email of the new user (you need to provide this)
         email = input("Enter the new user's email: ").strip()
         
         # Find user by email
-        response = supabase.auth.admin.list_users()
-        user = None
-        for u in response:
-            if u.email == email:
-                user = u
-                break
+        user = find_users_by_email(supabase, [email]).get(email.lower())
         
         if not user:
             print(f"❌ User with email {email} not found")
@@ -39,15 +141,13 @@ def check_user_group():
         print(f"   Email confirmed: {user.email_confirmed_at is not None}")
         print(f"   Created at: {user.created_at}\n")
         
-        # Check group membership
-        group_response = supabase.table('group_members').select('*').eq('user_id', user.id).execute()
+        # Check group membership (group names come back in the same query)
+        memberships = membership_report(supabase, [user.id])[user.id]
         
-        if group_response.data:
-            print(f"✅ User is in {len(group_response.data)} group(s):")
-            for membership in group_response.data:
-                # Get group name
-                group_data = supabase.table('groups').select('name').eq('id', membership['group_id']).single().execute()
-                print(f"   - Group: {group_data.data['name']}")
+        if memberships:
+            print(f"✅ User is in {len(memberships)} group(s):")
+            for membership in memberships:
+                print(f"   - Group: {membership['group_name']}")
                 print(f"     Role: {membership['role']}")
                 print(f"     Joined at: {membership['joined_at']}")
         else:
@@ -78,7 +178,18 @@ def check_user_group():
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    check_user_group()
+    if len(sys.argv) > 1:
+        # Batch mode: python3 check_new_user_group.py a@example.com b@example.com ...
+        load_dotenv('.env')
+        load_dotenv('frontend/.env.local')
+        supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+        service_role_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        if not supabase_url or not service_role_key:
+            print("❌ Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+            sys.exit(1)
+        print_membership_report(create_client(supabase_url, service_role_key), sys.argv[1:])
+    else:
+        check_user_group()
 
 
 
@@ -0,0 +1,42 @@
+// Group Announcements Hook
+'use client';
+
+import { useEffect, useState } from 'react';
+import { createClient } from '@/lib/supabase/client';
+import type { GroupAnnouncement } from '@/lib/types/database';
+
+// RLS limits the rows to the user's own groups
+export const useAnnouncements = (limit = 14) => {
+  const [announcements, setAnnouncements] = useState<GroupAnnouncement[]>([]);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState<Error | null>(null);
+  const supabase = createClient();
+
+  useEffect(() => {
+    const fetchAnnouncements = async () => {
+      try {
+        setLoading(true);
+
+        const { data, error } = await supabase
+          .from('group_announcements')
+          .select('id, group_id, kind, digest_date, title, body, created_at')
+          .order('created_at', { ascending: false })
+          .limit(limit);
+
+        if (error) {
+          throw error;
+        }
+
+        setAnnouncements(data || []);
+      } catch (err) {
+        setError(err as Error);
+      } finally {
+        setLoading(false);
+      }
+    };
+
+    fetchAnnouncements();
+  }, [limit, supabase]);
+
+  return { announcements, loading, error };
+};
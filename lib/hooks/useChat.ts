@@ -4,12 +4,31 @@ import { useEffect, useState } from 'react';
 import { createClient } from '@/lib/supabase/client';
 import { ChatMessage } from '@/lib/types/database';
 
+// Messages per page; older pages come from chat_history (hot + archived chat)
+const PAGE_SIZE = 50;
+
 export function useChat(groupId: string | null) {
   const [messages, setMessages] = useState<ChatMessage[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const [hasMore, setHasMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const supabase = createClient();
 
+  // One page, newest first from the server, returned oldest first for display
+  const fetchPage = async (before?: ChatMessage) => {
+    const { data, error: fetchError } = await supabase.rpc('chat_history', {
+      p_group_id: groupId,
+      p_before_created_at: before?.created_at ?? null,
+      p_before_id: before?.id ?? null,
+      p_limit: PAGE_SIZE,
+    });
+    if (fetchError) throw fetchError;
+    const page = (data || []) as ChatMessage[];
+    setHasMore(page.length === PAGE_SIZE);
+    return page.reverse();
+  };
+
   // Fetch initial messages
   useEffect(() => {
     if (!groupId) {
@@ -25,15 +44,7 @@ export function useChat(groupId: string | null) {
 
     try {
       setLoading(true);
-      const { data, error: fetchError } = await supabase
-        .from('chat_messages')
-        .select('*')
-        .eq('group_id', groupId)
-        .order('created_at', { ascending: true })
-        .limit(100);
-
-      if (fetchError) throw fetchError;
-      setMessages(data || []);
+      setMessages(await fetchPage());
       setError(null);
     } catch (err) {
       console.error('Error fetching messages:', err);
@@ -43,6 +54,25 @@ export function useChat(groupId: string | null) {
     }
   };
 
+  // Load the page before the oldest message shown (reaches into the archive)
+  const loadOlder = async () => {
+    if (!groupId || loadingOlder || !hasMore || messages.length === 0) return;
+
+    try {
+      setLoadingOlder(true);
+      const older = await fetchPage(messages[0]);
+      setMessages((current) => {
+        const shown = new Set(current.map((m) => m.id));
+        return [...older.filter((m) => !shown.has(m.id)), ...current];
+      });
+    } catch (err) {
+      console.error('Error fetching older messages:', err);
+      setError(err instanceof Error ? err.message : '無法載入更早的訊息');
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   // Subscribe to real-time messages
   useEffect(() => {
     if (!groupId) return;
@@ -59,7 +89,10 @@ export function useChat(groupId: string | null) {
         },
         (payload) => {
           console.log('New message received:', payload);
-          setMessages((current) => [...current, payload.new as ChatMessage]);
+          const message = payload.new as ChatMessage;
+          setMessages((current) =>
+            current.some((m) => m.id === message.id) ? current : [...current, message]
+          );
         }
       )
       .subscribe();
@@ -100,8 +133,11 @@ export function useChat(groupId: string | null) {
   return {
     messages,
     loading,
+    loadingOlder,
+    hasMore,
     error,
     sendMessage,
+    loadOlder,
     refreshMessages: fetchMessages,
   };
 }
@@ -1,33 +1,68 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { createClient } from '@/lib/supabase/client';
 import { useAuth } from './useAuth';
 
-const LAST_READ_KEY = 'chat_last_read_timestamp';
-
+// Unread counts are precomputed in chat_read_cursors by `python main.py unread`.
+// Only messages newer than the job's last run (received_through) are counted here;
+// before the job's first count for a member, everything since they joined is.
 export function useUnreadMessages(groupId: string | null) {
   const [unreadCount, setUnreadCount] = useState(0);
   const supabase = createClient();
   const { user } = useAuth();
+  // received_count from the cursor, and messages from others not yet in it
+  const receivedRef = useRef(0);
+  const pendingRef = useRef(0);
 
   useEffect(() => {
     if (!groupId || !user) return;
 
-    // Get last read timestamp from localStorage
-    const lastRead = localStorage.getItem(LAST_READ_KEY);
-    const lastReadTime = lastRead ? new Date(lastRead) : new Date(0);
-
-    // Count unread messages
     const countUnread = async () => {
-      const { count } = await supabase
-        .from('chat_messages')
-        .select('*', { count: 'exact', head: true })
+      const { data: cursor } = await supabase
+        .from('chat_read_cursors')
+        .select('received_count, read_count, received_through')
         .eq('group_id', groupId)
-        .neq('user_id', user.id) // Don't count own messages
-        .gt('created_at', lastReadTime.toISOString());
+        .eq('user_id', user.id)
+        .maybeSingle();
+
+      receivedRef.current = cursor?.received_count || 0;
+      const readCount = cursor?.read_count || 0;
+
+      // Messages the job has not counted yet - a short index range scan
+      const countSince = async (table: string, operator: 'gt' | 'gte', since: string) => {
+        const { count } = await supabase
+          .from(table)
+          .select('*', { count: 'exact', head: true })
+          .eq('group_id', groupId)
+          .neq('user_id', user.id) // Don't count own messages
+          .filter('created_at', operator, since);
+        return count || 0;
+      };
 
-      setUnreadCount(count || 0);
+      let count: number;
+      if (cursor?.received_through) {
+        count = await countSince('chat_messages', 'gt', cursor.received_through);
+      } else {
+        // The job has never counted this member: it seeds received_count with
+        // everything from others since they joined, hot and archived, so
+        // count (and later mark as read) exactly that
+        const { data: membership } = await supabase
+          .from('group_members')
+          .select('joined_at')
+          .eq('group_id', groupId)
+          .eq('user_id', user.id)
+          .maybeSingle();
+        if (!membership) return;
+        const [hot, archived] = await Promise.all([
+          countSince('chat_messages', 'gte', membership.joined_at),
+          countSince('chat_messages_archive', 'gte', membership.joined_at),
+        ]);
+        count = hot + archived;
+      }
+
+      pendingRef.current = count;
+      setUnreadCount(Math.max(receivedRef.current - readCount, 0) + pendingRef.current);
     };
 
     countUnread();
@@ -46,6 +81,7 @@ export function useUnreadMessages(groupId: string | null) {
         (payload: any) => {
           // Only count messages from others
           if (payload.new.user_id !== user.id) {
+            pendingRef.current += 1;
             setUnreadCount((prev) => prev + 1);
           }
         }
@@ -58,11 +94,21 @@ export function useUnreadMessages(groupId: string | null) {
   }, [groupId, user]);
 
   // Function to mark as read
-  const markAsRead = () => {
-    localStorage.setItem(LAST_READ_KEY, new Date().toISOString());
+  const markAsRead = async () => {
     setUnreadCount(0);
+    if (!groupId || !user) return;
+
+    // The job will add the pending messages to received_count, so count them as read now
+    await supabase.from('chat_read_cursors').upsert(
+      {
+        group_id: groupId,
+        user_id: user.id,
+        read_count: receivedRef.current + pendingRef.current,
+        last_read_at: new Date().toISOString(),
+      },
+      { onConflict: 'group_id,user_id' }
+    );
   };
 
   return { unreadCount, markAsRead };
 }
-
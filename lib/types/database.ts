@@ -5,9 +5,20 @@ export interface DailyContent {
   day_number: number;
   title: string;
   content: string;
+  content_html?: string | null;
+  content_text?: string | null;
+  content_etag?: string | null;
+  content_text_etag?: string | null;
   created_at: string;
 }
 
+export interface LessonTerm {
+  term: string;
+  day_number: number;
+  frequency: number;
+  sections: number[];
+}
+
 export interface Quiz {
   id: string;
   day_number: number;
@@ -15,6 +26,28 @@ export interface Quiz {
   created_at: string;
 }
 
+// Script variants converted from the Traditional originals (zh-Hans = Simplified)
+export type ContentScript = 'zh-Hans';
+
+export interface DailyContentVariant {
+  day_number: number;
+  script: ContentScript;
+  title: string;
+  content: string;
+  content_html?: string | null;
+  content_text?: string | null;
+  content_etag?: string | null;
+  content_text_etag?: string | null;
+  updated_at: string;
+}
+
+export interface QuizVariant {
+  day_number: number;
+  script: ContentScript;
+  questions: QuizQuestion[];
+  updated_at: string;
+}
+
 export interface QuizQuestion {
   question: string;
   options: {
@@ -30,11 +63,40 @@ export interface QuizQuestion {
 export interface QuizResponse {
   id: string;
   user_id: string;
-  quiz_id: string;
-  question_index: number;
-  answer: string;
-  is_correct: boolean;
+  day_number: number;
+  score: number;
+  total_questions: number;
+  answers: (string | null)[] | null;
+  graded_score: number | null;
+  graded_total: number | null;
+  graded_at: string | null;
   answered_at: string;
+  created_at: string;
+}
+
+export interface QuizUserScore {
+  user_id: string;
+  days_completed: number;
+  total_correct: number;
+  total_questions: number;
+  accuracy: number | null;
+  perfect_days: number;
+  day_scores: (number | null)[];
+  last_day_number: number | null;
+  last_answered_at: string | null;
+  updated_at: string;
+}
+
+export interface QuizGroupScore {
+  group_id: string;
+  member_count: number;
+  participants: number;
+  quizzes_completed: number;
+  total_correct: number;
+  total_questions: number;
+  accuracy: number | null;
+  perfect_days: number;
+  updated_at: string;
 }
 
 export interface Group {
@@ -71,7 +133,10 @@ export interface FoodLog {
   user_id: string;
   group_id: string;
   image_url: string;
+  image_analysis_url?: string | null;
+  image_thumb_url?: string | null;
   detected_foods: unknown;
+  nutrients?: FoodLogNutrients | null;
   user_input: string | null;
   created_at: string;
   user?: {
@@ -79,6 +144,22 @@ export interface FoodLog {
   };
 }
 
+export interface NutrientAmounts {
+  energy_kcal: number;
+  protein_g: number;
+  fat_g: number;
+  carbs_g: number;
+  fibre_g: number;
+  sodium_mg: number;
+}
+
+export interface FoodLogNutrients {
+  version: number;
+  items: (NutrientAmounts & { name: string; matched: string; score: number; grams: number })[];
+  total: NutrientAmounts;
+  unmatched: string[];
+}
+
 export interface ChatMessage {
   id: string;
   group_id: string;
@@ -90,4 +171,50 @@ export interface ChatMessage {
   };
 }
 
+export interface GroupAnnouncement {
+  id: string;
+  group_id: string;
+  kind: 'daily_digest';
+  digest_date: string;
+  title: string;
+  body: string;
+  stats?: Record<string, number> | null;
+  created_at: string;
+}
+
+export interface ChatReadCursor {
+  group_id: string;
+  user_id: string;
+  received_count: number;
+  received_through: string | null;
+  read_count: number;
+  last_read_at: string | null;
+  unread_count: number;
+  updated_at: string;
+}
+
+export interface GroupDayStats {
+  group_id: string;
+  day_number: number;
+  member_count: number;
+  active_members: number;
+  quiz_completions: number;
+  quiz_score: number;
+  quiz_questions: number;
+  quiz_accuracy: number | null;
+  share_count: number;
+  sharers: number;
+  food_log_count: number;
+  food_loggers: number;
+  chat_messages: number;
+  completion_rate: number;
+  quiz_completion_rate: number;
+  share_rate: number;
+  food_log_rate: number;
+  active_rate: number;
+  quizzer_ids: string[];
+  sharer_ids: string[];
+  food_logger_ids: string[];
+  computed_at: string;
+}
 
@@ -0,0 +1,90 @@
+// Perceptual Hash for Food Photos
+// Bit-for-bit the same as dhash() in scripts/food_image_cache.py, which does
+// Pillow's convert('L') followed by resize((9, 8), BOX): the gray conversion
+// and the two-pass box resample below copy Pillow's integer arithmetic, so
+// the same pixels give the same 16 hex digits on both sides.
+// Pure functions - decode the image first (see imageHashServer.ts).
+
+// Largest Hamming distance (of 64 bits) still treated as the same photo
+export const MAX_HASH_DISTANCE = 6;
+
+// Pillow's fixed-point precision for 8-bit resampling
+const PRECISION_BITS = 32 - 8 - 2;
+
+// Pillow's rgb2l: ITU-R 601-2 luma in 16.16 fixed point
+const toGray = (pixels: Uint8Array, width: number, height: number, channels: number): Uint8Array => {
+  if (channels === 1) return pixels;
+  const gray = new Uint8Array(width * height);
+  for (let i = 0; i < gray.length; i++) {
+    const p = i * channels;
+    gray[i] = (pixels[p] * 19595 + pixels[p + 1] * 38470 + pixels[p + 2] * 7471 + 0x8000) >> 16;
+  }
+  return gray;
+};
+
+// Pillow's precompute_coeffs + normalize_coeffs_8bpc for the BOX filter
+const boxCoefficients = (inSize: number, outSize: number) => {
+  const scale = inSize / outSize;
+  const filterScale = Math.max(scale, 1);
+  const support = 0.5 * filterScale;
+  const ss = 1 / filterScale;
+  return Array.from({ length: outSize }, (_, xx) => {
+    const center = (xx + 0.5) * scale;
+    const xmin = Math.max(Math.trunc(center - support + 0.5), 0);
+    const xmax = Math.min(Math.trunc(center + support + 0.5), inSize) - xmin;
+    const weights: number[] = [];
+    let total = 0;
+    for (let x = 0; x < xmax; x++) {
+      const t = (x + xmin - center + 0.5) * ss;
+      const w = t > -0.5 && t <= 0.5 ? 1 : 0;
+      weights.push(w);
+      total += w;
+    }
+    const fixed = weights.map((w) => Math.trunc(0.5 + (total ? w / total : w) * (1 << PRECISION_BITS)));
+    return { xmin, fixed };
+  });
+};
+
+const clip8 = (value: number): number => {
+  if (value >= (1 << PRECISION_BITS) * 256) return 255;
+  if (value <= 0) return 0;
+  return value >> PRECISION_BITS;
+};
+
+// Horizontal pass, then vertical, rounding to 8 bits in between like Pillow
+const boxResize = (gray: Uint8Array, width: number, height: number, outWidth: number, outHeight: number) => {
+  const horizontal = boxCoefficients(width, outWidth);
+  const wide = new Uint8Array(outWidth * height);
+  for (let y = 0; y < height; y++) {
+    horizontal.forEach(({ xmin, fixed }, x) => {
+      let sum = 1 << (PRECISION_BITS - 1);
+      fixed.forEach((k, i) => { sum += gray[y * width + xmin + i] * k; });
+      wide[y * outWidth + x] = clip8(sum);
+    });
+  }
+
+  const vertical = boxCoefficients(height, outHeight);
+  const out = new Uint8Array(outWidth * outHeight);
+  vertical.forEach(({ xmin: ymin, fixed }, y) => {
+    for (let x = 0; x < outWidth; x++) {
+      let sum = 1 << (PRECISION_BITS - 1);
+      fixed.forEach((k, i) => { sum += wide[(ymin + i) * outWidth + x] * k; });
+      out[y * outWidth + x] = clip8(sum);
+    }
+  });
+  return out;
+};
+
+// 64-bit difference hash of decoded pixels (1 = gray, 3 = RGB, 4 = RGBA; alpha is ignored)
+export const dhashFromPixels = (pixels: Uint8Array, width: number, height: number, channels: number): string => {
+  const small = boxResize(toGray(pixels, width, height, channels), width, height, 9, 8);
+  let hash = '';
+  for (let row = 0; row < 8; row++) {
+    let byte = 0;
+    for (let col = 0; col < 8; col++) {
+      byte = (byte << 1) | (small[row * 9 + col] > small[row * 9 + col + 1] ? 1 : 0);
+    }
+    hash += byte.toString(16).padStart(2, '0');
+  }
+  return hash;
+};
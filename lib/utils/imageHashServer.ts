@@ -0,0 +1,15 @@
+// Server-side photo hashing (sharp is a Node-only dependency - keep this
+// file out of client components)
+import sharp from 'sharp';
+import { dhashFromPixels } from '@/lib/utils/imageHash';
+
+// dHash of encoded image bytes, decoded the way scripts/food_image_cache.py
+// does it: EXIF rotation applied, alpha dropped (Pillow's convert('L') ignores it)
+export const dhashFromImageBuffer = async (buffer: Buffer): Promise<string> => {
+  const { data, info } = await sharp(buffer)
+    .rotate()
+    .removeAlpha()
+    .raw()
+    .toBuffer({ resolveWithObject: true });
+  return dhashFromPixels(new Uint8Array(data.buffer, data.byteOffset, data.length), info.width, info.height, info.channels);
+};
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Nutrition Book Reader Club - Admin CLI
+======================================
+One entry point for the Python data and admin tools.
+
+Usage:
+    python main.py import                      # import the 21 lessons
+    python main.py keywords [--full]           # re-index glossary terms
+    python main.py generate [--provider deepseek] [--queued]
+    python main.py variants                    # Simplified Chinese lessons + quizzes
+    python main.py verify
+    python main.py verify-quizzes [--no-queue]
+    python main.py add-member <user_id> [invite_code]
+    python main.py check-user [email ...]
+    python main.py repair-memberships [--dry-run] [--report repair.json]
+    python main.py analytics [--full]
+    python main.py grade-quizzes [--full]
+    python main.py feed [--full]
+    python main.py archive-chat [--days 30] [--dry-run]
+    python main.py unread [--full]
+    python main.py digests [--date YYYY-MM-DD] [--dry-run]
+    python main.py food-images [--full] [--workers 4]
+    python main.py food-cache [--full] [--lookup photo.jpg]
+    python main.py nutrients [--full]
+    python main.py fake-supabase [--port 54321] [--latency-ms 40]
+    python main.py load-test [--fake] [--groups 100] [--members 50] [--days 21]
+    python main.py scheduler [--workers 2] [--port 8081] [--list] [--run JOB]
+    python main.py snapshot [--full] [--tables ...]
+    python main.py export-user <user_id> ... [--users-file ids.txt] [--out exports]
+    python main.py health
+    python main.py --profile [--profile-stacks] <command> ...   # cProfile + tracemalloc report
+    python main.py --telemetry [log.jsonl] <command> ...        # log every Supabase round trip
+
+Config (.env files) is resolved once by scripts/env_config.py.
+Heavy SDKs (supabase, google.generativeai, requests) are imported inside the
+subcommand that needs them, so --help and config checks start instantly.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = ROOT_DIR / "scripts"
+
+# The data scripts live in scripts/ and import each other as top-level modules
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from env_config import ConfigError, get_config  # noqa: E402
+from supabase_pool import execute_with_retry, get_client  # noqa: E402
+
+
+# ====== SUBCOMMANDS ======
+
+def cmd_import(args):
+    from import_book_content import import_all_content
+
+    import_all_content(get_client(admin=True))
+
+
+def cmd_keywords(args):
+    from lesson_keywords import build_keyword_index
+
+    build_keyword_index(get_client(admin=True), full=args.full)
+
+
+def cmd_generate(args):
+    if args.provider == "deepseek":
+        from generate_quizzes_deepseek import generate_all_quizzes
+    else:
+        from generate_all_quizzes import generate_all_quizzes
+
+    # Saves quizzes and their quiz_variants, which only the service role may write
+    admin = get_client(admin=True)
+    if not args.queued:
+        generate_all_quizzes(admin)
+        return
+
+    from quiz_grounding import mark_regenerated, pending_days
+
+    days = pending_days(admin)
+    if not days:
+        print("✅ No questions queued for regeneration")
+        return
+    print(f"📥 Regenerating the quizzes of days {days}\n")
+    mark_regenerated(admin, generate_all_quizzes(admin, days=days))
+
+
+def cmd_variants(args):
+    from chinese_convert import build_variants
+
+    build_variants(get_client(admin=True))
+
+
+def cmd_verify_quizzes(args):
+    from quiz_grounding import verify_quiz_grounding
+
+    verify_quiz_grounding(get_client(admin=True), queue=not args.no_queue)
+
+
+def cmd_verify(args):
+    from verify_data import verify_all_data
+
+    verify_all_data(get_client())
+
+
+def cmd_add_member(args):
+    from add_user_to_group import add_user_to_group
+
+    add_user_to_group(args.user_id, args.invite_code, supabase=get_client(admin=True))
+
+
+def cmd_check_user(args):
+    from check_new_user_group import check_user_group, print_membership_report
+
+    supabase = get_client(admin=True)
+    if args.emails:
+        print_membership_report(supabase, args.emails)
+    else:
+        check_user_group(supabase)
+
+
+def cmd_repair_memberships(args):
+    from membership_repair import repair_memberships
+
+    repair_memberships(get_client(admin=True), dry_run=args.dry_run, report_path=args.report)
+
+
+def cmd_analytics(args):
+    from analytics_refresh import refresh
+
+    refresh(get_client(admin=True), full=args.full)
+
+
+def cmd_grade_quizzes(args):
+    from quiz_grading import grade_quizzes
+
+    grade_quizzes(get_client(admin=True), full=args.full)
+
+
+def cmd_feed(args):
+    from buddyshare_feed import refresh_feed
+
+    refresh_feed(get_client(admin=True), full=args.full)
+
+
+def cmd_archive_chat(args):
+    from chat_archive import run_archive
+
+    run_archive(get_client(admin=True), default_days=args.days, group_id=args.group, dry_run=args.dry_run)
+
+
+def cmd_digests(args):
+    from group_digests import post_digests
+
+    day = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else None
+    post_digests(get_client(admin=True), day=day, dry_run=args.dry_run)
+
+
+def cmd_unread(args):
+    from unread_counts import refresh_unread
+
+    refresh_unread(get_client(admin=True), full=args.full)
+
+
+def cmd_food_images(args):
+    from food_images import process_images
+
+    process_images(get_client(admin=True), full=args.full, workers=args.workers)
+
+
+def cmd_food_cache(args):
+    from food_image_cache import build_index, print_lookup
+
+    supabase = get_client(admin=True)
+    if args.lookup:
+        print_lookup(supabase, args.lookup)
+    else:
+        build_index(supabase, full=args.full, workers=args.workers)
+
+
+def cmd_nutrients(args):
+    from food_nutrients import enrich_food_logs
+
+    enrich_food_logs(get_client(admin=True), full=args.full)
+
+
+def cmd_fake_supabase(args):
+    from fake_supabase import serve
+
+    serve(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+          load=args.load, dump=args.dump, verbose=args.verbose)
+
+
+def cmd_load_test(args):
+    from load_generator import LoadProfile, run_load_test
+
+    profile = LoadProfile(groups=args.groups, members=args.members, days=args.days, workers=args.workers)
+    try:
+        for rate in args.rate or []:
+            profile.set_rate(rate)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.fake:
+        from fake_supabase import start_server, use_fake_supabase
+
+        server = start_server(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+        use_fake_supabase(server)
+        print(f"🧪 Using the in-memory stand-in at {server.url}")
+    elif not args.yes:
+        answer = input(f"Write synthetic users and activity to {get_config().supabase_url}? [y/N] ")
+        if answer.strip().lower() != "y":
+            print("Cancelled")
+            return 1
+
+    run_load_test(get_client(admin=True), profile, report_path=args.report, remove=args.cleanup)
+
+
+def cmd_scheduler(args):
+    from scheduler import JOBS, run_scheduler
+
+    if args.list:
+        for job in JOBS:
+            metrics = job.metrics()
+            print(f"{job.name:<16} {metrics['schedule']:<14} next {metrics['next_run']}")
+        return
+    run_scheduler(get_client(admin=True), workers=args.workers, port=args.port, run=args.run)
+
+
+def cmd_export_user(args):
+    from user_export import EXPORT_DIR, export_users, read_user_ids
+
+    user_ids = list(args.user_ids)
+    if args.users_file:
+        user_ids += read_user_ids(args.users_file)
+    if not user_ids:
+        print("❌ Give user ids or --users-file")
+        sys.exit(1)
+    results = export_users(get_client(admin=True), user_ids, out_dir=args.out or EXPORT_DIR,
+                           workers=args.workers, force=args.force)
+    if any(isinstance(result, str) for result in results.values()):
+        sys.exit(1)
+
+
+def cmd_snapshot(args):
+    from snapshot_export import export_snapshot
+
+    compression = None if args.compression == "none" else args.compression
+    export_snapshot(get_client(admin=True), tables=args.tables, full=args.full, compression=compression)
+
+
+def cmd_health(args):
+    """Check config and that Supabase answers, with timings"""
+    config = get_config()
+    ok = True
+
+    print("🔧 Configuration")
+    for label, value in [
+        ("SUPABASE_URL", config.supabase_url),
+        ("SUPABASE_KEY", config.supabase_key),
+        ("SUPABASE_SERVICE_ROLE_KEY", config.service_role_key),
+        ("GEMINI_API_KEY", config.gemini_api_key),
+        ("DEEPSEEK_API_KEY", config.deepseek_api_key),
+    ]:
+        print(f"   {'✓' if value else '✗'} {label}")
+    if not config.supabase_url or not config.admin_key:
+        print("\n❌ Supabase is not configured")
+        return 1
+
+    print("\n🔌 Supabase")
+    start = time.perf_counter()
+    supabase = get_client(admin=True)
+    print(f"   ✓ Client ready ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    for table in ("daily_content", "quizzes", "groups"):
+        start = time.perf_counter()
+        try:
+            result = execute_with_retry(supabase.table(table).select("*", count="exact").limit(1))
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"   ✓ {table}: {result.count} rows ({elapsed:.0f} ms)")
+        except Exception as e:
+            print(f"   ✗ {table}: {e}")
+            ok = False
+
+    print("\n✅ Healthy" if ok else "\n⚠️  Some checks failed")
+    return 0 if ok else 1
+
+
+# ====== ARGUMENT PARSING ======
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Nutrition Book Reader Club admin tools",
+    )
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the run (cProfile + tracemalloc) and write a report to profiles/")
+    parser.add_argument("--profile-stacks", action="store_true",
+                        help="With --profile: also sample all threads into a flamegraph collapsed-stack file")
+    parser.add_argument("--profile-dir", help="Where to write profile reports (default: profiles/)")
+    parser.add_argument("--telemetry", nargs="?", const="", metavar="FILE",
+                        help="Log every Supabase request as JSONL (default: telemetry/<command>-<time>.jsonl)")
+    subparsers = parser.add_subparsers(dest="command", metavar="<command>")
+    subparsers.required = True
+
+    p = subparsers.add_parser("import", help="Import the book lessons into daily_content")
+    p.set_defaults(func=cmd_import)
+
+    p = subparsers.add_parser("keywords", help="Index glossary terms across the lessons")
+    p.add_argument("--full", action="store_true", help="Re-index unchanged lessons too")
+    p.set_defaults(func=cmd_keywords)
+
+    p = subparsers.add_parser("generate", help="Generate quizzes for all lessons")
+    p.add_argument("--provider", choices=["gemini", "deepseek"], default="gemini")
+    p.add_argument("--queued", action="store_true",
+                   help="Only regenerate days with questions queued by verify-quizzes")
+    p.set_defaults(func=cmd_generate)
+
+    p = subparsers.add_parser("variants", help="Convert lessons and quizzes to Simplified Chinese")
+    p.set_defaults(func=cmd_variants)
+
+    p = subparsers.add_parser("verify", help="Check lessons and quizzes are complete")
+    p.set_defaults(func=cmd_verify)
+
+    p = subparsers.add_parser("verify-quizzes", help="Check quiz answers against the lesson text, queue bad ones")
+    p.add_argument("--no-queue", action="store_true", help="Only report, do not queue flagged questions")
+    p.set_defaults(func=cmd_verify_quizzes)
+
+    p = subparsers.add_parser("add-member", help="Add a user to a group by invite code")
+    p.add_argument("user_id")
+    p.add_argument("invite_code", nargs="?", default="TEST001")
+    p.set_defaults(func=cmd_add_member)
+
+    p = subparsers.add_parser("check-user", help="Show group memberships (interactive without emails)")
+    p.add_argument("emails", nargs="*")
+    p.set_defaults(func=cmd_check_user)
+
+    p = subparsers.add_parser("repair-memberships", help="Fix duplicate memberships and wrong group_ids in batches")
+    p.add_argument("--dry-run", action="store_true", help="Only report, change nothing")
+    p.add_argument("--report", metavar="FILE", help="Also save the report as JSON")
+    p.set_defaults(func=cmd_repair_memberships)
+
+    p = subparsers.add_parser("analytics", help="Refresh per-group, per-day engagement stats")
+    p.add_argument("--full", action="store_true", help="Recompute from scratch instead of merging new rows")
+    p.set_defaults(func=cmd_analytics)
+
+    p = subparsers.add_parser("grade-quizzes", help="Grade quiz answers and update the score rollups")
+    p.add_argument("--full", action="store_true", help="Re-grade every response (after a quiz changes)")
+    p.set_defaults(func=cmd_grade_quizzes)
+
+    p = subparsers.add_parser("feed", help="Update the materialized BuddyShare feed")
+    p.add_argument("--full", action="store_true", help="Rebuild from scratch")
+    p.set_defaults(func=cmd_feed)
+
+    p = subparsers.add_parser("archive-chat", help="Move old chat messages to chat_messages_archive")
+    p.add_argument("--days", type=int, default=30, help="Default horizon for groups without chat_archive_days")
+    p.add_argument("--group", help="Only this group id")
+    p.add_argument("--dry-run", action="store_true", help="Only count what would move")
+    p.set_defaults(func=cmd_archive_chat)
+
+    p = subparsers.add_parser("unread", help="Update the precomputed unread chat counts")
+    p.add_argument("--full", action="store_true", help="Rebuild / backfill from the full chat history")
+    p.set_defaults(func=cmd_unread)
+
+    p = subparsers.add_parser("digests", help="Post yesterday's activity digest to every group")
+    p.add_argument("--date", help="Club-time day to summarize (default: yesterday)")
+    p.add_argument("--dry-run", action="store_true", help="Render a few digests without writing")
+    p.set_defaults(func=cmd_digests)
+
+    p = subparsers.add_parser("food-images", help="Make analysis-size and thumbnail copies of food photos")
+    p.add_argument("--full", action="store_true", help="Reprocess every image, including failed ones")
+    p.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    p.set_defaults(func=cmd_food_images)
+
+    p = subparsers.add_parser("food-cache", help="Index analyzed food photos by perceptual hash")
+    p.add_argument("--full", action="store_true", help="Re-hash every food log")
+    p.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    p.add_argument("--lookup", metavar="IMAGE", help="Show the cached analysis matching a local photo")
+    p.set_defaults(func=cmd_food_cache)
+
+    p = subparsers.add_parser("nutrients", help="Attach offline nutrient estimates to food logs")
+    p.add_argument("--full", action="store_true", help="Re-estimate every food log")
+    p.set_defaults(func=cmd_nutrients)
+
+    p = subparsers.add_parser("fake-supabase", help="Run an in-memory Supabase stand-in for offline runs")
+    p.add_argument("--port", type=int, default=54321)
+    p.add_argument("--latency-ms", type=float, default=0, help="Delay added to every request")
+    p.add_argument("--jitter-ms", type=float, default=0, help="Random extra delay, 0..N ms")
+    p.add_argument("--load", metavar="JSON", help="Seed tables from a {table: [rows]} file")
+    p.add_argument("--dump", metavar="JSON", help="Write the tables to this file on exit")
+    p.add_argument("--verbose", action="store_true", help="Log every request")
+    p.set_defaults(func=cmd_fake_supabase)
+
+    p = subparsers.add_parser("load-test", help="Simulate a full cohort and report write/read performance")
+    p.add_argument("--fake", action="store_true", help="Run against an in-process stand-in")
+    p.add_argument("--latency-ms", type=float, default=0, help="Stand-in delay per request (with --fake)")
+    p.add_argument("--jitter-ms", type=float, default=0, help="Stand-in random extra delay (with --fake)")
+    p.add_argument("--groups", type=int, default=100)
+    p.add_argument("--members", type=int, default=50, help="Members per group")
+    p.add_argument("--days", type=int, default=21)
+    p.add_argument("--workers", type=int, default=16, help="Concurrent requests")
+    p.add_argument("--rate", action="append", metavar="NAME=VALUE",
+                   help="Activity rate, e.g. chat_messages=5 or quiz_rate=0.9 (repeatable)")
+    p.add_argument("--report", metavar="JSON", help="Also save the report here")
+    p.add_argument("--cleanup", action="store_true", help="Delete the synthetic data afterwards")
+    p.add_argument("--yes", action="store_true", help="Don't ask before writing to a real project")
+    p.set_defaults(func=cmd_load_test)
+
+    p = subparsers.add_parser("scheduler", help="Run the maintenance jobs on their schedules (long-lived worker)")
+    p.add_argument("--workers", type=int, default=2, help="Jobs that may run at the same time")
+    p.add_argument("--port", type=int, help="Serve /healthz and /metrics on this port")
+    p.add_argument("--list", action="store_true", help="Show the jobs and their next run, then exit")
+    p.add_argument("--run", metavar="JOB", help="Run one job now and exit")
+    p.set_defaults(func=cmd_scheduler)
+
+    p = subparsers.add_parser("snapshot", help="Export club tables to local columnar files")
+    p.add_argument("--full", action="store_true", help="Re-export instead of appending new rows")
+    p.add_argument("--tables", nargs="+", help="Only these tables")
+    p.add_argument("--compression", choices=["zstd", "lz4", "none"], default="zstd")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = subparsers.add_parser("export-user", help="Export everything a user posted to a ZIP of JSONL files")
+    p.add_argument("user_ids", nargs="*")
+    p.add_argument("--users-file", metavar="FILE", help="Batch mode: one user id per line")
+    p.add_argument("--out", metavar="DIR", help="Output directory (default: exports/)")
+    p.add_argument("--workers", type=int, default=4, help="Users exported at once")
+    p.add_argument("--force", action="store_true", help="Re-export users that already have a ZIP")
+    p.set_defaults(func=cmd_export_user)
+
+    p = subparsers.add_parser("health", help="Check configuration and database connectivity")
+    p.set_defaults(func=cmd_health)
+
+    return parser
+
+
+def run(args):
+    try:
+        return args.func(args) or 0
+    except ConfigError as e:
+        print(f"❌ {e}")
+        return 1
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.telemetry is not None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        os.environ["SUPABASE_TELEMETRY"] = args.telemetry or str(ROOT_DIR / "telemetry" / f"{args.command}-{stamp}.jsonl")
+        get_config.cache_clear()
+    if not args.profile:
+        return run(args)
+
+    from profiling import profiled
+
+    with profiled(args.command, output_dir=args.profile_dir, stacks=args.profile_stacks):
+        return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
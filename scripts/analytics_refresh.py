@@ -0,0 +1,156 @@
+"""
+Incremental Analytics Refresh
+=============================
+Keeps 'group_day_stats' up to date by processing only rows added since the
+last run, instead of rescanning all history every hour.
+
+What it does:
+1. Reads the per-table watermarks (last created_at, id processed)
+2. Streams only newer quiz_responses, text_shares, food_logs and chat_messages
+3. Loads the persisted rows for the (group, day) cells those rows touch and
+   merges the new counts and member ids into them
+4. Re-rates groups whose member count changed since their rows were written
+5. Writes the merged rows and the new watermarks in one transaction
+   (apply_group_day_stats), so a crash can never leave rows that already
+   include a delta behind a watermark that does not - re-running is safe
+
+Once the last full pass is older than RECONCILE_HOURS it runs a full
+recompute instead (cohort_analytics.run_analytics). That picks up what an
+append-only watermark cannot see: retaken quizzes (quiz_responses rows are
+updated in place), deleted rows and late-arriving timestamps.
+
+Run the migration first: scripts/migrations/023_apply_group_day_stats.sql
+Usage: python main.py analytics          (incremental, reconciles when due)
+       python main.py analytics --full   (force a full recompute)
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from cohort_analytics import (
+    SUMMARY_TABLE,
+    WATERMARK_JOB,
+    ingest_activity,
+    load_cohorts,
+    run_analytics,
+    summarize_cell,
+)
+from streaming import stream_rows
+from supabase_pool import execute_with_retry, get_client
+from watermarks import last_full_refresh, load_watermarks, settle_cutoff
+
+# ====== CONFIGURATION ======
+# Run a full recompute when the last one is older than this
+RECONCILE_HOURS = 24
+
+# Group ids per `in_` filter when loading persisted rows
+IN_FILTER_CHUNK = 100
+
+COUNT_FIELDS = ("quiz_score", "quiz_questions", "share_count", "food_log_count", "chat_messages")
+ID_FIELDS = ("quizzer_ids", "sharer_ids", "food_logger_ids")
+
+
+def load_summary_rows(supabase, group_ids) -> dict:
+    """Return {(group_id, day_number): row} of persisted stats for some groups"""
+    group_ids = list(group_ids)
+    rows = {}
+    for start in range(0, len(group_ids), IN_FILTER_CHUNK):
+        chunk = group_ids[start:start + IN_FILTER_CHUNK]
+        for row in stream_rows(
+            supabase, SUMMARY_TABLE, "*",
+            key=("group_id", "day_number"),
+            filters=[("in_", "group_id", chunk)],
+        ):
+            rows[(row["group_id"], row["day_number"])] = row
+    return rows
+
+
+def merge_delta(delta, persisted: dict, computed_at: str):
+    """
+    Yield merged summary rows for every cell the delta touched, plus every
+    cell of groups whose member count no longer matches the persisted rows.
+    """
+    for gi, group_id, day, cell in delta.cells():
+        old = persisted.get((group_id, day))
+        member_count = delta.member_count[gi]
+        if not delta.is_touched(cell):
+            if old is None or old["member_count"] == member_count:
+                continue
+
+        counts = delta.cell_counts(cell)
+        ids = {
+            "quizzer_ids": delta.member_ids(gi, delta.quizzers[cell]),
+            "sharer_ids": delta.member_ids(gi, delta.sharers[cell]),
+            "food_logger_ids": delta.member_ids(gi, delta.food_loggers[cell]),
+        }
+        if old is not None:
+            for field in COUNT_FIELDS:
+                counts[field] += old.get(field) or 0
+            for field in ID_FIELDS:
+                ids[field] = set(ids[field]) | set(old.get(field) or ())
+
+        yield summarize_cell(
+            group_id, day, member_count, counts,
+            ids["quizzer_ids"], ids["sharer_ids"], ids["food_logger_ids"],
+            computed_at,
+        )
+
+
+def apply_refresh(supabase, rows: list, cursors: dict, last_seen: dict) -> int:
+    """
+    Write merged rows and advance the watermarks in one transaction.
+    Safe to retry: a call that already committed writes nothing the second time.
+    """
+    advanced = {table: cursor for table, cursor in last_seen.items()
+                if cursor is not None and cursor != cursors.get(table)}
+    params = {
+        "p_job": WATERMARK_JOB,
+        "p_rows": rows,
+        "p_watermarks": {table: list(cursor) for table, cursor in advanced.items()},
+        "p_previous": {table: list(cursor) for table, cursor in cursors.items()},
+    }
+    return execute_with_retry(supabase.rpc("apply_group_day_stats", params)).data or 0
+
+
+def refresh_incremental(supabase):
+    """Merge rows added since the last watermark into group_day_stats"""
+    cursors = load_watermarks(supabase, WATERMARK_JOB)
+
+    print("👥 Loading groups and memberships...")
+    delta = load_cohorts(supabase)
+
+    print("📊 Streaming new activity...")
+    last_seen = ingest_activity(supabase, delta, after=cursors, before=settle_cutoff())
+    if delta.skipped:
+        print(f"   ⚠️  Skipped {delta.skipped} rows with unknown group, user or day")
+
+    persisted = load_summary_rows(supabase, delta.group_ids)
+    computed_at = datetime.now(timezone.utc).isoformat()
+    rows = list(merge_delta(delta, persisted, computed_at))
+    written = apply_refresh(supabase, rows, cursors, last_seen)
+    print(f"\n✅ Updated {written} rows in {SUMMARY_TABLE}")
+    return written
+
+
+def refresh(supabase=None, full: bool = False):
+    """Incremental refresh, or a full recompute when forced or due"""
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    last_full = last_full_refresh(supabase, WATERMARK_JOB)
+    due = last_full is None or datetime.now(timezone.utc) - last_full > timedelta(hours=RECONCILE_HOURS)
+    if full or due:
+        print("🔁 Running full reconciliation pass\n")
+        run_analytics(supabase)
+    else:
+        refresh_incremental(supabase)
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Refresh Cohort Analytics")
+    print("=" * 50)
+    print()
+
+    refresh(full="--full" in sys.argv)
@@ -0,0 +1,297 @@
+"""
+Materialized BuddyShare Feed
+============================
+Maintains the 'buddyshare_feed' table: every text share and food log with
+the author's display name and comment / like counts already filled in.
+
+What it does (incremental, the default):
+1. Adds feed rows for text_shares and food_logs created since the last run
+2. Rewrites the feed rows of shares edited since the last run (by updated_at)
+3. Finds shares that got new comments or reactions since the last run
+4. Recounts comments and likes for those shares, plus every share from the
+   last RECOUNT_DAYS days (unlikes and deleted comments leave no new row)
+5. Saves the watermarks (see watermarks.py)
+
+Full rebuild (--full) re-reads everything, refreshes display names and
+removes feed rows whose share was deleted.
+
+Run the migrations first: scripts/migrations/008_buddyshare_feed.sql
+                          scripts/migrations/030_share_updated_at_index.sql
+Usage: python main.py feed [--full]
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from program_days import parse_timestamp, program_day
+from streaming import stream_rows
+from supabase_pool import execute_with_retry, get_client
+from watermarks import load_watermarks, save_watermarks, settle_cutoff
+
+# ====== CONFIGURATION ======
+FEED_TABLE = "buddyshare_feed"
+WATERMARK_JOB = "buddyshare_feed"
+
+# Shares younger than this are recounted on every incremental run
+RECOUNT_DAYS = 3
+
+# Ids per `in_` filter
+IN_FILTER_CHUNK = 100
+
+# Rows per upsert request
+WRITE_BATCH_SIZE = 500
+
+TEXT_SHARE_COLUMNS = "id, user_id, group_id, content, day_number, created_at, updated_at"
+FOOD_LOG_COLUMNS = (
+    "id, user_id, group_id, food_name, content, image_url, image_thumb_url, detected_foods, created_at, updated_at"
+)
+
+# share_type -> source table
+SHARE_TABLES = {"text_share": "text_shares", "food_log": "food_logs"}
+
+# Keyset for edited shares; its watermark is stored as "<table>.updated_at"
+EDIT_KEY = ("updated_at", "id")
+
+
+def edit_watermark(table: str) -> str:
+    return f"{table}.{EDIT_KEY[0]}"
+
+
+def _chunks(items, size=IN_FILTER_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def fallback_name(user_id: str) -> str:
+    """Same placeholder the BuddyShare API uses when a user has no profile"""
+    return f"用戶{user_id[-4:]}"
+
+
+def load_display_names(supabase, user_ids) -> dict:
+    """{user_id: display_name} for many users, one query per 100 ids"""
+    names = {}
+    for chunk in _chunks(set(user_ids)):
+        result = execute_with_retry(
+            supabase.table("user_profiles").select("user_id, display_name").in_("user_id", chunk)
+        )
+        names.update({row["user_id"]: row["display_name"] for row in result.data or []})
+    return names
+
+
+def count_interactions(supabase, share_keys) -> dict:
+    """
+    {(share_id, share_type): (comment_count, like_count)} for the given shares.
+    Shares with no interactions map to (0, 0).
+    """
+    share_keys = set(share_keys)
+    comments, likes = Counter(), Counter()
+    for table, counter in (("share_comments", comments), ("share_reactions", likes)):
+        for chunk in _chunks({share_id for share_id, _ in share_keys}):
+            for row in stream_rows(supabase, table, "share_id, share_type", filters=[("in_", "share_id", chunk)]):
+                counter[(row["share_id"], row["share_type"])] += 1
+    return {key: (comments[key], likes[key]) for key in share_keys}
+
+
+def feed_row(share_type: str, share: dict, names: dict, refreshed_at: str) -> dict:
+    """Turn a text_shares / food_logs row into a buddyshare_feed row"""
+    row = {
+        "share_id": share["id"],
+        "share_type": share_type,
+        "group_id": share["group_id"],
+        "user_id": share["user_id"],
+        "user_name": names.get(share["user_id"]) or fallback_name(share["user_id"]),
+        "content": share.get("content") or "",
+        "created_at": share["created_at"],
+        "updated_at": share.get("updated_at"),
+        "refreshed_at": refreshed_at,
+    }
+    if share_type == "text_share":
+        row["day_number"] = share.get("day_number") or program_day(share["created_at"])
+    else:
+        row["day_number"] = program_day(share["created_at"])
+        row["food_name"] = share.get("food_name")
+        row["food_image_url"] = share.get("image_url")
+        row["food_thumb_url"] = share.get("image_thumb_url")
+        row["detected_foods"] = share.get("detected_foods") or []
+    return row
+
+
+def upsert_feed(supabase, rows) -> int:
+    written = 0
+    for batch in _chunks(rows, WRITE_BATCH_SIZE):
+        execute_with_retry(supabase.table(FEED_TABLE).upsert(batch, on_conflict="share_id,share_type"))
+        written += len(batch)
+    return written
+
+
+def write_shares(supabase, shares, refreshed_at: str) -> int:
+    """
+    Upsert feed rows for [(share_type, share_row), ...] with names and counts.
+    Shares without a group_id are skipped (they cannot appear in any feed).
+    """
+    shares = [(t, s) for t, s in shares if s.get("group_id")]
+    if not shares:
+        return 0
+    names = load_display_names(supabase, {s["user_id"] for _, s in shares})
+    counts = count_interactions(supabase, {(s["id"], t) for t, s in shares})
+    rows = []
+    for share_type, share in shares:
+        row = feed_row(share_type, share, names, refreshed_at)
+        row["comment_count"], row["like_count"] = counts[(share["id"], share_type)]
+        rows.append(row)
+    return upsert_feed(supabase, rows)
+
+
+def recount(supabase, share_keys, refreshed_at: str) -> int:
+    """Refresh like/comment counts of existing feed rows, in batches"""
+    updated = 0
+    for share_type in SHARE_TABLES:
+        ids = [share_id for share_id, t in share_keys if t == share_type]
+        for chunk in _chunks(ids):
+            result = execute_with_retry(
+                supabase.table(FEED_TABLE).select("*").eq("share_type", share_type).in_("share_id", chunk)
+            )
+            rows = result.data or []
+            counts = count_interactions(supabase, {(row["share_id"], share_type) for row in rows})
+            for row in rows:
+                row["comment_count"], row["like_count"] = counts[(row["share_id"], share_type)]
+                row["refreshed_at"] = refreshed_at
+            updated += upsert_feed(supabase, rows)
+    return updated
+
+
+# ====== MAIN SCRIPT ======
+
+def refresh_incremental(supabase):
+    cursors = load_watermarks(supabase, WATERMARK_JOB)
+    refreshed_at = datetime.now(timezone.utc).isoformat()
+    settled = [("lt", "created_at", settle_cutoff())]
+    last_seen = {}
+
+    # 1. New shares
+    new_shares = []
+    for share_type, columns in (("text_share", TEXT_SHARE_COLUMNS), ("food_log", FOOD_LOG_COLUMNS)):
+        table = SHARE_TABLES[share_type]
+        last_seen[table] = cursors.get(table)
+        for share in stream_rows(supabase, table, columns, after=cursors.get(table), filters=settled):
+            new_shares.append((share_type, share))
+            last_seen[table] = (share["created_at"], share["id"])
+    added = write_shares(supabase, new_shares, refreshed_at)
+    new_keys = {(s["id"], t) for t, s in new_shares}
+
+    # 2. Edited shares (content, food name, photos) - rewrite their feed rows
+    edited = []
+    for share_type, columns in (("text_share", TEXT_SHARE_COLUMNS), ("food_log", FOOD_LOG_COLUMNS)):
+        source = edit_watermark(SHARE_TABLES[share_type])
+        last_seen[source] = cursors.get(source)
+        for share in stream_rows(supabase, SHARE_TABLES[share_type], columns, key=EDIT_KEY,
+                                 after=cursors.get(source),
+                                 filters=[("lt", "updated_at", settle_cutoff())]):
+            if (share["id"], share_type) not in new_keys:
+                edited.append((share_type, share))
+            last_seen[source] = (share["updated_at"], share["id"])
+    rewritten = write_shares(supabase, edited, refreshed_at)
+    new_keys |= {(s["id"], t) for t, s in edited}
+
+    # 3. Shares with new interactions, plus recent shares (catches unlikes)
+    touched = set()
+    for table in ("share_comments", "share_reactions"):
+        last_seen[table] = cursors.get(table)
+        for row in stream_rows(supabase, table, "id, share_id, share_type, created_at",
+                               after=cursors.get(table), filters=settled):
+            touched.add((row["share_id"], row["share_type"]))
+            last_seen[table] = (row["created_at"], row["id"])
+
+    recent_since = (datetime.now(timezone.utc) - timedelta(days=RECOUNT_DAYS)).isoformat()
+    for row in stream_rows(supabase, FEED_TABLE, "share_id, share_type, created_at",
+                           key=("created_at", "share_id"), filters=[("gte", "created_at", recent_since)]):
+        touched.add((row["share_id"], row["share_type"]))
+
+    recounted = recount(supabase, touched - new_keys, refreshed_at)
+    save_watermarks(supabase, WATERMARK_JOB, last_seen)
+    print(f"✅ Added {added} shares, rewrote {rewritten} edited shares, recounted {recounted}")
+
+
+def rebuild(supabase):
+    refreshed_at = datetime.now(timezone.utc).isoformat()
+    last_seen = {}
+
+    # Counts for every share in one pass over each interaction table
+    comments, likes = Counter(), Counter()
+    for table, counter in (("share_comments", comments), ("share_reactions", likes)):
+        last_seen[table] = None
+        for row in stream_rows(supabase, table, "id, share_id, share_type, created_at"):
+            counter[(row["share_id"], row["share_type"])] += 1
+            last_seen[table] = (row["created_at"], row["id"])
+
+    live_keys = set()
+    written = 0
+    for share_type, columns in (("text_share", TEXT_SHARE_COLUMNS), ("food_log", FOOD_LOG_COLUMNS)):
+        table = SHARE_TABLES[share_type]
+        last_seen[table] = None
+        last_edit = last_seen[edit_watermark(table)] = None
+        batch = []
+        for share in stream_rows(supabase, table, columns):
+            last_seen[table] = (share["created_at"], share["id"])
+            if share.get("updated_at"):
+                edit = (parse_timestamp(share["updated_at"]), share["id"])
+                if last_edit is None or edit > last_edit:
+                    last_edit = edit
+                    last_seen[edit_watermark(table)] = (share["updated_at"], share["id"])
+            if share.get("group_id"):
+                batch.append(share)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                written += _write_rebuild_batch(supabase, share_type, batch, comments, likes, refreshed_at, live_keys)
+                batch = []
+        written += _write_rebuild_batch(supabase, share_type, batch, comments, likes, refreshed_at, live_keys)
+
+    # Remove feed rows whose share no longer exists
+    stale = [
+        (row["share_id"], row["share_type"])
+        for row in stream_rows(supabase, FEED_TABLE, "share_id, share_type, created_at", key=("created_at", "share_id"))
+        if (row["share_id"], row["share_type"]) not in live_keys
+    ]
+    for share_type in SHARE_TABLES:
+        ids = [share_id for share_id, t in stale if t == share_type]
+        for chunk in _chunks(ids):
+            execute_with_retry(supabase.table(FEED_TABLE).delete().eq("share_type", share_type).in_("share_id", chunk))
+
+    save_watermarks(supabase, WATERMARK_JOB, last_seen, full_refresh=True)
+    print(f"✅ Rebuilt {written} feed rows, removed {len(stale)} stale rows")
+
+
+def _write_rebuild_batch(supabase, share_type, shares, comments, likes, refreshed_at, live_keys) -> int:
+    if not shares:
+        return 0
+    names = load_display_names(supabase, {s["user_id"] for s in shares})
+    rows = []
+    for share in shares:
+        key = (share["id"], share_type)
+        live_keys.add(key)
+        row = feed_row(share_type, share, names, refreshed_at)
+        row["comment_count"], row["like_count"] = comments[key], likes[key]
+        rows.append(row)
+    return upsert_feed(supabase, rows)
+
+
+def refresh_feed(supabase=None, full: bool = False):
+    if supabase is None:
+        supabase = get_client(admin=True)
+    if full:
+        print("🔁 Rebuilding BuddyShare feed\n")
+        rebuild(supabase)
+    else:
+        print("📰 Updating BuddyShare feed\n")
+        refresh_incremental(supabase)
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  BuddyShare Feed")
+    print("=" * 50)
+    print()
+
+    refresh_feed(full="--full" in sys.argv)
@@ -0,0 +1,159 @@
+"""
+Chat Message Archival
+=====================
+Moves chat messages older than each group's horizon from 'chat_messages'
+into 'chat_messages_archive', keeping the hot table small.
+
+What it does:
+1. Reads each group's horizon (groups.chat_archive_days, or the default)
+2. Copies the oldest expired messages of the group to the archive in batches
+   (upsert on id - copying the same message twice is harmless)
+3. Deletes exactly those ids from chat_messages
+4. Repeats until nothing older than the horizon is left
+
+Every batch is copy-then-delete, so the job can be stopped at any point and
+re-run: a batch that was copied but not deleted is simply copied again.
+
+The chat view pages through both tables with the chat_history SQL function
+(scripts/migrations/024_chat_history.sql), so archived messages stay
+reachable via "load older messages". read_history() is the same keyset
+read for Python tools.
+
+Run the migration first: scripts/migrations/009_chat_messages_archive.sql
+Usage: python main.py archive-chat [--days 30] [--group <group_id>] [--dry-run]
+"""
+
+import heapq
+from datetime import datetime, timedelta, timezone
+
+from program_days import parse_timestamp
+from streaming import keyset_filter
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+HOT_TABLE = "chat_messages"
+ARCHIVE_TABLE = "chat_messages_archive"
+
+# Days a message stays in the hot table when the group has no override
+DEFAULT_HORIZON_DAYS = 30
+
+# Messages moved per copy/delete round
+BATCH_SIZE = 500
+
+MESSAGE_COLUMNS = "id, group_id, user_id, message, created_at"
+HISTORY_KEY = ("created_at", "id")
+
+
+def group_horizons(supabase, default_days: int = DEFAULT_HORIZON_DAYS) -> dict:
+    """{group_id: horizon_days} for every group"""
+    result = execute_with_retry(supabase.table("groups").select("id, chat_archive_days"))
+    return {g["id"]: g.get("chat_archive_days") or default_days for g in result.data or []}
+
+
+def archive_group(supabase, group_id: str, cutoff: str, dry_run: bool = False) -> int:
+    """Move a group's messages created before cutoff; returns how many moved"""
+    if dry_run:
+        result = execute_with_retry(
+            supabase.table(HOT_TABLE)
+            .select("id", count="exact")
+            .eq("group_id", group_id)
+            .lt("created_at", cutoff)
+            .limit(1)
+        )
+        return result.count or 0
+
+    moved = 0
+    while True:
+        result = execute_with_retry(
+            supabase.table(HOT_TABLE)
+            .select(MESSAGE_COLUMNS)
+            .eq("group_id", group_id)
+            .lt("created_at", cutoff)
+            .order("created_at")
+            .order("id")
+            .limit(BATCH_SIZE)
+        )
+        rows = result.data or []
+        if not rows:
+            return moved
+
+        execute_with_retry(supabase.table(ARCHIVE_TABLE).upsert(rows, on_conflict="id"))
+        execute_with_retry(supabase.table(HOT_TABLE).delete().in_("id", [row["id"] for row in rows]))
+        moved += len(rows)
+        if len(rows) < BATCH_SIZE:
+            return moved
+
+
+def run_archive(supabase=None, default_days: int = DEFAULT_HORIZON_DAYS,
+                group_id: str = None, dry_run: bool = False) -> int:
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    horizons = group_horizons(supabase, default_days)
+    if group_id:
+        horizons = {group_id: horizons.get(group_id, default_days)}
+
+    now = datetime.now(timezone.utc)
+    total = 0
+    for gid, days in horizons.items():
+        cutoff = (now - timedelta(days=days)).isoformat()
+        moved = archive_group(supabase, gid, cutoff, dry_run)
+        if moved:
+            verb = "would move" if dry_run else "moved"
+            print(f"   ✓ {gid[:8]}... ({days} days): {verb} {moved} messages")
+        total += moved
+
+    print(f"\n✅ {'Dry run' if dry_run else 'Archived'}: {total} messages")
+    return total
+
+
+# ====== READING HISTORY ======
+
+def _history_page(supabase, table, group_id, before, limit):
+    query = supabase.table(table).select(MESSAGE_COLUMNS).eq("group_id", group_id)
+    if before is not None:
+        query = query.or_(keyset_filter(HISTORY_KEY, before, descending=True))
+    query = query.order("created_at", desc=True).order("id", desc=True).limit(limit)
+    return execute_with_retry(query).data or []
+
+
+def read_history(supabase, group_id: str, before=None, limit: int = 100):
+    """
+    Newest-first page of a group's chat across the hot and archive tables.
+
+    Args:
+        before: (created_at, id) of the oldest message already shown, or None
+    Returns:
+        (messages, next_cursor) - next_cursor is None when history is exhausted
+    """
+    hot = _history_page(supabase, HOT_TABLE, group_id, before, limit)
+    cold = _history_page(supabase, ARCHIVE_TABLE, group_id, before, limit)
+
+    def sort_key(row):
+        # The two tables format timestamps differently - compare parsed values
+        return (parse_timestamp(row["created_at"]), row["id"])
+
+    merged = list(heapq.merge(hot, cold, key=sort_key, reverse=True))
+    # A message copied but not yet deleted appears in both tables
+    seen = set()
+    page = []
+    for row in merged:
+        if row["id"] not in seen:
+            seen.add(row["id"])
+            page.append(row)
+        if len(page) == limit:
+            break
+
+    next_cursor = (page[-1]["created_at"], page[-1]["id"]) if len(page) == limit else None
+    return page, next_cursor
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Archive Old Chat Messages")
+    print("=" * 50)
+    print()
+
+    run_archive(dry_run="--dry-run" in sys.argv)
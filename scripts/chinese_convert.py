@@ -0,0 +1,186 @@
+"""
+Traditional -> Simplified Conversion
+====================================
+Converts lessons and quizzes to Simplified Chinese locally, from the table
+in scripts/data/t2s.csv, so a Simplified variant costs milliseconds instead
+of another round of LLM generation per lesson.
+
+What it does:
+1. Compiles the table once per process: single characters become a
+   str.translate table, multi-character phrases a trie (dict of dicts)
+2. Converts text by taking the longest phrase at every position where a
+   phrase can start (著作 stays 著作, 發揮著作用 becomes 发挥着作用) and
+   translating the runs in between in one str.translate call
+3. Writes the converted lessons to 'daily_content_variants' (re-rendered
+   with lesson_render.py) and quizzes to 'quiz_variants'
+
+This is a script conversion, not localization: wording that differs between
+regions (e.g. 優酪乳 / 酸奶) is kept. The import and both quiz generators
+write the variants as they go; on its own it converts everything in the
+database.
+
+Run the migration first: scripts/migrations/017_script_variants.sql
+Usage: python main.py variants
+"""
+
+import csv
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+
+from lesson_render import render_lesson
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+TABLE_FILE = Path(__file__).resolve().parent / "data" / "t2s.csv"
+SCRIPT = "zh-Hans"
+CONTENT_VARIANTS_TABLE = "daily_content_variants"
+QUIZ_VARIANTS_TABLE = "quiz_variants"
+
+# Trie key marking the end of a phrase (never a character of the text)
+_END = ""
+
+
+@lru_cache(maxsize=1)
+def load_converter(path: Path = TABLE_FILE):
+    """
+    Returns (char_table, phrase_trie, phrase_starts):
+    a str.translate table, {char: {char: ... _END: replacement}} and a regex
+    matching the characters a phrase can start with.
+    """
+    lines = (line for line in path.read_text(encoding="utf-8").splitlines() if not line.startswith("#"))
+    chars, trie = {}, {}
+    for row in csv.DictReader(lines):
+        traditional, simplified = row["traditional"].strip(), row["simplified"].strip()
+        if len(traditional) == 1:
+            chars[ord(traditional)] = simplified
+            continue
+        node = trie
+        for char in traditional:
+            node = node.setdefault(char, {})
+        node[_END] = simplified
+    phrase_starts = re.compile("[" + "".join(re.escape(char) for char in sorted(trie)) + "]") if trie else None
+    return chars, trie, phrase_starts
+
+
+def convert(text: str) -> str:
+    """Traditional -> Simplified, longest phrase first"""
+    if not text:
+        return text
+    chars, trie, phrase_starts = load_converter()
+    if phrase_starts is None:
+        return text.translate(chars)
+    out = []
+    start = i = 0
+    length = len(text)
+    while True:
+        found = phrase_starts.search(text, i)
+        if found is None:
+            break
+        i = found.start()
+        node = trie[text[i]]
+        match_end, replacement = 0, None
+        j = i + 1
+        while True:
+            if _END in node:
+                match_end, replacement = j, node[_END]
+            if j == length or text[j] not in node:
+                break
+            node = node[text[j]]
+            j += 1
+        if replacement is None:
+            i += 1
+            continue
+        out.append(text[start:i].translate(chars))
+        out.append(replacement)
+        start = i = match_end
+    out.append(text[start:].translate(chars))
+    return "".join(out)
+
+
+def convert_json(value):
+    """Convert every string inside a JSON value (quiz questions, options, explanations)"""
+    if isinstance(value, str):
+        return convert(value)
+    if isinstance(value, list):
+        return [convert_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: convert_json(item) for key, item in value.items()}
+    return value
+
+
+# ====== VARIANTS ======
+
+def lesson_variant(day_number: int, title: str, content: str) -> dict:
+    """daily_content_variants row for one lesson, rendered like the original"""
+    converted = convert(content)
+    artifacts = render_lesson(converted)
+    return {
+        "day_number": day_number,
+        "script": SCRIPT,
+        "title": convert(title),
+        "content": converted,
+        "content_html": artifacts["html"],
+        "content_text": artifacts["text"],
+        "content_etag": artifacts["etag"],
+        "content_text_etag": artifacts["text_etag"],
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def quiz_variant(day_number: int, questions) -> dict:
+    return {
+        "day_number": day_number,
+        "script": SCRIPT,
+        "questions": convert_json(questions),
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def save_lesson_variants(supabase, lessons: list) -> int:
+    """lessons: [{'day_number', 'title', 'content'}, ...]"""
+    rows = [lesson_variant(item["day_number"], item["title"], item["content"]) for item in lessons]
+    if rows:
+        execute_with_retry(supabase.table(CONTENT_VARIANTS_TABLE).upsert(rows, on_conflict="day_number,script"))
+    return len(rows)
+
+
+def save_quiz_variants(supabase, quizzes: list) -> int:
+    """quizzes: [{'day_number', 'questions'}, ...]"""
+    rows = [quiz_variant(item["day_number"], item["questions"]) for item in quizzes]
+    if rows:
+        execute_with_retry(supabase.table(QUIZ_VARIANTS_TABLE).upsert(rows, on_conflict="day_number,script"))
+    return len(rows)
+
+
+# ====== MAIN SCRIPT ======
+
+def build_variants(supabase=None) -> int:
+    """Convert every lesson and quiz in the database"""
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    lessons = execute_with_retry(
+        supabase.table("daily_content").select("day_number, title, content").order("day_number")
+    ).data or []
+    lesson_count = save_lesson_variants(supabase, lessons)
+    print(f"✓ {lesson_count} lessons converted to {SCRIPT}")
+
+    quizzes = execute_with_retry(
+        supabase.table("quizzes").select("day_number, questions").order("day_number")
+    ).data or []
+    quiz_count = save_quiz_variants(supabase, quizzes)
+    print(f"✓ {quiz_count} quizzes converted to {SCRIPT}")
+
+    print(f"\n✅ {lesson_count + quiz_count} variants written")
+    return lesson_count + quiz_count
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("  Traditional -> Simplified Variants")
+    print("=" * 50)
+    print()
+
+    build_variants()
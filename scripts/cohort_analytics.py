@@ -0,0 +1,311 @@
+"""
+Cohort Engagement Analytics
+===========================
+Computes how every group is progressing through the 21 days and writes the
+results to the 'group_day_stats' table that the dashboard reads.
+
+What it does:
+1. Loads groups and memberships (the denominator for every rate)
+2. Streams quiz_responses, text_shares, food_logs and chat_messages with
+   keyset pagination - only one page is held in memory at a time
+3. Folds every row into fixed-size array columns indexed by (group, day)
+4. Upserts one summary row per group per day
+
+Memory is bounded by groups x 21 days plus the member list, not by the
+number of activity rows.
+
+This is the full pass. It also resets the watermarks used by the cheap
+incremental refresh in analytics_refresh.py.
+
+Run the migrations first: scripts/migrations/006_group_day_stats.sql, 007_analytics_watermarks.sql
+Usage: python main.py analytics --full   (or python scripts/cohort_analytics.py)
+"""
+
+from array import array
+from datetime import datetime, timezone
+
+from program_days import PROGRAM_DAYS, program_day
+from streaming import stream_rows
+from supabase_pool import execute_with_retry, get_client
+from watermarks import save_watermarks, settle_cutoff
+
+# ====== CONFIGURATION ======
+SUMMARY_TABLE = "group_day_stats"
+
+# Watermark job name (see watermarks.py)
+WATERMARK_JOB = "cohort_analytics"
+
+# Rows per upsert request
+WRITE_BATCH_SIZE = 500
+
+# Columns pulled from each source table
+QUIZ_COLUMNS = "id, user_id, day_number, score, total_questions, created_at"
+SHARE_COLUMNS = "id, user_id, group_id, day_number, created_at"
+FOOD_COLUMNS = "id, user_id, group_id, created_at"
+CHAT_COLUMNS = "id, user_id, group_id, created_at"
+
+
+def _zeros(size: int) -> array:
+    return array("q", [0]) * size
+
+
+def summarize_cell(group_id, day, member_count, counts, quizzer_ids, sharer_ids,
+                   food_logger_ids, computed_at):
+    """
+    Build one group_day_stats row from raw counts and distinct member ids.
+    counts: {quiz_score, quiz_questions, share_count, food_log_count, chat_messages}
+    """
+    quizzers, sharers, food_loggers = set(quizzer_ids), set(sharer_ids), set(food_logger_ids)
+    active = quizzers | sharers | food_loggers
+    completed = quizzers & sharers & food_loggers
+    questions = counts["quiz_questions"]
+
+    def rate(members):
+        return round(len(members) / member_count, 4) if member_count else 0.0
+
+    return {
+        "group_id": group_id,
+        "day_number": day,
+        "member_count": member_count,
+        "active_members": len(active),
+        "quiz_completions": len(quizzers),
+        "quiz_score": counts["quiz_score"],
+        "quiz_questions": questions,
+        "quiz_accuracy": round(counts["quiz_score"] / questions, 4) if questions else None,
+        "share_count": counts["share_count"],
+        "sharers": len(sharers),
+        "food_log_count": counts["food_log_count"],
+        "food_loggers": len(food_loggers),
+        "chat_messages": counts["chat_messages"],
+        "completion_rate": rate(completed),
+        "quiz_completion_rate": rate(quizzers),
+        "share_rate": rate(sharers),
+        "food_log_rate": rate(food_loggers),
+        "active_rate": rate(active),
+        "quizzer_ids": sorted(quizzers),
+        "sharer_ids": sorted(sharers),
+        "food_logger_ids": sorted(food_loggers),
+        "computed_at": computed_at,
+    }
+
+
+class CohortStats:
+    """
+    Per-(group, day) counters stored as flat arrays.
+
+    Cell index = group_index * 21 + (day - 1). "Who did X" is kept as an
+    int bitmask of member slots per cell, so distinct-member counts cost
+    one machine word per ~60 members instead of a set of uuids.
+    """
+
+    def __init__(self, group_ids, memberships):
+        self.group_ids = list(dict.fromkeys(group_ids))
+        self.group_index = {gid: gi for gi, gid in enumerate(self.group_ids)}
+        self.member_count = array("l", [0]) * len(self.group_ids)
+
+        # user_id -> [(group_index, slot), ...]; slot is the bit for that member
+        self.user_slots = {}
+        # group_index -> [user_id by slot], to turn bitmasks back into ids
+        self.slot_users = [[] for _ in self.group_ids]
+        for membership in memberships:
+            gi = self.group_index.get(membership["group_id"])
+            if gi is None:
+                continue
+            slot = self.member_count[gi]
+            self.member_count[gi] += 1
+            self.slot_users[gi].append(membership["user_id"])
+            self.user_slots.setdefault(membership["user_id"], []).append((gi, slot))
+
+        cells = len(self.group_ids) * PROGRAM_DAYS
+        self.quiz_score = _zeros(cells)
+        self.quiz_questions = _zeros(cells)
+        self.share_count = _zeros(cells)
+        self.food_log_count = _zeros(cells)
+        self.chat_count = _zeros(cells)
+        self.quizzers = [0] * cells
+        self.sharers = [0] * cells
+        self.food_loggers = [0] * cells
+        self.skipped = 0
+
+    # ----- ingest -----
+
+    def _cell(self, gi: int, day) -> int:
+        if not day or not 1 <= int(day) <= PROGRAM_DAYS:
+            return -1
+        return gi * PROGRAM_DAYS + int(day) - 1
+
+    def _group_cell(self, row, day):
+        gi = self.group_index.get(row.get("group_id"))
+        if gi is None:
+            self.skipped += 1
+            return None, -1
+        cell = self._cell(gi, day)
+        if cell < 0:
+            self.skipped += 1
+        return gi, cell
+
+    def _member_bit(self, gi: int, user_id) -> int:
+        for group, slot in self.user_slots.get(user_id, ()):
+            if group == gi:
+                return 1 << slot
+        return 0
+
+    def add_quiz_response(self, row):
+        # quiz_responses has no group_id - credit every group the user is in
+        slots = self.user_slots.get(row["user_id"], ())
+        if not slots:
+            self.skipped += 1
+        for gi, slot in slots:
+            cell = self._cell(gi, row.get("day_number"))
+            if cell < 0:
+                self.skipped += 1
+                continue
+            self.quiz_score[cell] += row.get("score") or 0
+            self.quiz_questions[cell] += row.get("total_questions") or 0
+            self.quizzers[cell] |= 1 << slot
+
+    def add_text_share(self, row):
+        gi, cell = self._group_cell(row, row.get("day_number") or program_day(row["created_at"]))
+        if cell >= 0:
+            self.share_count[cell] += 1
+            self.sharers[cell] |= self._member_bit(gi, row["user_id"])
+
+    def add_food_log(self, row):
+        gi, cell = self._group_cell(row, program_day(row["created_at"]))
+        if cell >= 0:
+            self.food_log_count[cell] += 1
+            self.food_loggers[cell] |= self._member_bit(gi, row["user_id"])
+
+    def add_chat_message(self, row):
+        _, cell = self._group_cell(row, program_day(row["created_at"]))
+        if cell >= 0:
+            self.chat_count[cell] += 1
+
+    # ----- output -----
+
+    def member_ids(self, gi: int, bits: int):
+        """User ids of the member slots set in a bitmask"""
+        users = self.slot_users[gi]
+        return [users[slot] for slot in range(len(users)) if bits >> slot & 1]
+
+    def cell_counts(self, cell: int) -> dict:
+        return {
+            "quiz_score": self.quiz_score[cell],
+            "quiz_questions": self.quiz_questions[cell],
+            "share_count": self.share_count[cell],
+            "food_log_count": self.food_log_count[cell],
+            "chat_messages": self.chat_count[cell],
+        }
+
+    def is_touched(self, cell: int) -> bool:
+        """True if any row landed in this cell"""
+        return bool(
+            self.quiz_questions[cell] or self.quizzers[cell] or self.share_count[cell]
+            or self.food_log_count[cell] or self.chat_count[cell]
+        )
+
+    def cells(self):
+        """Yield (group_index, group_id, day, cell) for every cell"""
+        for gi, group_id in enumerate(self.group_ids):
+            for day in range(1, PROGRAM_DAYS + 1):
+                yield gi, group_id, day, gi * PROGRAM_DAYS + day - 1
+
+    def summary_rows(self, computed_at: str = None):
+        """Yield one group_day_stats row per group per day"""
+        computed_at = computed_at or datetime.now(timezone.utc).isoformat()
+        for gi, group_id, day, cell in self.cells():
+            yield summarize_cell(
+                group_id, day, self.member_count[gi], self.cell_counts(cell),
+                self.member_ids(gi, self.quizzers[cell]),
+                self.member_ids(gi, self.sharers[cell]),
+                self.member_ids(gi, self.food_loggers[cell]),
+                computed_at,
+            )
+
+
+# ====== MAIN SCRIPT ======
+
+def load_cohorts(supabase) -> CohortStats:
+    """Read groups and memberships into an empty CohortStats"""
+    group_ids = [g["id"] for g in stream_rows(supabase, "groups", "id")]
+    memberships = stream_rows(
+        supabase, "group_members", "group_id, user_id", key=("group_id", "user_id")
+    )
+    return CohortStats(group_ids, memberships)
+
+
+def ingest_activity(supabase, stats: CohortStats, after=None, before=None, include_archive=False):
+    """
+    Stream every activity table into stats.
+    after: optional {table: (created_at, id)} cursors to start from.
+    before: optional created_at upper bound (exclusive).
+    include_archive: also read chat_messages_archive (full passes only -
+        archived messages were already counted while they were hot).
+    Returns {table: (created_at, id)} of the last row seen per table.
+    """
+    sources = [
+        ("quiz_responses", QUIZ_COLUMNS, stats.add_quiz_response),
+        ("text_shares", SHARE_COLUMNS, stats.add_text_share),
+        ("food_logs", FOOD_COLUMNS, stats.add_food_log),
+        ("chat_messages", CHAT_COLUMNS, stats.add_chat_message),
+    ]
+    if include_archive:
+        sources.append(("chat_messages_archive", CHAT_COLUMNS, stats.add_chat_message))
+    after = after or {}
+    last_seen = {}
+    for table, columns, add in sources:
+        count = 0
+        last_seen[table] = after.get(table)
+        filters = [("lt", "created_at", before)] if before else None
+        for row in stream_rows(supabase, table, columns, after=after.get(table), filters=filters):
+            add(row)
+            count += 1
+            last_seen[table] = (row["created_at"], row["id"])
+        print(f"   ✓ {table}: {count} rows")
+    return last_seen
+
+
+def write_summary(supabase, rows) -> int:
+    """Upsert summary rows in batches; returns the number written"""
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= WRITE_BATCH_SIZE:
+            execute_with_retry(supabase.table(SUMMARY_TABLE).upsert(batch, on_conflict="group_id,day_number"))
+            written += len(batch)
+            batch = []
+    if batch:
+        execute_with_retry(supabase.table(SUMMARY_TABLE).upsert(batch, on_conflict="group_id,day_number"))
+        written += len(batch)
+    return written
+
+
+def run_analytics(supabase=None):
+    """Recompute group_day_stats from scratch"""
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    print("👥 Loading groups and memberships...")
+    stats = load_cohorts(supabase)
+    print(f"   ✓ {len(stats.group_ids)} groups, {len(stats.user_slots)} members\n")
+
+    print("📊 Streaming activity...")
+    last_seen = ingest_activity(supabase, stats, before=settle_cutoff(), include_archive=True)
+    last_seen.pop("chat_messages_archive", None)
+    if stats.skipped:
+        print(f"   ⚠️  Skipped {stats.skipped} rows with unknown group, user or day")
+
+    written = write_summary(supabase, stats.summary_rows())
+    save_watermarks(supabase, WATERMARK_JOB, last_seen, full_refresh=True)
+    print(f"\n✅ Wrote {written} rows to {SUMMARY_TABLE}")
+    return stats
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("  Cohort Engagement Analytics")
+    print("=" * 50)
+    print()
+
+    run_analytics()
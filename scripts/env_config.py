@@ -0,0 +1,105 @@
+"""
+Shared Configuration
+====================
+Loads the .env files once and resolves every setting the Python tools need.
+
+The scripts grew up with two naming schemes, so both are accepted:
+- SUPABASE_URL or NEXT_PUBLIC_SUPABASE_URL
+- SUPABASE_KEY (anon key, data import scripts) and
+  SUPABASE_SERVICE_ROLE_KEY (admin scripts)
+
+Variables already set in the environment win over the .env files, so
+exporting SUPABASE_URL and the keys points every tool at another project
+or at the local stand-in (python main.py fake-supabase).
+
+Nothing heavy is imported here - this module is loaded on every CLI start.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Later files never override values already set by earlier ones
+ENV_FILES = [
+    PROJECT_ROOT / ".env",
+    PROJECT_ROOT / ".env.local",
+    PROJECT_ROOT / "frontend" / ".env.local",
+]
+
+# Config field -> environment variable name(s), for error messages
+ENV_NAMES = {
+    "supabase_url": "SUPABASE_URL",
+    "supabase_key": "SUPABASE_KEY",
+    "service_role_key": "SUPABASE_SERVICE_ROLE_KEY",
+    "admin_key": "SUPABASE_SERVICE_ROLE_KEY",
+    "gemini_api_key": "GEMINI_API_KEY",
+    "deepseek_api_key": "DEEPSEEK_API_KEY",
+}
+
+
+class ConfigError(ValueError):
+    """A required environment variable is missing"""
+
+
+@dataclass(frozen=True)
+class Config:
+    supabase_url: Optional[str]
+    supabase_key: Optional[str]
+    service_role_key: Optional[str]
+    gemini_api_key: Optional[str]
+    deepseek_api_key: Optional[str]
+    # HTTP tuning for the shared client pool (see supabase_pool.py)
+    http_timeout: float = 30.0
+    pool_size: int = 10
+    max_retries: int = 3
+    # JSONL file for per-request telemetry (see supabase_telemetry.py), off when unset
+    telemetry_file: Optional[str] = None
+
+    @property
+    def admin_key(self) -> Optional[str]:
+        """Service role key, falling back to SUPABASE_KEY"""
+        return self.service_role_key or self.supabase_key
+
+    def require(self, *fields: str) -> "Config":
+        """
+        Raise ConfigError listing every missing setting.
+        Returns self so calls can be chained.
+        """
+        missing = [ENV_NAMES[field] for field in fields if not getattr(self, field)]
+        if missing:
+            raise ConfigError(
+                "Missing environment variables! "
+                f"Make sure {', '.join(missing)} are set in .env file"
+            )
+        return self
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Load the .env files (once per process) and return the resolved config"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        load_dotenv = None
+
+    if load_dotenv is not None:
+        for env_file in ENV_FILES:
+            if env_file.exists():
+                load_dotenv(env_file)
+
+    return Config(
+        supabase_url=os.getenv("SUPABASE_URL") or os.getenv("NEXT_PUBLIC_SUPABASE_URL"),
+        supabase_key=os.getenv("SUPABASE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY"),
+        service_role_key=os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
+        gemini_api_key=os.getenv("GEMINI_API_KEY"),
+        deepseek_api_key=os.getenv("DEEPSEEK_API_KEY"),
+        http_timeout=float(os.getenv("SUPABASE_TIMEOUT", "30")),
+        pool_size=int(os.getenv("SUPABASE_POOL_SIZE", "10")),
+        max_retries=int(os.getenv("SUPABASE_RETRIES", "3")),
+        telemetry_file=os.getenv("SUPABASE_TELEMETRY") or None,
+    )
+
@@ -0,0 +1,894 @@
+"""
+In-Memory Supabase Stand-In
+===========================
+A local HTTP server that answers the subset of PostgREST, GoTrue admin and
+Storage requests the Python tools send, so they can be run, profiled and
+load-tested without a Supabase project. Standard library only.
+
+Supported:
+- /rest/v1/<table>: GET / HEAD / POST / PATCH / DELETE
+  select=a,b,alias:col,rel(cols)   (many-to-one via <rel>_id, one-to-many via <table>_id)
+  filters eq neq gt gte lt lte like ilike is in ov cs, not.<op>, or=(...) / and=(...)
+  order=col.desc.nullslast, limit, offset, Range
+  Prefer: count=exact, return=representation|minimal, resolution=merge-duplicates|ignore-duplicates
+  on_conflict=cols, Accept: application/vnd.pgrst.object+json (single)
+- /rest/v1/rpc/<function>: the SQL functions the tools call (RPC_FUNCTIONS),
+  unknown names answer 404 / PGRST202 like PostgREST
+- /auth/v1/admin/users: list (page, per_page), create, get, delete
+- /storage/v1/object/<bucket>/<path>: upload, download, public download
+
+Every request can be slowed down with a base latency plus random jitter, to
+model the round trip to a hosted project. Data lives in memory; --load and
+--dump read and write a {table: [rows]} JSON file.
+
+Point any script at it through the normal config:
+    python main.py fake-supabase --port 54321 --latency-ms 40
+    export SUPABASE_URL=http://127.0.0.1:54321
+    export SUPABASE_KEY=<printed key> SUPABASE_SERVICE_ROLE_KEY=<printed key>
+    python main.py verify
+"""
+
+import base64
+import copy
+import fnmatch
+import inspect
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# ====== CONFIGURATION ======
+DEFAULT_PORT = 54321
+
+# Primary keys that are not a generated `id` (from setup_database.sql and scripts/migrations)
+PRIMARY_KEYS = {
+    "group_members": ("group_id", "user_id"),
+    "analytics_watermarks": ("job", "source_table"),
+    "group_day_stats": ("group_id", "day_number"),
+    "buddyshare_feed": ("share_id", "share_type"),
+    "chat_read_cursors": ("group_id", "user_id"),
+    "food_image_hashes": ("food_log_id",),
+    "lesson_terms": ("term", "day_number"),
+    "lesson_term_sources": ("day_number",),
+}
+
+# Unique constraints other than the primary key (upsert targets)
+UNIQUE_KEYS = {
+    "daily_content": [("day_number",)],
+    "quizzes": [("day_number",)],
+    "quiz_responses": [("user_id", "day_number")],
+    "user_profiles": [("user_id",)],
+    "groups": [("invite_code",)],
+    "share_reactions": [("share_id", "share_type", "user_id", "reaction_type")],
+}
+
+
+def _b64url(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# supabase-py only checks the key looks like a JWT; the stand-in never verifies it
+DUMMY_KEY = ".".join([
+    _b64url({"alg": "HS256", "typ": "JWT"}),
+    _b64url({"iss": "fake-supabase", "role": "service_role", "exp": 4102444800}),
+    "ZmFrZS1zaWduYXR1cmU",
+])
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ====== VALUE COMPARISON ======
+
+TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}")
+
+
+def _as_datetime(text: str):
+    text = text.replace(" ", "T", 1).replace("Z", "+00:00")
+    # Python < 3.11 wants exactly 0, 3 or 6 fraction digits
+    match = re.match(r"^(.*T\d{2}:\d{2}:\d{2})\.(\d+)(.*)$", text)
+    if match:
+        text = f"{match.group(1)}.{match.group(2)[:6].ljust(6, '0')}{match.group(3)}"
+    value = datetime.fromisoformat(text)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def comparable(stored, literal: str):
+    """Coerce a filter literal (always text in the URL) to the stored value's type"""
+    if isinstance(stored, bool):
+        return stored, literal.lower() == "true"
+    if isinstance(stored, (int, float)):
+        try:
+            return stored, float(literal)
+        except ValueError:
+            return str(stored), literal
+    if isinstance(stored, str) and TIMESTAMP.match(stored) and TIMESTAMP.match(literal):
+        try:
+            return _as_datetime(stored), _as_datetime(literal)
+        except ValueError:
+            pass
+    return ("" if stored is None else str(stored)), literal
+
+
+def sort_value(value):
+    if isinstance(value, str) and TIMESTAMP.match(value):
+        try:
+            return (1, _as_datetime(value))
+        except ValueError:
+            pass
+    if isinstance(value, bool):
+        return (0, int(value))
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (2, str(value))
+
+
+def _split_top(text: str, sep: str = ","):
+    """Split on sep outside parentheses, braces and double quotes"""
+    parts, depth, quoted, current, i = [], 0, False, [], 0
+    while i < len(text):
+        ch = text[i]
+        if quoted:
+            current.append(ch)
+            if ch == "\\" and i + 1 < len(text):
+                current.append(text[i + 1])
+                i += 1
+            elif ch == '"':
+                quoted = False
+        elif ch == '"':
+            quoted = True
+            current.append(ch)
+        elif ch in "({":
+            depth += 1
+            current.append(ch)
+        elif ch in ")}":
+            depth -= 1
+            current.append(ch)
+        elif ch == sep and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    parts.append("".join(current))
+    return [p for p in parts if p != ""]
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _list_literal(value: str):
+    """'(a,"b,c")' or '{1,2}' -> ['a', 'b,c'] / ['1', '2']"""
+    return [_unquote(v.strip()) for v in _split_top(value[1:-1])]
+
+
+# ====== FILTERS ======
+
+def match_op(row: dict, column: str, op: str, value: str) -> bool:
+    negate = op.startswith("not.")
+    if negate:
+        op = op[4:]
+    stored = row.get(column)
+
+    if op == "is":
+        literal = value.lower()
+        result = stored is None if literal == "null" else stored is (literal == "true")
+    elif op == "in":
+        options = _list_literal(value)
+        result = stored is not None and any(a == b for a, b in (comparable(stored, o) for o in options))
+    elif op in ("ov", "cs", "cd"):
+        wanted = _list_literal(value)
+        items = [str(v) for v in (stored or [])]
+        if op == "ov":
+            result = bool(set(items) & set(wanted))
+        elif op == "cs":
+            result = set(wanted) <= set(items)
+        else:
+            result = set(items) <= set(wanted)
+    elif stored is None:
+        result = False  # SQL: comparisons with NULL are never true
+    elif op in ("like", "ilike"):
+        pattern = _unquote(value).replace("%", "*")
+        text = str(stored)
+        result = fnmatch.fnmatchcase(text.lower(), pattern.lower()) if op == "ilike" else fnmatch.fnmatchcase(text, pattern)
+    else:
+        left, right = comparable(stored, _unquote(value))
+        result = {
+            "eq": left == right,
+            "neq": left != right,
+            "gt": left > right,
+            "gte": left >= right,
+            "lt": left < right,
+            "lte": left <= right,
+        }[op]
+    return not result if negate else result
+
+
+def parse_condition(text: str):
+    """'col.op.value', 'not.col.op.value' or 'and(...)' / 'or(...)' -> predicate"""
+    for logic in ("and", "or", "not.and", "not.or"):
+        if text.startswith(logic + "("):
+            inner = [parse_condition(part) for part in _split_top(text[len(logic) + 1:-1])]
+            combine = all if logic.endswith("and") else any
+            negate = logic.startswith("not.")
+            return lambda row: combine(p(row) for p in inner) != negate
+    negate = text.startswith("not.")
+    if negate:
+        text = text[4:]
+    column, op, value = text.split(".", 2)
+    if op == "not":
+        op2, value = value.split(".", 1)
+        op, negate = op2, not negate
+    return lambda row: match_op(row, column, op, value) != negate
+
+
+def build_filters(params):
+    predicates = []
+    for key, value in params:
+        if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+            continue
+        if key in ("or", "and", "not.or", "not.and"):
+            predicates.append(parse_condition(f"{key}{value}"))
+            continue
+        op, _, literal = value.partition(".")
+        if op == "not":
+            inner_op, _, literal = literal.partition(".")
+            op = "not." + inner_op
+        predicates.append(lambda row, c=key, o=op, v=literal: match_op(row, c, o, v))
+    return predicates
+
+
+# ====== STORE ======
+
+class FakeStore:
+    """Tables, auth users and storage objects, guarded by one lock"""
+
+    def __init__(self):
+        self.tables = {}
+        self.users = []
+        self.objects = {}
+        self.key_index = {}     # (table, key columns) -> {key values: row}, built on demand
+        self.lock = threading.RLock()
+
+    def table(self, name: str) -> list:
+        return self.tables.setdefault(name, [])
+
+    def primary_key(self, table: str):
+        return PRIMARY_KEYS.get(table, ("id",))
+
+    def apply_defaults(self, table: str, row: dict) -> dict:
+        row = dict(row)
+        if self.primary_key(table) == ("id",) and row.get("id") is None:
+            row["id"] = str(uuid.uuid4())
+        row.setdefault("created_at", now_iso())
+        return row
+
+    def _index(self, table: str, key: tuple) -> dict:
+        index = self.key_index.get((table, key))
+        if index is None:
+            index = self.key_index[(table, key)] = {
+                tuple(r.get(k) for k in key): r for r in self.table(table)
+            }
+        return index
+
+    def invalidate(self, table: str):
+        """Forget the key indexes of a table after rows were changed or removed"""
+        for index_key in [k for k in self.key_index if k[0] == table]:
+            del self.key_index[index_key]
+
+    def unique_keys(self, table: str, keys=None) -> list:
+        return [tuple(keys)] if keys else [self.primary_key(table)] + UNIQUE_KEYS.get(table, [])
+
+    def find_conflict(self, table: str, row: dict, keys=None):
+        for key in self.unique_keys(table, keys):
+            values = tuple(row.get(k) for k in key)
+            if None in values:
+                continue
+            existing = self._index(table, key).get(values)
+            if existing is not None:
+                return existing
+        return None
+
+    def insert(self, table: str, row: dict) -> dict:
+        row = self.apply_defaults(table, row)
+        self.table(table).append(row)
+        for (name, key), index in self.key_index.items():
+            if name == table:
+                index.setdefault(tuple(row.get(k) for k in key), row)
+        return row
+
+    def load(self, data: dict):
+        with self.lock:
+            for table, rows in data.items():
+                if table == "auth.users":
+                    self.users.extend(rows)
+                else:
+                    self.table(table).extend(self.apply_defaults(table, r) for r in rows)
+                    self.invalidate(table)
+
+    def dump(self) -> dict:
+        with self.lock:
+            data = copy.deepcopy(self.tables)
+            data["auth.users"] = copy.deepcopy(self.users)
+            return data
+
+
+# ====== SELECT ======
+
+def _singular(name: str) -> str:
+    return name[:-1] if name.endswith("s") else name
+
+
+def parse_select(select: str):
+    """[(output_name, column, sub_select or None)]"""
+    fields = []
+    for part in _split_top(select.replace(" ", "").replace("\n", "")):
+        alias, _, body = part.rpartition(":") if ":" in part.split("(")[0] else ("", "", part)
+        if "(" in body:
+            relation = body[:body.index("(")].split("!")[0]
+            fields.append((alias or relation, relation, body[body.index("(") + 1:-1]))
+        else:
+            column = body.split("::")[0].split("->")[0]
+            fields.append((alias or column, column, None))
+    return fields
+
+
+def project(store: FakeStore, table: str, row: dict, fields) -> dict:
+    out = {}
+    for name, column, sub in fields:
+        if sub is None:
+            if column == "*":
+                out.update(row)
+            else:
+                out[name] = row.get(column)
+            continue
+        sub_fields = parse_select(sub)
+        foreign_key = f"{_singular(column)}_id"
+        if foreign_key in row:
+            # many-to-one: text_shares.group_id -> groups.id
+            target = next((r for r in store.table(column) if r.get("id") == row[foreign_key]), None)
+            out[name] = project(store, column, target, sub_fields) if target else None
+        else:
+            # one-to-many: groups.id <- group_members.group_id
+            back_key = f"{_singular(table)}_id"
+            out[name] = [project(store, column, r, sub_fields)
+                         for r in store.table(column) if r.get(back_key) == row.get("id")]
+    return out
+
+
+def order_rows(rows, order_params):
+    for spec in reversed([s for param in order_params for s in param.split(",") if s]):
+        parts = spec.split(".")
+        column = parts[0]
+        desc = "desc" in parts[1:]
+        nulls_first = "nullsfirst" in parts[1:] or (desc and "nullslast" not in parts[1:])
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: sort_value(r[column]), reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+# ====== RPC ======
+# Python versions of the SQL functions in scripts/migrations that the tools
+# call through /rest/v1/rpc/<name>. Each takes the store and the named
+# arguments of the SQL function and returns what PostgREST would.
+
+
+class RpcError(Exception):
+    """A RAISE EXCEPTION inside a function (PostgREST answers 400 / P0001)"""
+
+
+def _time(value):
+    return _as_datetime(value) if isinstance(value, str) else value
+
+
+def _cursor_of(row):
+    """(created_at, id) of a watermark row or a [created_at, id] argument, or None"""
+    if row is None:
+        return None
+    created_at, last_id = (row.get("last_created_at"), row.get("last_id")) if isinstance(row, dict) else row
+    return None if created_at is None else (_time(created_at), last_id)
+
+
+def _upsert(store: FakeStore, table: str, row: dict) -> dict:
+    existing = store.find_conflict(table, row, store.primary_key(table))
+    if existing is None:
+        return store.insert(table, row)
+    existing.update(row)
+    store.invalidate(table)
+    return existing
+
+
+def _save_watermark(store: FakeStore, job: str, source_table: str, cursor):
+    _upsert(store, "analytics_watermarks", {
+        "job": job, "source_table": source_table,
+        "last_created_at": cursor[0], "last_id": cursor[1], "updated_at": now_iso(),
+    })
+
+
+def _stored_watermark(store: FakeStore, job: str, source_table: str):
+    return _cursor_of(store.find_conflict("analytics_watermarks", {"job": job, "source_table": source_table}))
+
+
+def rpc_apply_group_day_stats(store, p_job, p_rows, p_watermarks, p_previous):
+    p_watermarks, p_previous = p_watermarks or {}, p_previous or {}
+    stored = {t: _stored_watermark(store, p_job, t) for t in p_watermarks}
+    if p_watermarks and all(stored[t] == _cursor_of(c) for t, c in p_watermarks.items()):
+        return 0
+    if any(stored[t] != _cursor_of(p_previous.get(t)) for t in p_watermarks):
+        raise RpcError(f"analytics watermarks of job {p_job} moved during the run")
+    for row in p_rows or []:
+        _upsert(store, "group_day_stats", row)
+    for table, cursor in p_watermarks.items():
+        _save_watermark(store, p_job, table, cursor)
+    return len(p_rows or [])
+
+
+def _update_by_id(store, table: str, rows, columns, guard=None) -> int:
+    index = store._index(table, ("id",))
+    updated = 0
+    for row in rows or []:
+        target = index.get((row.get("id"),))
+        if target is None or (guard and not guard(target, row)):
+            continue
+        target.update({c: row.get(c) for c in columns})
+        updated += 1
+    store.invalidate(table)
+    return updated
+
+
+def rpc_apply_food_log_nutrients(store, p_rows):
+    return _update_by_id(store, "food_logs", p_rows, ("nutrients", "nutrients_at"))
+
+
+def rpc_apply_quiz_grades(store, p_rows):
+    def same_answer(target, row):
+        return target.get("answered_at") is not None and row.get("answered_at") is not None \
+            and _time(target["answered_at"]) == _time(row["answered_at"])
+    return _update_by_id(store, "quiz_responses", p_rows, ("graded_score", "graded_total", "graded_at"),
+                         guard=same_answer)
+
+
+def rpc_dedupe_group_members(store, p_group_ids=None):
+    wanted = None if p_group_ids is None else set(p_group_ids)
+    rows = store.table("group_members")
+    copies = {}
+    for position, row in enumerate(rows):
+        if wanted is None or row.get("group_id") in wanted:
+            copies.setdefault((row.get("group_id"), row.get("user_id")), []).append((position, row))
+    removed = set()
+    for group in copies.values():
+        # Earliest joined_at (NULLS FIRST), then physical order, is kept
+        group.sort(key=lambda item: (item[1].get("joined_at") is not None,
+                                     _time(item[1].get("joined_at")) or 0, item[0]))
+        removed.update(id(row) for _, row in group[1:])
+    store.tables["group_members"] = [r for r in rows if id(r) not in removed]
+    store.invalidate("group_members")
+    return len(removed)
+
+
+def rpc_match_food_image(store, p_hash, p_max_distance=6):
+    rows = store.table("food_image_hashes")
+    exact = next((r for r in rows if r.get("image_hash") == p_hash), None)
+    if exact is not None:
+        return [{"food_log_id": exact["food_log_id"], "image_hash": exact["image_hash"],
+                 "detected_foods": exact.get("detected_foods"), "distance": 0}]
+    bands = {i * 256 + b for i, b in enumerate(bytes.fromhex(p_hash))}
+    candidates = []
+    for row in rows:
+        if bands & set(row.get("hash_bands") or []):
+            bits = bin(int(row["image_hash"], 16) ^ int(p_hash, 16)).count("1")
+            if bits <= p_max_distance:
+                candidates.append((bits, str(row["food_log_id"]), row))
+    if not candidates:
+        return []
+    bits, _, row = min(candidates, key=lambda c: c[:2])
+    return [{"food_log_id": row["food_log_id"], "image_hash": row["image_hash"],
+             "detected_foods": row.get("detected_foods"), "distance": bits}]
+
+
+def rpc_chat_history(store, p_group_id, p_before_created_at=None, p_before_id=None, p_limit=50):
+    before = None if p_before_created_at is None else (_time(p_before_created_at), p_before_id or "")
+    messages = {}
+    for table in ("chat_messages", "chat_messages_archive"):
+        for row in store.table(table):
+            key = (_time(row["created_at"]), row["id"])
+            if row.get("group_id") == p_group_id and (before is None or key < before):
+                messages.setdefault(key, row)
+    newest = sorted(messages.items(), key=lambda item: item[0], reverse=True)[:min(max(p_limit, 1), 200)]
+    return [{"id": row["id"], "group_id": row["group_id"], "user_id": row.get("user_id"),
+             "message": row.get("message"), "created_at": created_at.isoformat()}
+            for (created_at, _), row in newest]
+
+
+def rpc_apply_unread_counts(store, p_job, p_rows, p_watermark, p_previous):
+    stored = _stored_watermark(store, p_job, "chat_messages")
+    if stored == _cursor_of(p_watermark):
+        return 0
+    previous = _cursor_of(p_previous)
+    if stored != previous:
+        raise RpcError(f"unread watermark of job {p_job} moved during the run")
+
+    hot_ids = {r["id"] for r in store.table("chat_messages")}
+
+    def history(group_id, user_id, joined_at):
+        """Messages from others since joined_at, up to the previous watermark"""
+        joined_at = _time(joined_at)
+        count = 0
+        for table in ("chat_messages", "chat_messages_archive"):
+            for m in store.table(table):
+                if m.get("group_id") != group_id or m.get("user_id") == user_id:
+                    continue
+                sent_at = _time(m["created_at"])
+                if sent_at < joined_at:
+                    continue
+                if table == "chat_messages" and (sent_at, m["id"]) <= previous:
+                    count += 1
+                elif table == "chat_messages_archive" and sent_at <= previous[0] and m["id"] not in hot_ids:
+                    count += 1
+        return count
+
+    updated_at = now_iso()
+    for row in p_rows or []:
+        cursor = store.find_conflict("chat_read_cursors", row, ("group_id", "user_id"))
+        received = row.get("received") or 0
+        if previous is not None and (cursor is None or cursor.get("received_through") is None):
+            received += history(row["group_id"], row["user_id"], row["joined_at"])
+        if cursor is None:
+            store.insert("chat_read_cursors", {
+                "group_id": row["group_id"], "user_id": row["user_id"],
+                "received_count": received, "received_through": row.get("received_through"),
+                "read_count": 0, "last_read_at": None, "updated_at": updated_at,
+            })
+        else:
+            cursor["received_count"] = (cursor.get("received_count") or 0) + received
+            cursor["received_through"] = row.get("received_through")
+            cursor["updated_at"] = updated_at
+    _save_watermark(store, p_job, "chat_messages", p_watermark)
+    return len(p_rows or [])
+
+
+RPC_FUNCTIONS = {
+    "apply_group_day_stats": rpc_apply_group_day_stats,
+    "apply_food_log_nutrients": rpc_apply_food_log_nutrients,
+    "apply_quiz_grades": rpc_apply_quiz_grades,
+    "dedupe_group_members": rpc_dedupe_group_members,
+    "match_food_image": rpc_match_food_image,
+    "chat_history": rpc_chat_history,
+    "apply_unread_counts": rpc_apply_unread_counts,
+}
+
+
+# ====== HTTP ======
+
+class FakeSupabaseHandler(BaseHTTPRequestHandler):
+    server_version = "FakeSupabase/1.0"
+    protocol_version = "HTTP/1.1"
+
+    # -- plumbing --
+
+    @property
+    def store(self) -> FakeStore:
+        return self.server.store
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _delay(self):
+        latency, jitter = self.server.latency, self.server.jitter
+        if latency or jitter:
+            time.sleep(latency + random.random() * jitter)
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, payload=None, headers=None, raw: bytes = None, content_type="application/json"):
+        body = raw if raw is not None else (b"" if payload is None else json.dumps(payload, default=str).encode())
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _error(self, status: int, message: str, code: str = "PGRST000"):
+        self._send(status, {"code": code, "message": message, "details": None, "hint": None})
+
+    def _prefer(self) -> set:
+        return {p.strip() for p in (self.headers.get("Prefer") or "").split(",") if p.strip()}
+
+    def _dispatch(self):
+        self._delay()
+        url = urlsplit(self.path)
+        params = parse_qsl(url.query, keep_blank_values=True)
+        path = unquote(url.path)
+        try:
+            if path.startswith("/rest/v1/"):
+                return self._rest(path[len("/rest/v1/"):].strip("/"), params)
+            if path.startswith("/auth/v1/admin/users"):
+                return self._auth_admin(path[len("/auth/v1/admin/users"):].strip("/"), dict(params))
+            if path.startswith("/storage/v1/object/"):
+                return self._storage(path[len("/storage/v1/object/"):])
+            self._error(404, f"Not found: {path}", "PGRST404")
+        except (KeyError, ValueError) as e:
+            self._error(400, f"Bad request: {e}", "PGRST100")
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+    # -- PostgREST --
+
+    def _rest(self, table: str, params):
+        if table.startswith("rpc/"):
+            return self._rpc(table[len("rpc/"):], params)
+        store = self.store
+        prefer = self._prefer()
+        filters = build_filters(params)
+        options = {}
+        order_params = []
+        for key, value in params:
+            if key == "order":
+                order_params.append(value)
+            else:
+                options.setdefault(key, value)
+
+        with store.lock:
+            if self.command in ("GET", "HEAD"):
+                return self._rest_select(table, filters, options, order_params, prefer)
+            if self.command == "POST":
+                return self._rest_insert(table, options, prefer)
+            if self.command == "PATCH":
+                return self._rest_update(table, filters, options, order_params, prefer)
+            if self.command == "DELETE":
+                return self._rest_delete(table, filters, options, order_params, prefer)
+        self._error(405, f"{self.command} not supported")
+
+    def _rpc(self, name: str, params):
+        function = RPC_FUNCTIONS.get(name)
+        if self.command == "POST":
+            arguments = json.loads(self._body() or b"{}")
+        else:
+            arguments = {k: v for k, v in params if k not in ("select", "order", "limit", "offset")}
+        try:
+            if function is None:
+                raise TypeError(name)
+            inspect.signature(function).bind(None, **arguments)
+        except TypeError:
+            names = ", ".join(sorted(arguments))
+            return self._error(404, f"Could not find the function public.{name}({names}) in the schema cache",
+                               "PGRST202")
+        with self.store.lock:
+            try:
+                result = function(self.store, **arguments)
+            except RpcError as e:
+                return self._error(400, str(e), "P0001")
+        self._send(200, result)
+
+    def _count_headers(self, prefer, total, offset, shown):
+        if not any(p.startswith("count=") for p in prefer):
+            return {"Content-Range": f"{offset}-{offset + shown - 1}/*" if shown else "*/*"}
+        return {"Content-Range": f"{offset}-{offset + shown - 1}/{total}" if shown else f"*/{total}"}
+
+    def _page(self, rows, options):
+        offset = int(options.get("offset") or 0)
+        limit = options.get("limit")
+        range_header = self.headers.get("Range")
+        if range_header and "-" in range_header:
+            start, _, end = range_header.partition("-")
+            offset = int(start)
+            limit = int(end) - offset + 1 if end else None
+        selected = rows[offset:]
+        if limit is not None:
+            selected = selected[:int(limit)]
+        return selected, offset
+
+    def _respond_rows(self, table, rows, options, prefer, status=200, total=None, offset=0):
+        fields = parse_select(options.get("select") or "*")
+        payload = [project(self.store, table, r, fields) for r in rows]
+        headers = self._count_headers(prefer, len(rows) if total is None else total, offset, len(rows))
+        if "vnd.pgrst.object" in (self.headers.get("Accept") or ""):
+            if len(payload) != 1:
+                return self._error(406, f"JSON object requested, multiple (or no) rows returned ({len(payload)})",
+                                   "PGRST116")
+            return self._send(status, payload[0], headers)
+        self._send(status, payload, headers)
+
+    def _rest_select(self, table, filters, options, order_params, prefer):
+        rows = [r for r in self.store.table(table) if all(f(r) for f in filters)]
+        rows = order_rows(rows, order_params)
+        page, offset = self._page(rows, options)
+        self._respond_rows(table, page, options, prefer, total=len(rows), offset=offset)
+
+    def _rest_insert(self, table, options, prefer):
+        payload = json.loads(self._body() or b"[]")
+        rows = payload if isinstance(payload, list) else [payload]
+        merge = "resolution=merge-duplicates" in prefer
+        ignore = "resolution=ignore-duplicates" in prefer
+        on_conflict = [c for c in (options.get("on_conflict") or "").split(",") if c]
+        store = self.store
+
+        written = []
+        for row in rows:
+            existing = store.find_conflict(table, row, on_conflict or None)
+            if existing is not None:
+                if merge:
+                    existing.update(row)
+                    store.invalidate(table)
+                    written.append(existing)
+                elif not ignore:
+                    return self._error(409, f'duplicate key value violates unique constraint on "{table}"', "23505")
+                continue
+            written.append(store.insert(table, row))
+
+        if "return=representation" in prefer:
+            return self._respond_rows(table, written, options, prefer, status=201)
+        self._send(201, None, self._count_headers(prefer, len(written), 0, 0))
+
+    def _rest_update(self, table, filters, options, order_params, prefer):
+        changes = json.loads(self._body() or b"{}")
+        rows = [r for r in self.store.table(table) if all(f(r) for f in filters)]
+        for row in rows:
+            row.update(changes)
+        self.store.invalidate(table)
+        if "return=representation" in prefer:
+            return self._respond_rows(table, rows, options, prefer)
+        self._send(204, None, self._count_headers(prefer, len(rows), 0, 0))
+
+    def _rest_delete(self, table, filters, options, order_params, prefer):
+        rows = self.store.table(table)
+        deleted = [r for r in rows if all(f(r) for f in filters)]
+        ids = {id(r) for r in deleted}
+        self.store.tables[table] = [r for r in rows if id(r) not in ids]
+        self.store.invalidate(table)
+        if "return=representation" in prefer:
+            return self._respond_rows(table, deleted, options, prefer)
+        self._send(204, None, self._count_headers(prefer, len(deleted), 0, 0))
+
+    # -- GoTrue admin --
+
+    def _user(self, data: dict) -> dict:
+        created = now_iso()
+        return {
+            "id": data.get("id") or str(uuid.uuid4()),
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": data.get("email"),
+            "phone": data.get("phone") or "",
+            "app_metadata": data.get("app_metadata") or {"provider": "email", "providers": ["email"]},
+            "user_metadata": data.get("user_metadata") or {},
+            "created_at": data.get("created_at") or created,
+            "updated_at": created,
+            "email_confirmed_at": created if data.get("email_confirm") else None,
+            "identities": [],
+        }
+
+    def _auth_admin(self, user_id: str, params: dict):
+        store = self.store
+        with store.lock:
+            if self.command == "GET" and not user_id:
+                page = max(int(params.get("page") or 1), 1)
+                per_page = int(params.get("per_page") or 50)
+                users = store.users[(page - 1) * per_page:page * per_page]
+                return self._send(200, {"users": users, "aud": "authenticated"},
+                                  {"X-Total-Count": str(len(store.users))})
+            if self.command == "POST" and not user_id:
+                user = self._user(json.loads(self._body() or b"{}"))
+                if any(u.get("email") == user["email"] for u in store.users if user["email"]):
+                    return self._send(422, {"code": 422, "msg": "A user with this email address has already been registered"})
+                store.users.append(user)
+                return self._send(200, user)
+            user = next((u for u in store.users if u["id"] == user_id), None)
+            if user is None:
+                return self._send(404, {"code": 404, "msg": "User not found"})
+            if self.command == "GET":
+                return self._send(200, user)
+            if self.command == "DELETE":
+                store.users.remove(user)
+                return self._send(200, {})
+        self._send(405, {"msg": f"{self.command} not supported"})
+
+    # -- Storage --
+
+    def _storage(self, path: str):
+        store = self.store
+        public = path.startswith("public/")
+        key = path[len("public/"):] if public else path
+        with store.lock:
+            if self.command in ("POST", "PUT"):
+                if key in store.objects and self.command == "POST" and (self.headers.get("x-upsert") or "").lower() != "true":
+                    return self._send(400, {"statusCode": "409", "error": "Duplicate", "message": "The resource already exists"})
+                store.objects[key] = (self._body(), self.headers.get("Content-Type") or "application/octet-stream",
+                                      self.headers.get("Content-Encoding"))
+                return self._send(200, {"Key": key, "Id": str(uuid.uuid4())})
+            if self.command in ("GET", "HEAD"):
+                if key not in store.objects:
+                    return self._send(404, {"statusCode": "404", "error": "not_found", "message": "Object not found"})
+                data, content_type, content_encoding = store.objects[key]
+                headers = {"Content-Encoding": content_encoding} if content_encoding else None
+                return self._send(200, headers=headers, raw=data, content_type=content_type)
+            if self.command == "DELETE":
+                store.objects.pop(key, None)
+                return self._send(200, {"message": "Successfully deleted"})
+        self._send(405, {"message": f"{self.command} not supported"})
+
+
+class FakeSupabaseServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store=None, latency_ms: float = 0, jitter_ms: float = 0, verbose: bool = False):
+        super().__init__(address, FakeSupabaseHandler)
+        self.store = store or FakeStore()
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(port: int = 0, host: str = "127.0.0.1", **kwargs) -> FakeSupabaseServer:
+    """Start a stand-in on a background thread (port 0 = any free port)"""
+    server = FakeSupabaseServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def use_fake_supabase(server: FakeSupabaseServer):
+    """Point get_config() / get_client() in this process at a stand-in"""
+    import os
+
+    from env_config import get_config
+    from supabase_pool import reset_clients
+
+    os.environ["SUPABASE_URL"] = server.url
+    os.environ["SUPABASE_KEY"] = DUMMY_KEY
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = DUMMY_KEY
+    get_config.cache_clear()
+    reset_clients()
+
+
+def serve(port: int = DEFAULT_PORT, latency_ms: float = 0, jitter_ms: float = 0,
+          load: str = None, dump: str = None, verbose: bool = False):
+    """Run a stand-in in the foreground until Ctrl+C"""
+    server = FakeSupabaseServer(("127.0.0.1", port), latency_ms=latency_ms, jitter_ms=jitter_ms, verbose=verbose)
+    if load:
+        with open(load, encoding="utf-8") as f:
+            server.store.load(json.load(f))
+
+    print(f"🧪 Fake Supabase on {server.url} (latency {latency_ms:g} ms + up to {jitter_ms:g} ms jitter)\n")
+    print("   Point the scripts at it with:")
+    print(f"   export SUPABASE_URL={server.url}")
+    print(f"   export SUPABASE_KEY={DUMMY_KEY}")
+    print(f"   export SUPABASE_SERVICE_ROLE_KEY={DUMMY_KEY}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping")
+    finally:
+        server.server_close()
+        if dump:
+            with open(dump, "w", encoding="utf-8") as f:
+                json.dump(server.store.dump(), f, ensure_ascii=False, default=str)
+            print(f"💾 Data written to {dump}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT)
@@ -4,32 +4,25 @@ Fix Day 20 Quiz
 Regenerate quiz for Day 20 that failed during initial generation
 """
 
-import os
-import google.generativeai as genai
-from supabase import create_client, Client
 import json
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Configuration
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# Initialize clients
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.0-flash-exp')
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from env_config import get_config
+from supabase_pool import execute_with_retry, get_client
 
 def fix_day_20():
     """Regenerate quiz for Day 20"""
     
+    import google.generativeai as genai
+
+    # Initialize clients
+    genai.configure(api_key=get_config().require("gemini_api_key").gemini_api_key)
+    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    supabase = get_client()
+
     print("🔧 Fixing Day 20 Quiz\n")
     
     # Get Day 20 content
-    result = supabase.table('daily_content').select('*').eq('day_number', 20).single().execute()
+    result = execute_with_retry(supabase.table('daily_content').select('*').eq('day_number', 20).single())
     content_item = result.data
     
     title = content_item['title']
@@ -103,7 +96,7 @@ JSON格式（嚴格遵守）：
                         "questions": quiz_data
                     }
                     
-                    supabase.table('quizzes').upsert(db_data).execute()
+                    execute_with_retry(supabase.table('quizzes').upsert(db_data))
                     
                     print(f"✅ Successfully generated and saved Day 20 quiz!")
                     print(f"   {len(quiz_data['questions'])} questions created\n")
@@ -0,0 +1,172 @@
+"""
+Food Recognition Cache
+======================
+Remembers what the vision model found in every analyzed food photo, keyed
+by a perceptual hash, so the same or a near-identical photo does not need
+another Gemini call.
+
+What it does:
+1. Streams food_logs with detected foods created since the last run
+2. Downloads each image in a process pool (the 1024px analysis copy from
+   food_images.py when there is one) and computes its 64-bit dHash
+3. Upserts (hash, hash bands, detected_foods) into 'food_image_hashes'
+   Images that cannot be downloaded are skipped; --full retries everything
+
+The hash is a difference hash: grayscale, shrink to 9x8, one bit per
+"is this pixel brighter than its right neighbour". Re-encoding, resizing
+and small crops barely change it, so near-duplicates are a few bits apart.
+/api/food/analyze hashes each uploaded photo the same way
+(lib/utils/imageHash.ts copies Pillow's integer arithmetic) and checks this
+table before calling the model.
+
+Lookup: the hash is split into 8 bytes stored as hash_bands (byte i -> i*256+byte,
+GIN indexed). Two hashes within MAX_DISTANCE <= 7 bits share at least one
+byte, so an overlap query returns every possible match. match_food_image()
+tries the exact hash first, then ranks all band candidates by Hamming
+distance in SQL and returns the closest.
+
+Run the migrations first: scripts/migrations/012_food_image_hashes.sql
+                          scripts/migrations/025_match_food_image.sql
+Usage: python main.py food-cache [--full] [--lookup photo.jpg]
+"""
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from food_images import _init_worker, load_image_bytes
+from streaming import stream_pages
+from supabase_pool import execute_with_retry, get_client
+from watermarks import load_watermarks, save_watermarks, settle_cutoff
+
+# ====== CONFIGURATION ======
+HASH_TABLE = "food_image_hashes"
+WATERMARK_JOB = "food_image_hashes"
+
+# Largest Hamming distance (of 64 bits) still treated as the same photo.
+# Must stay below the number of bands (8) for the band lookup to be exact.
+MAX_DISTANCE = 6
+
+# Images hashed per pool round (also the page size)
+BATCH_SIZE = 64
+
+# Rows per upsert request
+WRITE_BATCH_SIZE = 500
+
+FOOD_LOG_COLUMNS = "id, image_url, image_analysis_url, detected_foods, created_at"
+
+
+# ====== HASHING ======
+
+def dhash(data: bytes) -> str:
+    """64-bit difference hash of an encoded image, as 16 hex digits"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("L")
+        image = image.resize((9, 8), Image.Resampling.BOX)
+        pixels = list(image.getdata())
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return f"{value:016x}"
+
+
+def hash_bands(image_hash: str) -> list:
+    """The 8 bytes of a hash, each tagged with its position: i*256 + byte"""
+    return [i * 256 + int(image_hash[i * 2:i * 2 + 2], 16) for i in range(8)]
+
+
+def find_cached_analysis(supabase, image_hash: str, max_distance: int = MAX_DISTANCE):
+    """Closest cached analysis within max_distance bits, or None"""
+    result = execute_with_retry(
+        supabase.rpc("match_food_image", {"p_hash": image_hash, "p_max_distance": max_distance})
+    )
+    return (result.data or [None])[0]
+
+
+def lookup_image(supabase, data: bytes, max_distance: int = MAX_DISTANCE):
+    """find_cached_analysis for raw image bytes"""
+    _init_worker()
+    return find_cached_analysis(supabase, dhash(data), max_distance)
+
+
+def hash_food_image(job):
+    """Worker entry point: (log_id, url) -> (log_id, hash, error)"""
+    log_id, image_url = job
+    try:
+        return log_id, dhash(load_image_bytes(image_url)), None
+    except Exception as e:
+        return log_id, None, f"{type(e).__name__}: {e}"
+
+
+# ====== MAIN SCRIPT ======
+
+def build_index(supabase=None, full: bool = False, workers: int = None) -> int:
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    cursors = {} if full else load_watermarks(supabase, WATERMARK_JOB)
+    last_seen = cursors.get("food_logs")
+    filters = [("neq", "image_url", ""), ("lt", "created_at", settle_cutoff())]
+
+    hashed = failed = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker) as pool:
+        for page in stream_pages(supabase, "food_logs", FOOD_LOG_COLUMNS, after=last_seen,
+                                 filters=filters, page_size=BATCH_SIZE):
+            logs = {row["id"]: row for row in page if row.get("detected_foods")}
+            jobs = [(log_id, row.get("image_analysis_url") or row["image_url"]) for log_id, row in logs.items()]
+            hashed_at = datetime.now(timezone.utc).isoformat()
+
+            rows = []
+            for log_id, image_hash, error in pool.map(hash_food_image, jobs):
+                if error:
+                    print(f"   ✗ {log_id[:8]}...: {error[:200]}")
+                    failed += 1
+                    continue
+                rows.append({
+                    "food_log_id": log_id,
+                    "image_hash": image_hash,
+                    "hash_bands": hash_bands(image_hash),
+                    "detected_foods": logs[log_id]["detected_foods"],
+                    "created_at": logs[log_id]["created_at"],
+                    "hashed_at": hashed_at,
+                })
+            for start in range(0, len(rows), WRITE_BATCH_SIZE):
+                execute_with_retry(
+                    supabase.table(HASH_TABLE).upsert(rows[start:start + WRITE_BATCH_SIZE], on_conflict="food_log_id")
+                )
+            hashed += len(rows)
+
+            # Advance page by page so an interrupted run resumes here
+            last_seen = (page[-1]["created_at"], page[-1]["id"])
+            save_watermarks(supabase, WATERMARK_JOB, {"food_logs": last_seen}, full_refresh=full)
+
+    print(f"\n✅ Hashed {hashed} images ({failed} failed)")
+    return hashed
+
+
+def print_lookup(supabase, path: str):
+    with open(path, "rb") as f:
+        match = lookup_image(supabase, f.read())
+    if match is None:
+        print("❌ No cached analysis within distance", MAX_DISTANCE)
+        return
+    print(f"✅ Match: food log {match['food_log_id']} ({match['distance']} bits apart)")
+    for food in match["detected_foods"]:
+        print(f"   • {food.get('name')} - {food.get('portion')}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Food Recognition Cache")
+    print("=" * 50)
+    print()
+
+    build_index(full="--full" in sys.argv)
@@ -0,0 +1,221 @@
+"""
+Food Image Preprocessing
+========================
+Makes small, clean copies of every food photo so feeds and the vision model
+do not download full-size phone pictures.
+
+What it does:
+1. Streams food_logs that have an image_url but no image_processed_at
+2. Downloads and decodes each image in a process pool
+   (JPEG / PNG / WebP, HEIC / HEIF when pillow-heif is installed,
+   and the data: URLs older clients saved directly in image_url)
+3. Applies the EXIF rotation, then drops all metadata (GPS, camera, ...)
+4. Downscales to an analysis size and a thumbnail size and re-encodes JPEG
+5. Uploads both to the 'food-images' bucket under variants/<log id>/
+6. Writes image_analysis_url / image_thumb_url back to food_logs and
+   food_thumb_url to the BuddyShare feed
+
+Images that cannot be decoded get image_error and are not retried until
+--full is used. Download failures (timeouts, 5xx, dropped connections) are
+not recorded at all, so the next run simply tries again. A failure never
+clears variant URLs a row already has.
+
+Run the migration first: scripts/migrations/011_food_image_variants.sql
+Usage: python main.py food-images [--full] [--workers 4]
+"""
+
+import base64
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from streaming import stream_pages
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+BUCKET = "food-images"
+VARIANT_PREFIX = "variants"
+
+# Longest edge in pixels, and JPEG quality, per variant
+VARIANTS = {
+    "analysis": (1024, 82),
+    "thumb": (320, 75),
+}
+
+# Images handed to the pool per round (also the page size)
+BATCH_SIZE = 32
+
+# Seconds to wait for one image download
+DOWNLOAD_TIMEOUT = 30
+
+# Anything bigger is rejected instead of decoded (decompression bombs)
+MAX_PIXELS = 50_000_000
+
+FOOD_LOG_COLUMNS = "id, image_url, created_at"
+
+
+# ====== IMAGE PROCESSING (runs in worker processes) ======
+
+def _register_heif():
+    """Let Pillow open HEIC / HEIF if pillow-heif is installed"""
+    try:
+        from pillow_heif import register_heif_opener
+    except ImportError:
+        return False
+    register_heif_opener()
+    return True
+
+
+def _init_worker():
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    _register_heif()
+
+
+def load_image_bytes(image_url: str) -> bytes:
+    """Bytes of an image given as an http(s) URL or a base64 data: URL"""
+    if image_url.startswith("data:"):
+        _, _, payload = image_url.partition(",")
+        return base64.b64decode(payload)
+    if image_url.startswith(("http://", "https://")):
+        import requests
+
+        response = requests.get(image_url, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        return response.content
+    raise ValueError(f"Unsupported image location: {image_url[:60]}")
+
+
+def render_variants(data: bytes, variants=VARIANTS) -> dict:
+    """
+    Decode one image and return {variant: jpeg_bytes}.
+    The EXIF orientation is applied to the pixels, then every piece of
+    metadata is dropped because the pixels are re-encoded from scratch.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            # Flatten transparency onto white rather than black
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+
+        rendered = {}
+        # Largest first, so each smaller variant resizes an already smaller image
+        for name, (max_edge, quality) in sorted(variants.items(), key=lambda v: -v[1][0]):
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+            rendered[name] = out.getvalue()
+        return rendered
+
+
+def process_food_image(job):
+    """
+    Worker entry point: (log_id, image_url) -> (log_id, {variant: bytes}, error, retry).
+    retry is True when the download failed and the photo should be tried
+    again later; decode and format errors are permanent.
+    Never raises, so one bad photo cannot stop the pool.
+    """
+    log_id, image_url = job
+    try:
+        data = load_image_bytes(image_url)
+    except ValueError as e:
+        # Unsupported location or a corrupt data: URL - retrying cannot help
+        return log_id, None, f"{type(e).__name__}: {e}"[:500], False
+    except Exception as e:
+        return log_id, None, f"{type(e).__name__}: {e}"[:500], True
+    try:
+        return log_id, render_variants(data), None, False
+    except Exception as e:
+        return log_id, None, f"{type(e).__name__}: {e}"[:500], False
+
+
+# ====== STORAGE AND DATABASE (main process) ======
+
+def variant_path(log_id: str, variant: str) -> str:
+    return f"{VARIANT_PREFIX}/{log_id}/{variant}.jpg"
+
+
+def upload_variants(supabase, log_id: str, rendered: dict) -> dict:
+    """Upload rendered variants and return {variant: public_url}"""
+    bucket = supabase.storage.from_(BUCKET)
+    urls = {}
+    for variant, data in rendered.items():
+        path = variant_path(log_id, variant)
+        bucket.upload(path, data, {"content-type": "image/jpeg", "upsert": "true",
+                                   "cache-control": "31536000"})
+        urls[variant] = bucket.get_public_url(path)
+    return urls
+
+
+def record_result(supabase, log_id: str, urls: dict = None, error: str = None):
+    """Store new variant URLs, or a permanent error (keeping any URLs the row already has)"""
+    update = {"image_processed_at": datetime.now(timezone.utc).isoformat(), "image_error": error}
+    if urls:
+        update["image_analysis_url"] = urls.get("analysis")
+        update["image_thumb_url"] = urls.get("thumb")
+    execute_with_retry(supabase.table("food_logs").update(update).eq("id", log_id))
+    if urls:
+        execute_with_retry(
+            supabase.table("buddyshare_feed")
+            .update({"food_thumb_url": urls.get("thumb")})
+            .eq("share_type", "food_log")
+            .eq("share_id", log_id)
+        )
+
+
+# ====== MAIN SCRIPT ======
+
+def process_images(supabase=None, full: bool = False, workers: int = None):
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    filters = [("neq", "image_url", "")]  # also excludes NULL
+    if not full:
+        filters.append(("is_", "image_processed_at", "null"))
+
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker) as pool:
+        for page in stream_pages(supabase, "food_logs", FOOD_LOG_COLUMNS, filters=filters, page_size=BATCH_SIZE):
+            jobs = [(row["id"], row["image_url"]) for row in page if row.get("image_url")]
+            for log_id, rendered, error, retry in pool.map(process_food_image, jobs):
+                if retry:
+                    # Network hiccup - leave unprocessed so the next run retries
+                    print(f"   ⚠️  {log_id[:8]}... download failed: {error}")
+                    failed += 1
+                    continue
+                if error:
+                    print(f"   ✗ {log_id[:8]}...: {error}")
+                    record_result(supabase, log_id, error=error)
+                    failed += 1
+                    continue
+                try:
+                    urls = upload_variants(supabase, log_id, rendered)
+                except Exception as e:
+                    # Storage hiccup - leave unprocessed so the next run retries
+                    print(f"   ⚠️  {log_id[:8]}... upload failed: {e}")
+                    failed += 1
+                    continue
+                record_result(supabase, log_id, urls)
+                done += 1
+            print(f"   ✓ {done} processed, {failed} failed so far")
+
+    print(f"\n✅ Processed {done} images ({failed} failed)")
+    return done
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Food Image Preprocessing")
+    print("=" * 50)
+    print()
+
+    process_images(full="--full" in sys.argv)
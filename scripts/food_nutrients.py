@@ -0,0 +1,86 @@
+"""
+Food Log Nutrient Enrichment
+============================
+Attaches nutrient estimates (energy, protein, fat, carbohydrate, fibre,
+sodium) to food logs using the offline table in nutrient_db.py.
+
+What it does:
+1. Streams food_logs that have no nutrients yet (all of them with --full)
+2. Matches every detected food name to the bundled food-composition table
+   and scales it by the portion ("1碗 (約200g)" -> 200 g)
+3. Writes the per-item estimates and the meal total back in batches, one
+   set-based UPDATE per batch (apply_food_log_nutrients) - never an upsert,
+   so a log deleted mid-run is not re-created as an empty row
+
+Foods the table does not know are listed under "unmatched" rather than
+guessed. Re-run with --full after editing scripts/data/food_composition.csv.
+
+Run the migrations first: scripts/migrations/013_food_log_nutrients.sql
+                          scripts/migrations/026_apply_food_log_nutrients.sql
+Usage: python main.py nutrients [--full]
+"""
+
+from datetime import datetime, timezone
+
+from nutrient_db import NUTRIENTS, load_nutrient_db
+from streaming import stream_pages
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+# Bump when the table or the estimate format changes
+NUTRIENTS_VERSION = 1
+
+# Rows per update request (also the page size)
+WRITE_BATCH_SIZE = 500
+
+FOOD_LOG_COLUMNS = "id, detected_foods, created_at"
+
+
+def estimate_meal(db, detected_foods) -> dict:
+    """nutrients JSON for one food log's detected_foods"""
+    items, unmatched = [], []
+    for food in detected_foods or []:
+        if not isinstance(food, dict):
+            continue
+        estimate = db.estimate(food.get("name") or "", food.get("portion"))
+        if estimate is None:
+            unmatched.append(food.get("name") or "")
+        else:
+            items.append(estimate)
+    total = {n: round(sum(item[n] for item in items), 1) for n in NUTRIENTS}
+    return {"version": NUTRIENTS_VERSION, "items": items, "total": total, "unmatched": unmatched}
+
+
+def enrich_food_logs(supabase=None, full: bool = False) -> int:
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    db = load_nutrient_db()
+    filters = None if full else [("is_", "nutrients_at", "null")]
+
+    written = matched = unmatched = 0
+    for page in stream_pages(supabase, "food_logs", FOOD_LOG_COLUMNS, filters=filters, page_size=WRITE_BATCH_SIZE):
+        enriched_at = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for log in page:
+            nutrients = estimate_meal(db, log.get("detected_foods"))
+            matched += len(nutrients["items"])
+            unmatched += len(nutrients["unmatched"])
+            rows.append({"id": log["id"], "nutrients": nutrients, "nutrients_at": enriched_at})
+        # Plain UPDATE by id, so retrying is harmless
+        written += execute_with_retry(supabase.rpc("apply_food_log_nutrients", {"p_rows": rows})).data or 0
+        print(f"   ✓ {written} food logs enriched")
+
+    print(f"\n✅ Enriched {written} food logs ({matched} foods matched, {unmatched} unmatched)")
+    return written
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Food Log Nutrients")
+    print("=" * 50)
+    print()
+
+    enrich_food_logs(full="--full" in sys.argv)
@@ -9,33 +9,25 @@ What it does:
 2. For each day, sends content to Gemini API
 3. Gemini generates 3 quiz questions in Chinese
 4. Saves the questions to Supabase 'quizzes' table
+5. Converts the saved quizzes to Simplified Chinese locally
+   ('quiz_variants', see chinese_convert.py)
 
 Time: ~5-7 minutes (due to API rate limiting)
 Cost: ~$1-2 one-time
 """
 
-import os
-import google.generativeai as genai
-from supabase import create_client, Client
 import json
 import time
-from dotenv import load_dotenv
 import re
 
-# Load environment variables from .env file
-load_dotenv()
+from chinese_convert import SCRIPT, save_quiz_variants
+from env_config import get_config
+from supabase_pool import execute_with_retry, get_client
 
 # ====== CONFIGURATION ======
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# Validate that environment variables are set
-if not GEMINI_API_KEY or not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError(
-        "Missing environment variables! "
-        "Make sure GEMINI_API_KEY, SUPABASE_URL, and SUPABASE_KEY are set in .env file"
-    )
+# Credentials are resolved by env_config (GEMINI_API_KEY, SUPABASE_URL, SUPABASE_KEY).
+# google.generativeai is imported inside the functions that call it, since
+# it takes seconds to import.
 
 # Gemini model to use
 MODEL_NAME = 'gemini-2.5-pro'
@@ -86,6 +78,8 @@ JSON格式範例：
 """
     
     try:
+        import google.generativeai as genai
+
         # Call Gemini API
         model = genai.GenerativeModel(MODEL_NAME)
         response = model.generate_content(prompt)
@@ -119,34 +113,44 @@ JSON格式範例：
         return None
 
 
-def generate_all_quizzes():
-    """Generate quizzes for all 21 days"""
+def generate_all_quizzes(supabase=None, days=None):
+    """
+    Generate quizzes for all 21 days (or only the given days).
+    Returns the day numbers that were saved.
+    """
     
-    # Initialize clients
-    genai.configure(api_key=GEMINI_API_KEY)
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    import google.generativeai as genai
+
+    # Initialize clients (the CLI passes in a shared Supabase client)
+    config = get_config().require("gemini_api_key")
+    genai.configure(api_key=config.gemini_api_key)
+    if supabase is None:
+        supabase = get_client(admin=True)
     
     print("📚 Fetching book content from Supabase...\n")
     
     # Get all content from Supabase
     try:
-        result = supabase.table('daily_content').select('*').order('day_number').execute()
+        result = execute_with_retry(supabase.table('daily_content').select('*').order('day_number'))
         contents = result.data
+        if days is not None:
+            contents = [c for c in contents if c['day_number'] in days]
     except Exception as e:
         print(f"❌ Error fetching content: {e}")
         print("Make sure you've run 'import_book_content.py' first!")
-        return
+        return []
     
     if len(contents) == 0:
         print("❌ No content found in database!")
         print("Run 'import_book_content.py' first to import the book content.")
-        return
+        return []
     
     print(f"Found {len(contents)} days of content")
     print(f"Generating quizzes (this takes ~5 minutes)...\n")
     
     success_count = 0
     failed_days = []
+    saved = []
     
     for content_item in contents:
         day = content_item['day_number']
@@ -166,10 +170,11 @@ def generate_all_quizzes():
             }
             
             try:
-                supabase.table('quizzes').upsert(db_data).execute()
+                execute_with_retry(supabase.table('quizzes').upsert(db_data))
                 num_questions = len(quiz_data.get('questions', []))
                 print(f"    ✓ Saved {num_questions} questions\n")
                 success_count += 1
+                saved.append(db_data)
             except Exception as e:
                 print(f"    ✗ Database error: {e}\n")
                 failed_days.append(day)
@@ -181,12 +186,20 @@ def generate_all_quizzes():
         # This prevents hitting Gemini API rate limits
         time.sleep(2)
     
+    # Simplified variants are converted locally, no second round of API calls
+    try:
+        variant_count = save_quiz_variants(supabase, saved)
+        print(f"✓ {variant_count} quizzes converted to {SCRIPT}\n")
+    except Exception as e:
+        print(f"⚠️  Warning: {SCRIPT} variants not written - {e}\n")
+
     print("=" * 50)
     print(f"✅ Quiz generation complete!")
     print(f"   Success: {success_count}/{len(contents)} days")
     if failed_days:
         print(f"   Failed days: {failed_days}")
     print("=" * 50)
+    return [item['day_number'] for item in saved]
 
 
 if __name__ == "__main__":
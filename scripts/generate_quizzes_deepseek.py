@@ -10,33 +10,24 @@ What it does:
 2. For each day, sends content to DeepSeek API
 3. DeepSeek generates 3 quiz questions in Chinese
 4. Saves the questions to Supabase 'quizzes' table
+5. Converts the saved quizzes to Simplified Chinese locally
+   ('quiz_variants', see chinese_convert.py)
 
 Time: ~3-5 minutes (due to API rate limiting)
 Cost: ~$0.50-1.00 one-time
 """
 
-import os
-import requests
 import json
 import time
-from supabase import create_client, Client
-from dotenv import load_dotenv
 import re
 
-# Load environment variables from .env file
-load_dotenv()
+from chinese_convert import SCRIPT, save_quiz_variants
+from env_config import get_config
+from supabase_pool import execute_with_retry, get_client
 
 # ====== CONFIGURATION ======
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# Validate that environment variables are set
-if not DEEPSEEK_API_KEY or not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError(
-        "Missing environment variables! "
-        "Make sure DEEPSEEK_API_KEY, SUPABASE_URL, and SUPABASE_KEY are set in .env file"
-    )
+# Credentials are resolved by env_config (DEEPSEEK_API_KEY, SUPABASE_URL, SUPABASE_KEY).
+# requests is imported inside generate_quiz_for_day so the CLI starts fast.
 
 # DeepSeek API configuration
 DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
@@ -103,10 +94,12 @@ JSON格式範例：
 }}
 """
     
+    import requests
+
     try:
         # Prepare request headers
         headers = {
-            "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+            "Authorization": f"Bearer {get_config().require('deepseek_api_key').deepseek_api_key}",
             "Content-Type": "application/json"
         }
         
@@ -164,33 +157,43 @@ JSON格式範例：
         return None
 
 
-def generate_all_quizzes():
-    """Generate quizzes for all 21 days using DeepSeek"""
+def generate_all_quizzes(supabase=None, days=None):
+    """
+    Generate quizzes for all 21 days using DeepSeek (or only the given days).
+    Returns the day numbers that were saved.
+    """
     
-    # Initialize Supabase client
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Fail fast before any API call if the key is missing
+    get_config().require("deepseek_api_key")
+
+    # Initialize Supabase client (the CLI passes in a shared one)
+    if supabase is None:
+        supabase = get_client(admin=True)
     
     print("📚 Fetching book content from Supabase...\n")
     
     # Get all content from Supabase
     try:
-        result = supabase.table('daily_content').select('*').order('day_number').execute()
+        result = execute_with_retry(supabase.table('daily_content').select('*').order('day_number'))
         contents = result.data
+        if days is not None:
+            contents = [c for c in contents if c['day_number'] in days]
     except Exception as e:
         print(f"❌ Error fetching content: {e}")
         print("Make sure you've run 'import_book_content.py' first!")
-        return
+        return []
     
     if len(contents) == 0:
         print("❌ No content found in database!")
         print("Run 'import_book_content.py' first to import the book content.")
-        return
+        return []
     
     print(f"Found {len(contents)} days of content")
     print(f"Generating quizzes using DeepSeek (this takes ~3-5 minutes)...\n")
     
     success_count = 0
     failed_days = []
+    saved = []
     
     for content_item in contents:
         day = content_item['day_number']
@@ -210,10 +213,11 @@ def generate_all_quizzes():
             }
             
             try:
-                supabase.table('quizzes').upsert(db_data).execute()
+                execute_with_retry(supabase.table('quizzes').upsert(db_data))
                 num_questions = len(quiz_data)
                 print(f"    ✓ Saved {num_questions} questions\n")
                 success_count += 1
+                saved.append(db_data)
             except Exception as e:
                 print(f"    ✗ Database error: {e}\n")
                 failed_days.append(day)
@@ -225,12 +229,20 @@ def generate_all_quizzes():
         # DeepSeek has more generous rate limits than Gemini
         time.sleep(1)
     
+    # Simplified variants are converted locally, no second round of API calls
+    try:
+        variant_count = save_quiz_variants(supabase, saved)
+        print(f"✓ {variant_count} quizzes converted to {SCRIPT}\n")
+    except Exception as e:
+        print(f"⚠️  Warning: {SCRIPT} variants not written - {e}\n")
+
     print("=" * 50)
     print(f"✅ Quiz generation complete!")
     print(f"   Success: {success_count}/{len(contents)} days")
     if failed_days:
         print(f"   Failed days: {failed_days}")
     print("=" * 50)
+    return [item['day_number'] for item in saved]
 
 
 if __name__ == "__main__":
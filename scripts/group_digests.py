@@ -0,0 +1,249 @@
+"""
+Daily Group Digests
+===================
+Posts a short "what your group did yesterday" announcement to every group,
+built in one batched pass instead of each member's app re-querying the
+feed and chat to piece the same summary together.
+
+What it does:
+1. Loads groups, memberships and display names once
+2. Streams the previous club day's (Hong Kong time) text_shares, food_logs,
+   quiz completions and chat messages - one keyset scan per table for all
+   groups, counting per group as rows go by (quiz_responses has no group_id,
+   so completions are credited to every group of the user)
+3. Renders each group's digest with templates compiled at import time
+4. Upserts the digests into 'group_announcements' in batches; a re-run for
+   the same date replaces that day's digests instead of duplicating them
+
+Meant to run once a day, shortly after midnight club time (scheduler.py
+runs it at 00:15).
+
+Run the migration first: scripts/migrations/019_group_announcements.sql
+Usage: python main.py digests [--date YYYY-MM-DD] [--dry-run]
+"""
+
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from string import Template
+
+from program_days import CLUB_TIMEZONE
+from streaming import stream_rows
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+ANNOUNCEMENTS_TABLE = "group_announcements"
+DIGEST_KIND = "daily_digest"
+
+# Keys per PostgREST IN filter (they go in the URL)
+IN_FILTER_CHUNK = 100
+
+# Rows per upsert request
+WRITE_BATCH_SIZE = 500
+
+# Members named in the "most active" line
+TOP_MEMBERS = 3
+
+# ====== TEMPLATES ======
+# Compiled once; each line is only rendered when its count is non-zero
+TITLE = Template("📅 $month月$day日 小組日報")
+SHARES = Template("📝 $sharers 位組員分享了 $shares 則讀書心得")
+FOOD = Template("🍽️ $food_loggers 位組員記錄了 $food_logs 餐飲食")
+QUIZ = Template("❓ $quizzers 位組員完成了測驗，平均答對率 $accuracy%")
+CHAT = Template("💬 小組聊天室共有 $chat_messages 則訊息（$chatters 位組員參與）")
+TOP = Template("🌟 昨日最活躍：$names")
+QUIET_MEMBERS = Template("還有 $quiet 位組員昨天沒有打卡，今天一起加油！")
+QUIET_GROUP = Template("昨天小組比較安靜，今天一起讀書、分享吧！")
+
+
+def _chunks(items, size=IN_FILTER_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def day_window(day: date):
+    """UTC [start, end) of a club-time calendar day, as ISO strings"""
+    start = datetime.combine(day, time.min, tzinfo=CLUB_TIMEZONE)
+    end = start + timedelta(days=1)
+    return start.astimezone(timezone.utc).isoformat(), end.astimezone(timezone.utc).isoformat()
+
+
+def yesterday() -> date:
+    return datetime.now(CLUB_TIMEZONE).date() - timedelta(days=1)
+
+
+# ====== COLLECTING ======
+
+class GroupDay:
+    """Counts for one group over the digest day"""
+
+    def __init__(self):
+        self.shares = 0
+        self.sharers = set()
+        self.food_logs = 0
+        self.food_loggers = set()
+        self.quizzers = set()
+        self.quiz_correct = 0
+        self.quiz_questions = 0
+        self.chat_messages = 0
+        self.chatters = set()
+        self.activity = Counter()
+
+    def active_members(self) -> set:
+        return self.sharers | self.food_loggers | self.quizzers | self.chatters
+
+
+def collect_day(supabase, group_ids, memberships: dict, start: str, end: str) -> dict:
+    """{group_id: GroupDay} from one scan of each activity table"""
+    days = {group_id: GroupDay() for group_id in group_ids}
+    window = [("gte", "created_at", start), ("lt", "created_at", end)]
+
+    for row in stream_rows(supabase, "text_shares", "id, user_id, group_id, created_at", filters=window):
+        stats = days.get(row["group_id"])
+        if stats is not None:
+            stats.shares += 1
+            stats.sharers.add(row["user_id"])
+            stats.activity[row["user_id"]] += 1
+
+    for row in stream_rows(supabase, "food_logs", "id, user_id, group_id, created_at", filters=window):
+        stats = days.get(row["group_id"])
+        if stats is not None:
+            stats.food_logs += 1
+            stats.food_loggers.add(row["user_id"])
+            stats.activity[row["user_id"]] += 1
+
+    groups_of_user = defaultdict(list)
+    for group_id, members in memberships.items():
+        for user_id in members:
+            groups_of_user[user_id].append(group_id)
+    for row in stream_rows(supabase, "quiz_responses",
+                           "id, user_id, score, total_questions, graded_score, graded_total, answered_at",
+                           key=("answered_at", "id"),
+                           filters=[("gte", "answered_at", start), ("lt", "answered_at", end)]):
+        score = row["graded_score"] if row.get("graded_score") is not None else row["score"]
+        total = row["graded_total"] if row.get("graded_total") is not None else row["total_questions"]
+        for group_id in groups_of_user.get(row["user_id"], ()):
+            stats = days.get(group_id)
+            if stats is not None:
+                stats.quizzers.add(row["user_id"])
+                stats.quiz_correct += score or 0
+                stats.quiz_questions += total or 0
+                stats.activity[row["user_id"]] += 1
+
+    for row in stream_rows(supabase, "chat_messages", "id, user_id, group_id, created_at", filters=window):
+        stats = days.get(row["group_id"])
+        if stats is not None:
+            stats.chat_messages += 1
+            stats.chatters.add(row["user_id"])
+    return days
+
+
+def load_display_names(supabase, user_ids) -> dict:
+    names = {}
+    for chunk in _chunks(user_ids):
+        result = execute_with_retry(
+            supabase.table("user_profiles").select("user_id, display_name").in_("user_id", chunk)
+        )
+        names.update({row["user_id"]: row["display_name"] for row in result.data or []})
+    return names
+
+
+# ====== RENDERING ======
+
+def render_digest(day: date, stats: GroupDay, member_count: int, names: dict) -> dict:
+    """{'title', 'body', 'stats'} for one group"""
+    lines = []
+    if stats.shares:
+        lines.append(SHARES.substitute(sharers=len(stats.sharers), shares=stats.shares))
+    if stats.food_logs:
+        lines.append(FOOD.substitute(food_loggers=len(stats.food_loggers), food_logs=stats.food_logs))
+    if stats.quizzers:
+        accuracy = round(100 * stats.quiz_correct / stats.quiz_questions) if stats.quiz_questions else 0
+        lines.append(QUIZ.substitute(quizzers=len(stats.quizzers), accuracy=accuracy))
+    if stats.chat_messages:
+        lines.append(CHAT.substitute(chat_messages=stats.chat_messages, chatters=len(stats.chatters)))
+
+    active = stats.active_members()
+    top = [names[user_id] for user_id, _ in stats.activity.most_common() if names.get(user_id)][:TOP_MEMBERS]
+    if top:
+        lines.append(TOP.substitute(names="、".join(top)))
+    if not lines:
+        lines.append(QUIET_GROUP.substitute())
+    elif member_count > len(active):
+        lines.append(QUIET_MEMBERS.substitute(quiet=member_count - len(active)))
+
+    return {
+        "title": TITLE.substitute(month=day.month, day=day.day),
+        "body": "\n".join(lines),
+        "stats": {
+            "member_count": member_count,
+            "active_members": len(active),
+            "shares": stats.shares,
+            "sharers": len(stats.sharers),
+            "food_logs": stats.food_logs,
+            "food_loggers": len(stats.food_loggers),
+            "quiz_completions": len(stats.quizzers),
+            "quiz_correct": stats.quiz_correct,
+            "quiz_questions": stats.quiz_questions,
+            "chat_messages": stats.chat_messages,
+            "chatters": len(stats.chatters),
+        },
+    }
+
+
+# ====== MAIN SCRIPT ======
+
+def post_digests(supabase=None, day: date = None, dry_run: bool = False) -> int:
+    """Write one digest per group for `day` (default: yesterday, club time)"""
+    if supabase is None:
+        supabase = get_client(admin=True)
+    day = day or yesterday()
+    start, end = day_window(day)
+
+    print(f"👥 Loading groups for {day.isoformat()}...")
+    group_ids = [g["id"] for g in stream_rows(supabase, "groups", "id")]
+    memberships = defaultdict(set)
+    for row in stream_rows(supabase, "group_members", "group_id, user_id", key=("group_id", "user_id")):
+        memberships[row["group_id"]].add(row["user_id"])
+
+    print("📊 Streaming the day's activity...")
+    days = collect_day(supabase, group_ids, memberships, start, end)
+    active = {user_id for stats in days.values() for user_id in stats.activity}
+    names = load_display_names(supabase, active)
+
+    created_at = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for group_id in group_ids:
+        digest = render_digest(day, days[group_id], len(memberships.get(group_id, ())), names)
+        rows.append({
+            "group_id": group_id,
+            "kind": DIGEST_KIND,
+            "digest_date": day.isoformat(),
+            **digest,
+            "created_at": created_at,
+        })
+
+    if dry_run:
+        for row in rows[:5]:
+            print(f"\n--- {row['group_id']}\n{row['title']}\n{row['body']}")
+        print(f"\n🔍 Dry run: {len(rows)} digests rendered, nothing written")
+        return len(rows)
+
+    for batch in _chunks(rows, WRITE_BATCH_SIZE):
+        execute_with_retry(
+            supabase.table(ANNOUNCEMENTS_TABLE).upsert(batch, on_conflict="group_id,kind,digest_date")
+        )
+    print(f"\n✅ Posted {len(rows)} digests for {day.isoformat()} "
+          f"({sum(1 for g in group_ids if days[g].active_members())} groups with activity)")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Daily Group Digests")
+    print("=" * 50)
+    print()
+
+    post_digests(dry_run="--dry-run" in sys.argv)
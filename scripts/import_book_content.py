@@ -7,34 +7,36 @@ and imports them into Supabase 'daily_content' table.
 What it does:
 1. Scans the folder for all Day files (第*天*.md)
 2. Extracts the title from each file
-3. Uploads content to Supabase with day number (1-21)
+3. Pre-renders sanitized HTML + plain text with strong ETags (lesson_render.py)
+4. Uploads content to Supabase with day number (1-21)
+5. Publishes gzip / brotli copies to the 'lessons' storage bucket
+6. Re-indexes glossary terms of changed lessons (lesson_keywords.py)
+7. Writes the Simplified Chinese variants (chinese_convert.py)
+
+Run the migrations first: scripts/migrations/014_daily_content_artifacts.sql, 015_lesson_terms.sql,
+017_script_variants.sql
 
 Time: ~3 minutes to run
 """
 
-import os
 import re
 from pathlib import Path
-from supabase import create_client, Client
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+from chinese_convert import SCRIPT, save_lesson_variants
+from lesson_keywords import update_keyword_index
+from lesson_render import render_lesson
+from supabase_pool import execute_with_retry, get_client
 
 # ====== CONFIGURATION ======
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# Validate that environment variables are set
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError(
-        "Missing environment variables! "
-        "Make sure SUPABASE_URL and SUPABASE_KEY are set in .env file"
-    )
+# Supabase credentials are resolved by env_config (SUPABASE_URL, SUPABASE_KEY)
 
 # Path to book content folder
 CONTENT_DIR = Path(__file__).parent.parent / "CKN book content"
 
+# Storage bucket for the compressed lesson artifacts (public, CDN-cached)
+ARTIFACT_BUCKET = "lessons"
+ARTIFACT_CACHE_SECONDS = "3600"
+
 # ====== MAIN SCRIPT ======
 
 def extract_title(content: str) -> str:
@@ -60,11 +62,38 @@ def extract_day_number(filename: str) -> int:
     return 1  # Fallback if no number found
 
 
-def import_all_content():
+def publish_artifacts(supabase, day_number: int, artifacts: dict) -> int:
+    """
+    Upload lesson.html / lesson.txt and their .gz / .br copies to
+    lessons/day-NN/. The copies keep the lesson's content type and carry
+    Content-Encoding, so browsers decode them transparently.
+    Returns the number of files uploaded.
+    """
+    bucket = supabase.storage.from_(ARTIFACT_BUCKET)
+    files = []
+    for kind, content_type in (("html", "text/html; charset=utf-8"), ("text", "text/plain; charset=utf-8")):
+        name = f"day-{day_number:02d}/lesson.{'html' if kind == 'html' else 'txt'}"
+        files.append((name, artifacts[kind].encode("utf-8"), content_type, None))
+        for encoding, data in artifacts[f"{kind}_compressed"].items():
+            if encoding == "gzip":
+                files.append((f"{name}.gz", data, content_type, "gzip"))
+            else:
+                files.append((f"{name}.br", data, content_type, "br"))
+
+    for name, data, content_type, content_encoding in files:
+        options = {"content-type": content_type, "upsert": "true", "cache-control": ARTIFACT_CACHE_SECONDS}
+        if content_encoding:
+            options["content-encoding"] = content_encoding
+        bucket.upload(name, data, options)
+    return len(files)
+
+
+def import_all_content(supabase=None):
     """Import all 21 markdown files to Supabase"""
     
-    # Initialize Supabase client
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Initialize Supabase client (the CLI passes in a shared one)
+    if supabase is None:
+        supabase = get_client(admin=True)
     
     # Get all markdown files that match pattern
     files = sorted([f for f in CONTENT_DIR.glob("第*天*.md")])
@@ -76,12 +105,14 @@ def import_all_content():
         return
     
     success_count = 0
+    lessons = {}
+    imported = []
     
     # First, clear existing content
     print("🗑️  Clearing existing daily_content...")
     try:
         # Delete all records from daily_content table
-        supabase.table('daily_content').delete().gte('id', '00000000-0000-0000-0000-000000000000').execute()
+        execute_with_retry(supabase.table('daily_content').delete().gte('id', '00000000-0000-0000-0000-000000000000'))
         print("✓ Existing content cleared")
     except Exception as e:
         print(f"⚠️  Warning: Could not clear existing content - {e}")
@@ -98,22 +129,47 @@ def import_all_content():
             title = extract_title(content)
             day_number = extract_day_number(filepath.name)
             
+            artifacts = render_lesson(content)
+
             # Prepare data for Supabase
             data = {
                 "day_number": day_number,
                 "title": title,
-                "content": content
+                "content": content,
+                "content_html": artifacts["html"],
+                "content_text": artifacts["text"],
+                "content_etag": artifacts["etag"],
+                "content_text_etag": artifacts["text_etag"],
             }
             
             # Insert/Update in Supabase (upsert = insert or update if exists)
-            result = supabase.table('daily_content').upsert(data).execute()
+            result = execute_with_retry(supabase.table('daily_content').upsert(data))
             
             print(f"✓ Day {day_number:2d}: {title}")
             success_count += 1
+            lessons[day_number] = content
+            imported.append(data)
+
+            try:
+                publish_artifacts(supabase, day_number, artifacts)
+            except Exception as e:
+                print(f"  ⚠️  Artifacts not uploaded to '{ARTIFACT_BUCKET}' bucket - {e}")
             
         except Exception as e:
             print(f"✗ {filepath.name}: Failed - {e}")
     
+    print()
+    try:
+        update_keyword_index(supabase, lessons)
+    except Exception as e:
+        print(f"⚠️  Warning: Keyword index not updated - {e}")
+
+    try:
+        variant_count = save_lesson_variants(supabase, imported)
+        print(f"✓ {variant_count} lessons converted to {SCRIPT}")
+    except Exception as e:
+        print(f"⚠️  Warning: {SCRIPT} variants not written - {e}")
+
     print(f"\n{'='*50}")
     print(f"✅ Successfully imported {success_count}/{len(files)} files")
     print(f"{'='*50}\n")
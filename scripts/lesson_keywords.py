@@ -0,0 +1,170 @@
+"""
+Lesson Keyword Index
+====================
+Cross-references the nutrition terms in scripts/data/glossary.csv
+(B族維生素, 膽固醇, 胡蘿蔔素 ...) across all 21 lessons, so the reader and
+the quiz generator can link concepts without re-scanning the book.
+
+What it does:
+1. Splits each lesson into the same blocks lesson_render.py emits as HTML
+   (heading / paragraph / list ...), numbered from 1
+2. Scans each block once, taking the longest glossary term at every
+   position (脂肪酸 is not also counted as 脂肪; 維生素 B1 == 維生素B1)
+3. Stores one compact row per (term, day): frequency and the block numbers
+   in 'lesson_terms'
+4. Skips lessons whose text and glossary are unchanged since the last run
+   (hashes in 'lesson_term_sources'), so an edit only re-indexes its day
+
+Runs at the end of every import; on its own it reads daily_content.
+Run the migration first: scripts/migrations/015_lesson_terms.sql
+Usage: python main.py keywords [--full]
+"""
+
+import csv
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+
+from lesson_render import parse_blocks
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+GLOSSARY_FILE = Path(__file__).resolve().parent / "data" / "glossary.csv"
+TERMS_TABLE = "lesson_terms"
+SOURCES_TABLE = "lesson_term_sources"
+
+# "維生素 B 1" / "維生素Ｂ１" -> "維生素B1"
+VITAMIN_SPACING = re.compile(r"維生素\s*([A-Za-z])\s*(\d*)")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text)
+    return VITAMIN_SPACING.sub(lambda m: f"維生素{m.group(1).upper()}{m.group(2)}", text)
+
+
+@lru_cache(maxsize=1)
+def load_glossary(path: Path = GLOSSARY_FILE):
+    """
+    Returns (lookup, version):
+    lookup maps a first character to [(surface form, term), ...] longest first.
+    version is a hash of the file, part of every lesson's source hash.
+    """
+    raw = path.read_bytes()
+    lines = (line for line in raw.decode("utf-8").splitlines() if not line.startswith("#"))
+    lookup = defaultdict(list)
+    for row in csv.DictReader(lines):
+        term = row["term"]
+        for surface in [term] + [a for a in (row.get("aliases") or "").split("|") if a]:
+            surface = normalize_text(surface)
+            lookup[surface[0]].append((surface, term))
+    for forms in lookup.values():
+        forms.sort(key=lambda form: -len(form[0]))
+    return dict(lookup), hashlib.sha256(raw).hexdigest()[:16]
+
+
+def find_terms(text: str, lookup: dict):
+    """Yield the glossary term of every longest match in text"""
+    i = 0
+    while i < len(text):
+        for surface, term in lookup.get(text[i], ()):
+            if text.startswith(surface, i):
+                yield term
+                i += len(surface)
+                break
+        else:
+            i += 1
+
+
+def index_lesson(markdown: str, lookup: dict) -> dict:
+    """{term: (frequency, [block numbers])} for one lesson"""
+    counts = defaultdict(int)
+    blocks = defaultdict(list)
+    for number, (kind, payload) in enumerate(parse_blocks(markdown), 1):
+        if kind == "heading":
+            text = payload[1]
+        elif kind == "list":
+            text = "\n".join(payload[1])
+        elif kind in ("paragraph", "quote"):
+            text = "\n".join(payload)
+        else:
+            continue
+        for term in find_terms(normalize_text(text), lookup):
+            counts[term] += 1
+            if not blocks[term] or blocks[term][-1] != number:
+                blocks[term].append(number)
+    return {term: (counts[term], blocks[term]) for term in counts}
+
+
+def source_hash(markdown: str, glossary_version: str) -> str:
+    return hashlib.sha256(f"{glossary_version}\n{markdown}".encode("utf-8")).hexdigest()[:32]
+
+
+# ====== MAIN SCRIPT ======
+
+def update_keyword_index(supabase, lessons: dict, full: bool = False) -> int:
+    """
+    Re-index the lessons ({day_number: markdown}) that changed.
+    Returns the number of lessons re-indexed.
+    """
+    lookup, version = load_glossary()
+    stored = {}
+    if not full:
+        result = execute_with_retry(supabase.table(SOURCES_TABLE).select("day_number, source_hash"))
+        stored = {row["day_number"]: row["source_hash"] for row in result.data or []}
+
+    indexed_at = datetime.now(timezone.utc).isoformat()
+    changed = 0
+    for day_number, markdown in sorted(lessons.items()):
+        digest = source_hash(markdown, version)
+        if stored.get(day_number) == digest:
+            continue
+
+        terms = index_lesson(markdown, lookup)
+        rows = [
+            {"term": term, "day_number": day_number, "frequency": frequency, "sections": sections}
+            for term, (frequency, sections) in sorted(terms.items())
+        ]
+        execute_with_retry(supabase.table(TERMS_TABLE).delete().eq("day_number", day_number))
+        if rows:
+            execute_with_retry(supabase.table(TERMS_TABLE).insert(rows))
+        execute_with_retry(supabase.table(SOURCES_TABLE).upsert(
+            {"day_number": day_number, "source_hash": digest, "term_count": len(rows), "indexed_at": indexed_at},
+            on_conflict="day_number",
+        ))
+        print(f"   ✓ Day {day_number:2d}: {len(rows)} terms")
+        changed += 1
+
+    print(f"🔖 Keyword index: {changed} of {len(lessons)} lessons re-indexed")
+    return changed
+
+
+def build_keyword_index(supabase=None, full: bool = False) -> int:
+    """Index the lessons currently in daily_content"""
+    if supabase is None:
+        supabase = get_client(admin=True)
+    result = execute_with_retry(supabase.table("daily_content").select("day_number, content"))
+    lessons = {row["day_number"]: row["content"] for row in result.data or []}
+    return update_keyword_index(supabase, lessons, full=full)
+
+
+def terms_for_day(supabase, day_number: int) -> list:
+    """[(term, frequency)] of one lesson, most frequent first - e.g. concept tags for quizzes"""
+    result = execute_with_retry(
+        supabase.table(TERMS_TABLE).select("term, frequency").eq("day_number", day_number).order("frequency", desc=True)
+    )
+    return [(row["term"], row["frequency"]) for row in result.data or []]
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Lesson Keyword Index")
+    print("=" * 50)
+    print()
+
+    build_keyword_index(full="--full" in sys.argv)
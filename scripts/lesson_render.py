@@ -0,0 +1,167 @@
+"""
+Lesson Rendering
+================
+Turns a lesson's markdown into the artifacts readers are served, once at
+import time instead of on every page load:
+
+- content_html: sanitized HTML. Every character of the source is escaped
+  and only the tags below are ever emitted, so it is safe to inject as-is.
+- content_text: plain text (search, previews, quiz prompts)
+- a strong ETag per variant (hash of the exact bytes)
+- gzip and brotli copies for the object-storage artifacts
+
+The lessons only use headings, paragraphs, **bold**, *italic*, lists,
+quotes and rules, so this small renderer covers them without a markdown
+dependency.
+
+Usage:
+    artifacts = render_lesson(markdown)
+    artifacts['html'], artifacts['text'], artifacts['etag']
+"""
+
+import gzip
+import hashlib
+import html
+import re
+
+# Emitted tags: h1-h6 p br strong em ul ol li blockquote hr
+
+HEADING = re.compile(r"^(#{1,6})\s*(.*?)\s*#*\s*$")
+BULLET = re.compile(r"^\s*[-*+]\s+(.*)$")
+NUMBERED = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+QUOTE = re.compile(r"^\s*>\s?(.*)$")
+RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+BOLD = re.compile(r"\*\*(.+?)\*\*|__(.+?)__")
+ITALIC = re.compile(r"(?<![*\w])\*(?!\s)(.+?)(?<!\s)\*(?!\*)")
+
+# Artifacts are built once per import, so spend the time on the smallest output
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def _inline_html(text: str) -> str:
+    text = html.escape(text, quote=True)
+    text = BOLD.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    return ITALIC.sub(r"<em>\1</em>", text)
+
+
+def _inline_text(text: str) -> str:
+    text = BOLD.sub(lambda m: m.group(1) or m.group(2), text)
+    return ITALIC.sub(r"\1", text).strip()
+
+
+def parse_blocks(markdown: str):
+    """Yield (kind, payload): ('heading', (level, text)), ('paragraph', [lines]),
+    ('list', (ordered, [items])), ('quote', [lines]) or ('rule', None)"""
+    paragraph, items, ordered, quote = [], [], False, []
+
+    def flush():
+        nonlocal paragraph, items, quote
+        blocks = []
+        if paragraph:
+            blocks.append(("paragraph", paragraph))
+        if items:
+            blocks.append(("list", (ordered, items)))
+        if quote:
+            blocks.append(("quote", quote))
+        paragraph, items, quote = [], [], []
+        return blocks
+
+    for line in markdown.replace("\r\n", "\n").split("\n"):
+        if not line.strip():
+            yield from flush()
+            continue
+        heading = HEADING.match(line)
+        if heading:
+            yield from flush()
+            if heading.group(2):
+                yield "heading", (len(heading.group(1)), heading.group(2))
+            continue
+        if RULE.match(line):
+            yield from flush()
+            yield "rule", None
+            continue
+        bullet, numbered, quoted = BULLET.match(line), NUMBERED.match(line), QUOTE.match(line)
+        if bullet or numbered:
+            if paragraph or quote or (items and ordered != bool(numbered)):
+                yield from flush()
+            ordered = bool(numbered)
+            items.append((bullet or numbered).group(1))
+        elif quoted:
+            if paragraph or items:
+                yield from flush()
+            quote.append(quoted.group(1))
+        elif items:
+            # Continuation of the previous list item
+            items[-1] += " " + line.strip()
+        else:
+            if quote:
+                yield from flush()
+            paragraph.append(line.strip())
+    yield from flush()
+
+
+def render_html(markdown: str) -> str:
+    parts = []
+    for kind, payload in parse_blocks(markdown):
+        if kind == "heading":
+            level, text = payload
+            parts.append(f"<h{level}>{_inline_html(text)}</h{level}>")
+        elif kind == "paragraph":
+            parts.append("<p>" + "<br>".join(_inline_html(line) for line in payload) + "</p>")
+        elif kind == "list":
+            ordered, items = payload
+            tag = "ol" if ordered else "ul"
+            parts.append(f"<{tag}>" + "".join(f"<li>{_inline_html(i)}</li>" for i in items) + f"</{tag}>")
+        elif kind == "quote":
+            parts.append("<blockquote><p>" + "<br>".join(_inline_html(line) for line in payload) + "</p></blockquote>")
+        else:
+            parts.append("<hr>")
+    return "\n".join(parts) + "\n"
+
+
+def render_text(markdown: str) -> str:
+    parts = []
+    for kind, payload in parse_blocks(markdown):
+        if kind == "heading":
+            parts.append(_inline_text(payload[1]))
+        elif kind in ("paragraph", "quote"):
+            parts.append("\n".join(_inline_text(line) for line in payload))
+        elif kind == "list":
+            ordered, items = payload
+            parts.append("\n".join(
+                f"{n}. {_inline_text(i)}" if ordered else f"• {_inline_text(i)}"
+                for n, i in enumerate(items, 1)
+            ))
+    return "\n\n".join(parts) + "\n"
+
+
+def strong_etag(data: bytes) -> str:
+    """Strong validator for exact bytes, e.g. "3f2a..." (quotes included)"""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def compress(data: bytes) -> dict:
+    """{encoding: compressed bytes}; brotli only when the package is installed"""
+    # mtime=0 keeps the gzip bytes (and so their ETag) identical across imports
+    variants = {"gzip": gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        return variants
+    variants["br"] = brotli.compress(data, quality=BROTLI_QUALITY)
+    return variants
+
+
+def render_lesson(markdown: str) -> dict:
+    """Every artifact of one lesson"""
+    html_bytes = render_html(markdown).encode("utf-8")
+    text_bytes = render_text(markdown).encode("utf-8")
+    return {
+        "html": html_bytes.decode("utf-8"),
+        "text": text_bytes.decode("utf-8"),
+        "etag": strong_etag(html_bytes),
+        "text_etag": strong_etag(text_bytes),
+        "html_compressed": compress(html_bytes),
+        "text_compressed": compress(text_bytes),
+    }
@@ -0,0 +1,447 @@
+"""
+Synthetic Cohort Load Test
+==========================
+Simulates a whole cohort (default 100 groups x 50 members x 21 days) against
+a Supabase project or the in-memory stand-in and reports where the schema
+slows down as the tables fill up.
+
+What it does:
+1. Creates the groups and one auth user + profile per member, then joins
+   every member through their group's invite code, the way /api/groups/join
+   does (look up the code, insert the membership)
+2. Replays each program day with single-row writes, like the app sends them:
+   quiz responses, text shares, food logs, chat messages, then comments and
+   likes on that day's shares and food logs
+3. After every CHECKPOINT_DAYS it times the main read patterns on random
+   members (chat history, BuddyShare feed, progress page, share check ...),
+   so the report shows read latency growing with table size
+4. Prints writes/s per day, write latency per table and read latency per
+   pattern and checkpoint; --report also saves them as JSON
+
+Rates are per member and day and can be changed with --rate NAME=VALUE
+(see LoadProfile). Timestamps are spread over the simulated days, ending
+yesterday, so the daily-share index and created_at ordering behave as live.
+
+The stand-in keeps rows in Python lists, so against it the report measures
+client and request overhead, not indexes - use a staging project for those.
+Staging data is tagged with the run id; --cleanup removes it afterwards.
+
+Usage: python main.py load-test [--fake] [--groups 100] [--members 50] [--days 21]
+"""
+
+import json
+import random
+import string
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timedelta, timezone
+
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+CHECKPOINT_DAYS = 7
+
+# Rows per cleanup delete request (PostgREST puts IN lists in the URL)
+IN_FILTER_CHUNK = 100
+
+SAMPLE_SHARES = [
+    "今天學到蛋白質要平均分配在三餐，早餐終於加了一顆蛋。",
+    "原來膳食纖維一天要 25 克以上，我平常大概只有一半。",
+    "減少含糖飲料第三天，下午比較不會想睡。",
+    "看完這章才知道鈉不只在鹽裡，醬料也很多。",
+    "今天試著每餐先吃蔬菜，飽足感真的比較好。",
+]
+SAMPLE_CHAT = ["大家早安！", "今天的測驗好難 😅", "推薦一家少油的便當店", "加油～", "晚餐吃了什麼？", "有人一起去運動嗎"]
+SAMPLE_COMMENTS = ["好棒！", "看起來很健康 👍", "學到了", "我也要試試看", "這個份量剛好"]
+SAMPLE_FOODS = [
+    [{"name": "白飯", "portion": "1碗"}, {"name": "燙青菜", "portion": "1盤"}],
+    [{"name": "雞胸肉", "portion": "1塊 (約150g)"}, {"name": "地瓜", "portion": "半條"}],
+    [{"name": "牛肉麵", "portion": "1碗"}],
+    [{"name": "燕麥", "portion": "40g"}, {"name": "香蕉", "portion": "1根"}],
+]
+
+
+@dataclass
+class LoadProfile:
+    groups: int = 100
+    members: int = 50             # per group
+    days: int = 21
+    quiz_rate: float = 0.8        # share of members taking the day's quiz
+    share_rate: float = 0.6       # share of members posting the day's text share
+    food_logs: float = 1.5        # food logs per member per day
+    chat_messages: float = 3.0    # chat messages per member per day
+    comments: float = 0.5         # comments per text share / food log
+    reactions: float = 2.0        # likes per text share / food log
+    read_samples: int = 50        # timed reads per pattern per checkpoint
+    workers: int = 16             # concurrent requests
+
+    def set_rate(self, assignment: str):
+        """Apply 'name=value' from the command line"""
+        name, _, value = assignment.partition("=")
+        kinds = {f.name: f.type for f in fields(self)}
+        if name not in kinds or not value:
+            raise ValueError(f"Unknown rate '{assignment}' (one of: {', '.join(kinds)})")
+        setattr(self, name, int(value) if kinds[name] in (int, "int") else float(value))
+
+
+def _count(rate: float) -> int:
+    """Whole events for a fractional rate: 1.5 -> 1 or 2, averaging 1.5"""
+    whole = int(rate)
+    return whole + (random.random() < rate - whole)
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Recorder:
+    """Request latencies (ms) and errors per operation, safe across threads"""
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def run(self, operation: str, query):
+        """Execute one request (no retries - failures are part of the result)"""
+        start = time.perf_counter()
+        try:
+            result = query.execute() if hasattr(query, "execute") else query()
+        except Exception as e:
+            with self.lock:
+                self.errors[operation] += 1
+                if self.errors[operation] <= 3:
+                    print(f"   ✗ {operation}: {str(e)[:200]}")
+            return None
+        elapsed = (time.perf_counter() - start) * 1000
+        with self.lock:
+            self.timings[operation].append(elapsed)
+        return result
+
+    def operations(self) -> list:
+        return list(dict.fromkeys([*self.timings, *self.errors]))
+
+    def summary(self, operation: str) -> dict:
+        values = self.timings.get(operation, [])
+        return {
+            "requests": len(values),
+            "errors": self.errors.get(operation, 0),
+            "p50_ms": round(percentile(values, 0.5), 1),
+            "p95_ms": round(percentile(values, 0.95), 1),
+            "p99_ms": round(percentile(values, 0.99), 1),
+            "max_ms": round(max(values, default=0), 1),
+        }
+
+
+# ====== COHORT SETUP ======
+
+def _invite_code(run_id: str, number: int) -> str:
+    # VARCHAR(10): 4 chars of run id + 6 digits
+    return f"{run_id[:4].upper()}{number:06d}"
+
+
+def create_cohort(supabase, profile: LoadProfile, run_id: str, recorder: Recorder, pool) -> list:
+    """Groups, users and memberships; returns [{id, invite_code, members: [user ids]}]"""
+    groups = []
+    for number in range(profile.groups):
+        code = _invite_code(run_id, number)
+        result = recorder.run("insert groups", supabase.table("groups").insert({
+            "name": f"load-{run_id}-{number:03d}",
+            "description": "Synthetic load test group",
+            "invite_code": code,
+        }))
+        if result and result.data:
+            groups.append({"id": result.data[0]["id"], "invite_code": code, "members": []})
+    print(f"   ✓ {len(groups)} groups")
+
+    def create_member(job):
+        group, number = job
+        email = f"load-{run_id}-{number:06d}@example.com"
+        password = "".join(random.choices(string.ascii_letters + string.digits, k=24))
+        created = recorder.run("auth create_user", lambda: supabase.auth.admin.create_user(
+            {"email": email, "password": password, "email_confirm": True}
+        ))
+        if created is None:
+            return None
+        user_id = created.user.id
+        # handle_new_user already created the profile row; set the display name on it
+        # (an upsert, so the stand-in - which has no trigger - gets the row too)
+        recorder.run("upsert user_profiles", supabase.table("user_profiles").upsert(
+            {"user_id": user_id, "display_name": f"測試{number:04d}"}, on_conflict="user_id"
+        ))
+
+        # /api/groups/join: resolve the invite code, then insert the membership
+        found = recorder.run("join: group by invite_code", supabase.table("groups").select("id, name")
+                             .eq("invite_code", group["invite_code"]).single())
+        if found is None:
+            return None
+        joined = recorder.run("insert group_members", supabase.table("group_members").insert({
+            "group_id": found.data["id"],
+            "user_id": user_id,
+            "role": "member",
+            "joined_at": datetime.now(timezone.utc).isoformat(),
+        }))
+        return (group, user_id) if joined is not None else None
+
+    jobs = [(group, g * profile.members + m) for g, group in enumerate(groups) for m in range(profile.members)]
+    for joined in pool.map(create_member, jobs):
+        if joined:
+            joined[0]["members"].append(joined[1])
+    print(f"   ✓ {sum(len(g['members']) for g in groups)} members joined")
+    return groups
+
+
+# ====== DAILY ACTIVITY ======
+
+def _moment(day_start: datetime) -> str:
+    """A random time between 07:00 and 23:00 of a simulated day"""
+    return (day_start + timedelta(seconds=random.randint(7 * 3600, 23 * 3600))).isoformat()
+
+
+def simulate_day(supabase, profile: LoadProfile, groups: list, day: int, day_start: datetime,
+                 recorder: Recorder, pool) -> int:
+    """All writes of one program day; returns the number of requests sent"""
+    posts = []
+    writes = []
+    for group in groups:
+        for user_id in group["members"]:
+            if random.random() < profile.quiz_rate:
+                total = 5
+                writes.append(("insert quiz_responses", "quiz_responses", {
+                    "user_id": user_id, "day_number": day, "score": random.randint(2, total),
+                    "total_questions": total, "answered_at": _moment(day_start),
+                }))
+            if random.random() < profile.share_rate:
+                posts.append(("insert text_shares", "text_shares", "text_share", group, {
+                    "user_id": user_id, "group_id": group["id"], "day_number": day,
+                    "content": random.choice(SAMPLE_SHARES), "created_at": _moment(day_start),
+                }))
+            for _ in range(_count(profile.food_logs)):
+                posts.append(("insert food_logs", "food_logs", "food_log", group, {
+                    "user_id": user_id, "group_id": group["id"], "detected_foods": random.choice(SAMPLE_FOODS),
+                    "user_input": "", "created_at": _moment(day_start),
+                }))
+            for _ in range(_count(profile.chat_messages)):
+                writes.append(("insert chat_messages", "chat_messages", {
+                    "group_id": group["id"], "user_id": user_id,
+                    "message": random.choice(SAMPLE_CHAT), "created_at": _moment(day_start),
+                }))
+
+    def write(job):
+        operation, table, row = job
+        return recorder.run(operation, supabase.table(table).insert(row))
+
+    def post(job):
+        operation, table, share_type, group, row = job
+        result = recorder.run(operation, supabase.table(table).insert(row))
+        if not result or not result.data:
+            return []
+        share_id = result.data[0]["id"]
+        others = [m for m in group["members"] if m != row["user_id"]]
+        # Reactions and comments come from other members of the same group
+        followups = [("insert share_comments", "share_comments", {
+            "share_id": share_id, "share_type": share_type, "user_id": random.choice(others),
+            "content": random.choice(SAMPLE_COMMENTS),
+        }) for _ in range(_count(profile.comments)) if others]
+        followups += [("insert share_reactions", "share_reactions", {
+            "share_id": share_id, "share_type": share_type, "user_id": user_id, "reaction_type": "like",
+        }) for user_id in random.sample(others, min(_count(profile.reactions), len(others)))]
+        return followups
+
+    random.shuffle(posts)
+    random.shuffle(writes)
+    followups = [f for batch in pool.map(post, posts) for f in batch]
+    list(pool.map(write, writes))
+    random.shuffle(followups)
+    list(pool.map(write, followups))
+    return len(posts) + len(writes) + len(followups)
+
+
+# ====== READ PATTERNS ======
+
+def read_patterns(supabase, group: dict, user_id: str, day: int):
+    """(pattern, query) for the reads a member triggers, mirroring the app's queries"""
+    yield "join: group by invite_code", supabase.table("groups").select("id, name").eq("invite_code", group["invite_code"]).single()
+    yield "membership by user", supabase.table("group_members").select("group_id").eq("user_id", user_id)
+    yield "chat history (100)", (
+        supabase.table("chat_messages").select("*").eq("group_id", group["id"]).order("created_at").limit(100)
+    )
+    yield "feed: text shares (20)", (
+        supabase.table("text_shares").select("id, user_id, content, day_number, created_at")
+        .eq("group_id", group["id"]).neq("user_id", user_id).order("created_at", desc=True).limit(20)
+    )
+    yield "feed: food logs (20)", (
+        supabase.table("food_logs").select("id, user_id, image_url, detected_foods, created_at")
+        .eq("group_id", group["id"]).neq("user_id", user_id).order("created_at", desc=True).limit(20)
+    )
+    yield "share: already posted today", (
+        supabase.table("text_shares").select("id, created_at").eq("user_id", user_id).eq("day_number", day).limit(1)
+    )
+    yield "progress: quiz responses", supabase.table("quiz_responses").select("answered_at, day_number").eq("user_id", user_id)
+    yield "progress: food logs", supabase.table("food_logs").select("created_at").eq("user_id", user_id)
+    yield "unread: messages since", (
+        supabase.table("chat_messages").select("id", count="exact").eq("group_id", group["id"])
+        .neq("user_id", user_id).gte("created_at", (datetime.now(timezone.utc) - timedelta(days=1)).isoformat())
+        .limit(1)
+    )
+
+
+def measure_reads(supabase, profile: LoadProfile, groups: list, day: int, pool) -> Recorder:
+    """Time every read pattern for read_samples random members"""
+    recorder = Recorder()
+    members = [(g, m) for g in groups for m in g["members"]]
+    if not members:
+        return recorder
+
+    def sample(_):
+        group, user_id = random.choice(members)
+        feed = None
+        for pattern, query in read_patterns(supabase, group, user_id, day):
+            result = recorder.run(pattern, query)
+            if pattern.startswith("feed:") and result is not None:
+                feed = (feed or []) + [row["id"] for row in result.data or []]
+        if feed:
+            # The feed's follow-up: comment and like counts for the shown items
+            recorder.run("feed: comments for items", supabase.table("share_comments").select("share_id, share_type").in_("share_id", feed))
+            recorder.run("feed: reactions for items", supabase.table("share_reactions").select("share_id, share_type").in_("share_id", feed))
+
+    list(pool.map(sample, range(profile.read_samples)))
+    return recorder
+
+
+def table_sizes(supabase, recorder: Recorder) -> dict:
+    sizes = {}
+    for table in ("group_members", "quiz_responses", "text_shares", "food_logs", "chat_messages",
+                  "share_comments", "share_reactions"):
+        result = recorder.run(f"count {table}", supabase.table(table).select("*", count="exact").limit(1))
+        sizes[table] = result.count if result is not None else None
+    return sizes
+
+
+# ====== CLEANUP ======
+
+def cleanup(supabase, groups: list):
+    """Remove everything a run created"""
+    user_ids = [m for g in groups for m in g["members"]]
+    for start in range(0, len(user_ids), IN_FILTER_CHUNK):
+        chunk = user_ids[start:start + IN_FILTER_CHUNK]
+        for table in ("share_comments", "share_reactions", "quiz_responses"):
+            execute_with_retry(supabase.table(table).delete().in_("user_id", chunk))
+        execute_with_retry(supabase.table("user_profiles").delete().in_("user_id", chunk))
+    # These cascade from groups in Postgres; deleted explicitly so the stand-in matches
+    for group in groups:
+        for table in ("group_members", "text_shares", "food_logs", "chat_messages"):
+            execute_with_retry(supabase.table(table).delete().eq("group_id", group["id"]))
+        execute_with_retry(supabase.table("groups").delete().eq("id", group["id"]))
+    for user_id in user_ids:
+        supabase.auth.admin.delete_user(user_id)
+    print(f"🧹 Removed {len(groups)} groups and {len(user_ids)} users")
+
+
+# ====== REPORT ======
+
+def print_report(report: dict):
+    print("\n" + "=" * 50)
+    print("  Load Test Report")
+    print("=" * 50)
+
+    print("\n📝 Writes per day")
+    for day in report["days"]:
+        print(f"   Day {day['day']:2d}: {day['requests']:6d} requests in {day['seconds']:6.1f}s"
+              f" = {day['requests_per_second']:7.1f}/s")
+
+    print("\n✍️  Write latency (ms)")
+    print(f"   {'operation':<32} {'count':>7} {'err':>5} {'p50':>7} {'p95':>7} {'p99':>7}")
+    for operation, stats in sorted(report["writes"].items()):
+        print(f"   {operation:<32} {stats['requests']:>7} {stats['errors']:>5} "
+              f"{stats['p50_ms']:>7} {stats['p95_ms']:>7} {stats['p99_ms']:>7}")
+
+    for checkpoint in report["checkpoints"]:
+        sizes = ", ".join(f"{t} {n}" for t, n in checkpoint["table_sizes"].items())
+        print(f"\n📖 Read latency after day {checkpoint['day']} (ms) - {sizes}")
+        print(f"   {'pattern':<32} {'count':>7} {'err':>5} {'p50':>7} {'p95':>7} {'max':>7}")
+        for pattern, stats in checkpoint["reads"].items():
+            print(f"   {pattern:<32} {stats['requests']:>7} {stats['errors']:>5} "
+                  f"{stats['p50_ms']:>7} {stats['p95_ms']:>7} {stats['max_ms']:>7}")
+
+    if len(report["checkpoints"]) > 1:
+        first, last = report["checkpoints"][0]["reads"], report["checkpoints"][-1]["reads"]
+        growth = sorted(
+            ((last[p]["p95_ms"] / first[p]["p95_ms"], p) for p in last if p in first and first[p]["p95_ms"]),
+            reverse=True,
+        )
+        print("\n📈 Slowest-growing reads (p95, first -> last checkpoint)")
+        for ratio, pattern in growth[:5]:
+            print(f"   {pattern:<32} x{ratio:.1f}")
+
+
+# ====== MAIN SCRIPT ======
+
+def run_load_test(supabase=None, profile: LoadProfile = None, report_path: str = None,
+                  remove: bool = False) -> dict:
+    if supabase is None:
+        supabase = get_client(admin=True)
+    profile = profile or LoadProfile()
+    run_id = uuid.uuid4().hex[:8]
+    recorder = Recorder()
+    report = {"run_id": run_id, "profile": asdict(profile), "days": [], "checkpoints": []}
+
+    print(f"🏗️  Run {run_id}: {profile.groups} groups x {profile.members} members x {profile.days} days")
+    cohort_start = (datetime.now(timezone.utc) - timedelta(days=profile.days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+    with ThreadPoolExecutor(max_workers=profile.workers) as pool:
+        started = time.perf_counter()
+        groups = create_cohort(supabase, profile, run_id, recorder, pool)
+        report["setup_seconds"] = round(time.perf_counter() - started, 1)
+
+        for day in range(1, profile.days + 1):
+            started = time.perf_counter()
+            requests = simulate_day(supabase, profile, groups, day, cohort_start + timedelta(days=day - 1),
+                                    recorder, pool)
+            seconds = time.perf_counter() - started
+            report["days"].append({
+                "day": day, "requests": requests, "seconds": round(seconds, 2),
+                "requests_per_second": round(requests / seconds, 1) if seconds else 0,
+            })
+            print(f"   ✓ Day {day:2d}: {requests} writes ({requests / seconds if seconds else 0:.0f}/s)")
+
+            if day % CHECKPOINT_DAYS == 0 or day == profile.days:
+                reads = measure_reads(supabase, profile, groups, day, pool)
+                report["checkpoints"].append({
+                    "day": day,
+                    "table_sizes": table_sizes(supabase, recorder),
+                    "reads": {p: reads.summary(p) for p in reads.operations()},
+                })
+
+    report["writes"] = {op: recorder.summary(op) for op in recorder.operations() if not op.startswith("count ")}
+    print_report(report)
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Report saved to {report_path}")
+    if remove:
+        cleanup(supabase, groups)
+    return report
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("  Synthetic Cohort Load Test")
+    print("=" * 50)
+    print()
+
+    from fake_supabase import start_server, use_fake_supabase
+
+    # Standalone runs use a throwaway stand-in; staging runs go through main.py
+    use_fake_supabase(start_server())
+    run_load_test(profile=LoadProfile(groups=5, members=10, days=7))
@@ -0,0 +1,238 @@
+"""
+Membership and group_id Repair
+==============================
+Finds and fixes the membership inconsistencies that silently break the
+BuddyShare feed and group queries, in a few batched writes instead of
+hand-run SQL (migrations/fix_group_id_values.sql) or per-row updates.
+
+What it does:
+1. Loads groups and every group_members row once
+2. Detects:
+   - duplicate memberships (same group and user more than once)
+   - memberships of groups that no longer exist
+   - users in more than one group (reported only - the app expects one)
+3. Streams text_shares, food_logs and chat_messages (id, user_id, group_id)
+   and detects rows whose group_id is NULL, the author's user_id (the old
+   useTextShares fallback) or a group that does not exist. Rows in a real
+   group the author has since left are counted but kept where they are
+4. Fixes, unless --dry-run:
+   - duplicates: one transactional delete of every copy but the earliest
+     (dedupe_group_members), so a failure cannot drop a membership
+   - memberships of missing groups: one delete per chunk of groups
+   - wrong group_id: set to the author's group when the author is in exactly
+     one group - one update per (table, group, chunk of ids), and the same
+     update on the matching buddyshare_feed rows
+   Rows whose author is in no group, or whose right group is ambiguous,
+   are orphans: counted and listed in the report, never guessed at
+5. Prints the report (and saves it as JSON with --report). group_day_stats
+   counted the moved rows under their old group, so after a fix it says to
+   run `python main.py analytics --full`
+
+Run the migration first: scripts/migrations/028_dedupe_group_members.sql
+Then run this, then scripts/migrations/021_group_members_unique.sql, which
+makes duplicate memberships impossible from then on.
+Usage: python main.py repair-memberships [--dry-run] [--report repair.json]
+"""
+
+import json
+from collections import defaultdict
+
+from streaming import stream_rows
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+# Ids per PostgREST IN filter (they go in the URL)
+IN_FILTER_CHUNK = 100
+
+# group_members has no unique id column to page on, so it is read by range
+MEMBER_PAGE_SIZE = 1000
+
+# Activity tables with a group_id column
+ACTIVITY_TABLES = ("text_shares", "food_logs", "chat_messages")
+
+# Activity tables copied into buddyshare_feed -> their share_type there
+FEED_SHARE_TYPES = {"text_shares": "text_share", "food_logs": "food_log"}
+
+# Ids listed per issue in the printed report (the JSON report has all)
+SAMPLE_SIZE = 5
+
+
+def _chunks(items, size=IN_FILTER_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def load_memberships(supabase) -> list:
+    """Every group_members row, duplicates included (keyset paging would skip them)"""
+    rows, start = [], 0
+    while True:
+        page = execute_with_retry(
+            supabase.table("group_members").select("group_id, user_id, role, joined_at")
+            .order("group_id").order("user_id").order("joined_at")
+            .range(start, start + MEMBER_PAGE_SIZE - 1)
+        ).data or []
+        rows.extend(page)
+        if len(page) < MEMBER_PAGE_SIZE:
+            return rows
+        start += MEMBER_PAGE_SIZE
+
+
+# ====== DETECTION ======
+
+def check_memberships(memberships: list, group_ids: set) -> dict:
+    by_key = defaultdict(list)
+    for row in memberships:
+        by_key[(row["group_id"], row["user_id"])].append(row)
+
+    duplicates = {key: rows for key, rows in by_key.items() if len(rows) > 1}
+    missing_groups = sorted({group_id for group_id, _ in by_key if group_id not in group_ids})
+
+    groups_of_user = defaultdict(set)
+    for group_id, user_id in by_key:
+        if group_id in group_ids:
+            groups_of_user[user_id].add(group_id)
+    multi_group = {user_id: sorted(groups) for user_id, groups in groups_of_user.items() if len(groups) > 1}
+    return {
+        "duplicates": duplicates,
+        "missing_groups": missing_groups,
+        "groups_of_user": groups_of_user,
+        "multi_group": multi_group,
+    }
+
+
+def check_activity(supabase, table: str, groups_of_user: dict, group_ids: set) -> dict:
+    """
+    Returns {'fixes': {group_id: [row ids]}, 'orphans': [ids], 'ambiguous': [ids],
+    'other_group': n, 'checked': n}
+    """
+    fixes = defaultdict(list)
+    orphans, ambiguous = [], []
+    other_group = checked = 0
+    for row in stream_rows(supabase, table, "id, user_id, group_id"):
+        checked += 1
+        groups = groups_of_user.get(row["user_id"], ())
+        if row["group_id"] is not None and row["group_id"] in groups:
+            continue
+        if row["group_id"] in group_ids and row["group_id"] != row["user_id"]:
+            # A real group the author has since left: the post stays where it was made
+            other_group += 1
+            continue
+        if not groups:
+            orphans.append(row["id"])
+        elif len(groups) == 1:
+            fixes[next(iter(groups))].append(row["id"])
+        else:
+            ambiguous.append(row["id"])
+    return {"fixes": dict(fixes), "orphans": orphans, "ambiguous": ambiguous, "other_group": other_group,
+            "checked": checked}
+
+
+# ====== FIXES ======
+
+def fix_duplicates(supabase, duplicates: dict) -> int:
+    """Keep the earliest row of each duplicated membership - one delete, in one transaction"""
+    group_ids = sorted({group_id for group_id, _ in duplicates})
+    if not group_ids:
+        return 0
+    # A single DELETE statement: nothing is re-inserted, so retrying is safe
+    result = execute_with_retry(supabase.rpc("dedupe_group_members", {"p_group_ids": group_ids}))
+    return result.data or 0
+
+
+def remove_missing_group_members(supabase, group_ids: list) -> None:
+    for chunk in _chunks(group_ids):
+        execute_with_retry(supabase.table("group_members").delete().in_("group_id", chunk))
+
+
+def fix_group_ids(supabase, table: str, fixes: dict) -> int:
+    """One update per target group and chunk of row ids, mirrored into buddyshare_feed"""
+    share_type = FEED_SHARE_TYPES.get(table)
+    updated = 0
+    for group_id, ids in fixes.items():
+        for chunk in _chunks(ids):
+            execute_with_retry(supabase.table(table).update({"group_id": group_id}).in_("id", chunk))
+            if share_type:
+                execute_with_retry(
+                    supabase.table("buddyshare_feed").update({"group_id": group_id})
+                    .eq("share_type", share_type).in_("share_id", chunk)
+                )
+            updated += len(chunk)
+    return updated
+
+
+# ====== MAIN SCRIPT ======
+
+def repair_memberships(supabase=None, dry_run: bool = False, report_path: str = None) -> dict:
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    print("👥 Loading groups and memberships...")
+    group_ids = {row["id"] for row in stream_rows(supabase, "groups", "id")}
+    memberships = load_memberships(supabase)
+    members = check_memberships(memberships, group_ids)
+
+    activity = {}
+    for table in ACTIVITY_TABLES:
+        print(f"📊 Checking {table}...")
+        activity[table] = check_activity(supabase, table, members["groups_of_user"], group_ids)
+
+    report = {
+        "dry_run": dry_run,
+        "groups": len(group_ids),
+        "memberships": len(memberships),
+        "duplicate_memberships": [
+            {"group_id": g, "user_id": u, "copies": len(rows)} for (g, u), rows in members["duplicates"].items()
+        ],
+        "memberships_of_missing_groups": members["missing_groups"],
+        "users_in_several_groups": members["multi_group"],
+        "activity": {
+            table: {
+                "checked": result["checked"],
+                "wrong_group_id": sum(len(ids) for ids in result["fixes"].values()),
+                "orphans": result["orphans"],
+                "ambiguous": result["ambiguous"],
+                "posted_in_group_author_left": result["other_group"],
+            }
+            for table, result in activity.items()
+        },
+    }
+
+    print(f"\n{'🔍 DRY RUN - nothing written' if dry_run else '🔧 Repair'}")
+    print(f"   Duplicate memberships:          {len(report['duplicate_memberships'])}")
+    print(f"   Memberships of missing groups:  {len(members['missing_groups'])}")
+    print(f"   Users in several groups:        {len(members['multi_group'])} (not changed)")
+    for table, summary in report["activity"].items():
+        print(f"   {table:<15} checked {summary['checked']:>7}  wrong group_id {summary['wrong_group_id']:>5}  "
+              f"orphans {len(summary['orphans']):>4}  ambiguous {len(summary['ambiguous']):>4}")
+        if summary["orphans"]:
+            print(f"      orphans e.g. {', '.join(summary['orphans'][:SAMPLE_SIZE])}")
+
+    if not dry_run:
+        removed = fix_duplicates(supabase, members["duplicates"])
+        remove_missing_group_members(supabase, members["missing_groups"])
+        updated = {table: fix_group_ids(supabase, table, result["fixes"]) for table, result in activity.items()}
+        report["fixed"] = {"duplicate_rows_removed": removed, "group_ids_updated": updated}
+        print(f"\n✅ Removed {removed} duplicate memberships, "
+              f"{len(members['missing_groups'])} groups' stale memberships, "
+              f"updated {sum(updated.values())} group_ids")
+        if any(updated.values()):
+            print("⚠️  group_day_stats still counts the moved rows under their old group - "
+                  "run `python main.py analytics --full`")
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📝 Report saved to {report_path}")
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Membership and group_id Repair")
+    print("=" * 50)
+    print()
+
+    repair_memberships(dry_run="--dry-run" in sys.argv)
@@ -0,0 +1,44 @@
+-- ================================================
+-- Per-group, per-day engagement summary
+-- ================================================
+-- Written by scripts/cohort_analytics.py (python main.py analytics).
+-- The dashboard reads this instead of aggregating raw activity in the browser.
+
+CREATE TABLE IF NOT EXISTS public.group_day_stats (
+    group_id UUID NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+    day_number INTEGER NOT NULL CHECK (day_number BETWEEN 1 AND 21),
+    member_count INTEGER NOT NULL DEFAULT 0,
+    active_members INTEGER NOT NULL DEFAULT 0,
+    quiz_completions INTEGER NOT NULL DEFAULT 0,
+    quiz_score INTEGER NOT NULL DEFAULT 0,
+    quiz_questions INTEGER NOT NULL DEFAULT 0,
+    quiz_accuracy NUMERIC(5, 4),
+    share_count INTEGER NOT NULL DEFAULT 0,
+    sharers INTEGER NOT NULL DEFAULT 0,
+    food_log_count INTEGER NOT NULL DEFAULT 0,
+    food_loggers INTEGER NOT NULL DEFAULT 0,
+    chat_messages INTEGER NOT NULL DEFAULT 0,
+    completion_rate NUMERIC(5, 4) NOT NULL DEFAULT 0,
+    quiz_completion_rate NUMERIC(5, 4) NOT NULL DEFAULT 0,
+    share_rate NUMERIC(5, 4) NOT NULL DEFAULT 0,
+    food_log_rate NUMERIC(5, 4) NOT NULL DEFAULT 0,
+    active_rate NUMERIC(5, 4) NOT NULL DEFAULT 0,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (group_id, day_number)
+);
+
+-- Keyset pagination indexes for the streaming jobs
+CREATE INDEX IF NOT EXISTS idx_quiz_responses_created_id ON quiz_responses(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_text_shares_created_id ON text_shares(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_food_logs_created_id ON food_logs(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_created_id ON chat_messages(created_at, id);
+
+-- Enable Row Level Security
+ALTER TABLE public.group_day_stats ENABLE ROW LEVEL SECURITY;
+
+-- Group members can read their own group's stats (writes use the service role)
+DROP POLICY IF EXISTS "Group members can read group stats" ON public.group_day_stats;
+CREATE POLICY "Group members can read group stats" ON public.group_day_stats
+  FOR SELECT USING (
+    group_id IN (SELECT group_id FROM group_members WHERE user_id = auth.uid())
+  );
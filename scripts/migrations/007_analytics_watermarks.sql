@@ -0,0 +1,24 @@
+-- ================================================
+-- Incremental refresh support for analytics jobs
+-- ================================================
+-- analytics_watermarks: how far each job has read into each source table
+-- (scripts/watermarks.py). group_day_stats also keeps the distinct member ids
+-- behind each rate so new rows can be merged without rescanning history.
+
+CREATE TABLE IF NOT EXISTS public.analytics_watermarks (
+    job TEXT NOT NULL,
+    source_table TEXT NOT NULL,
+    last_created_at TIMESTAMPTZ,
+    last_id UUID,
+    last_full_refresh_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (job, source_table)
+);
+
+-- Only the service role (batch jobs) reads or writes watermarks
+ALTER TABLE public.analytics_watermarks ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE public.group_day_stats
+    ADD COLUMN IF NOT EXISTS quizzer_ids UUID[] NOT NULL DEFAULT '{}',
+    ADD COLUMN IF NOT EXISTS sharer_ids UUID[] NOT NULL DEFAULT '{}',
+    ADD COLUMN IF NOT EXISTS food_logger_ids UUID[] NOT NULL DEFAULT '{}';
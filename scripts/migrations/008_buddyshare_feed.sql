@@ -0,0 +1,43 @@
+-- ================================================
+-- Materialized BuddyShare feed
+-- ================================================
+-- Maintained by scripts/buddyshare_feed.py (python main.py feed).
+-- One row per text share / food log with the author's display name and
+-- comment / like counts precomputed, so a group's feed is one indexed query:
+--   SELECT * FROM buddyshare_feed WHERE group_id = $1 ORDER BY created_at DESC LIMIT 40;
+
+CREATE TABLE IF NOT EXISTS public.buddyshare_feed (
+    share_id UUID NOT NULL,
+    share_type VARCHAR(20) NOT NULL CHECK (share_type IN ('text_share', 'food_log')),
+    group_id UUID NOT NULL,
+    user_id UUID NOT NULL,
+    user_name TEXT NOT NULL,
+    content TEXT NOT NULL DEFAULT '',
+    day_number INTEGER,
+    food_name TEXT,
+    food_image_url TEXT,
+    detected_foods JSONB NOT NULL DEFAULT '[]',
+    like_count INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL,
+    updated_at TIMESTAMPTZ,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (share_id, share_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_buddyshare_feed_group_created
+    ON public.buddyshare_feed(group_id, created_at DESC);
+
+-- Keyset pagination indexes for the interaction tables
+CREATE INDEX IF NOT EXISTS idx_share_comments_created_id ON share_comments(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_share_reactions_created_id ON share_reactions(created_at, id);
+
+-- Enable Row Level Security
+ALTER TABLE public.buddyshare_feed ENABLE ROW LEVEL SECURITY;
+
+-- Group members can read their group's feed (writes use the service role)
+DROP POLICY IF EXISTS "Group members can read feed" ON public.buddyshare_feed;
+CREATE POLICY "Group members can read feed" ON public.buddyshare_feed
+  FOR SELECT USING (
+    group_id IN (SELECT group_id FROM group_members WHERE user_id = auth.uid())
+  );
@@ -0,0 +1,37 @@
+-- ================================================
+-- Cold storage for old chat messages
+-- ================================================
+-- Filled by scripts/chat_archive.py (python main.py archive-chat).
+-- Messages older than a group's horizon move here so chat_messages stays
+-- small for the chat view and unread counts.
+
+CREATE TABLE IF NOT EXISTS public.chat_messages_archive (
+    id UUID PRIMARY KEY,
+    group_id UUID NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE,
+    message TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Newest-first history reads per group
+CREATE INDEX IF NOT EXISTS idx_chat_messages_archive_group_created
+    ON public.chat_messages_archive(group_id, created_at DESC, id DESC);
+
+-- Same access pattern on the hot table
+CREATE INDEX IF NOT EXISTS idx_chat_messages_group_created
+    ON chat_messages(group_id, created_at DESC, id DESC);
+
+-- Per-group horizon in days (NULL = the job's default)
+ALTER TABLE groups ADD COLUMN IF NOT EXISTS chat_archive_days INTEGER
+    CHECK (chat_archive_days IS NULL OR chat_archive_days > 0);
+
+-- Enable Row Level Security
+ALTER TABLE public.chat_messages_archive ENABLE ROW LEVEL SECURITY;
+
+-- Group members can read their group's archived history (writes use the service role)
+DROP POLICY IF EXISTS "Group members can read archived messages" ON public.chat_messages_archive;
+CREATE POLICY "Group members can read archived messages" ON public.chat_messages_archive
+  FOR SELECT USING (
+    group_id IN (SELECT group_id FROM group_members WHERE user_id = auth.uid())
+  );
@@ -0,0 +1,45 @@
+-- ================================================
+-- Precomputed unread chat counts
+-- ================================================
+-- One row per group member. Two writers, each owning its own columns:
+--   scripts/unread_counts.py (python main.py unread) adds every new message
+--     from someone else to received_count / received_through
+--   the app marks the chat read by copying received_count into read_count
+--     and stamping last_read_at
+-- The badge is then a primary-key read instead of a count over chat_messages:
+--   SELECT unread_count, received_through FROM chat_read_cursors
+--   WHERE group_id = $1 AND user_id = auth.uid();
+
+CREATE TABLE IF NOT EXISTS public.chat_read_cursors (
+    group_id UUID NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    -- Messages from others since the member joined (job-maintained)
+    received_count INTEGER NOT NULL DEFAULT 0,
+    -- created_at of the newest message the job has counted for this group
+    received_through TIMESTAMPTZ,
+    -- received_count as of the member's last read (app-maintained)
+    read_count INTEGER NOT NULL DEFAULT 0,
+    last_read_at TIMESTAMPTZ,
+    unread_count INTEGER GENERATED ALWAYS AS (GREATEST(received_count - read_count, 0)) STORED,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (group_id, user_id)
+);
+
+-- Enable Row Level Security
+ALTER TABLE public.chat_read_cursors ENABLE ROW LEVEL SECURITY;
+
+-- Members see and move only their own cursor (the job uses the service role)
+DROP POLICY IF EXISTS "Users can read own chat cursor" ON public.chat_read_cursors;
+CREATE POLICY "Users can read own chat cursor" ON public.chat_read_cursors
+  FOR SELECT USING (user_id = auth.uid());
+
+DROP POLICY IF EXISTS "Users can create own chat cursor" ON public.chat_read_cursors;
+CREATE POLICY "Users can create own chat cursor" ON public.chat_read_cursors
+  FOR INSERT WITH CHECK (
+    user_id = auth.uid()
+    AND group_id IN (SELECT group_id FROM group_members WHERE user_id = auth.uid())
+  );
+
+DROP POLICY IF EXISTS "Users can update own chat cursor" ON public.chat_read_cursors;
+CREATE POLICY "Users can update own chat cursor" ON public.chat_read_cursors
+  FOR UPDATE USING (user_id = auth.uid());
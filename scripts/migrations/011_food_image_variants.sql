@@ -0,0 +1,19 @@
+-- ================================================
+-- Resized food image variants
+-- ================================================
+-- Filled by scripts/food_images.py (python main.py food-images).
+-- image_url keeps the original upload; the job adds a downscaled copy for
+-- the vision model and a thumbnail for feeds, both re-encoded JPEG without EXIF.
+
+ALTER TABLE food_logs ADD COLUMN IF NOT EXISTS image_analysis_url TEXT;
+ALTER TABLE food_logs ADD COLUMN IF NOT EXISTS image_thumb_url TEXT;
+ALTER TABLE food_logs ADD COLUMN IF NOT EXISTS image_processed_at TIMESTAMPTZ;
+ALTER TABLE food_logs ADD COLUMN IF NOT EXISTS image_error TEXT;
+
+-- The job's work queue: logs with an image that has not been processed yet
+CREATE INDEX IF NOT EXISTS idx_food_logs_image_pending
+    ON food_logs(created_at, id)
+    WHERE image_processed_at IS NULL AND image_url IS NOT NULL;
+
+-- Feeds show the thumbnail when there is one
+ALTER TABLE public.buddyshare_feed ADD COLUMN IF NOT EXISTS food_thumb_url TEXT;
@@ -0,0 +1,29 @@
+-- ================================================
+-- Perceptual-hash cache of food recognition results
+-- ================================================
+-- Filled by scripts/food_image_cache.py (python main.py food-cache).
+-- /api/food/analyze looks up the photo's dHash here before calling Gemini:
+--   SELECT image_hash, detected_foods FROM food_image_hashes
+--   WHERE hash_bands && $1 LIMIT 200;
+-- and keeps the candidate with the smallest Hamming distance.
+
+CREATE TABLE IF NOT EXISTS public.food_image_hashes (
+    food_log_id UUID PRIMARY KEY REFERENCES food_logs(id) ON DELETE CASCADE,
+    image_hash CHAR(16) NOT NULL,          -- 64-bit dHash, hex
+    hash_bands INTEGER[] NOT NULL,         -- byte i of the hash as i*256 + byte
+    detected_foods JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,       -- of the food log
+    hashed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_food_image_hashes_bands
+    ON public.food_image_hashes USING GIN (hash_bands);
+
+-- Enable Row Level Security
+ALTER TABLE public.food_image_hashes ENABLE ROW LEVEL SECURITY;
+
+-- Signed-in users can look up recognition results (only food names and
+-- portions - no images or user ids). Writes use the service role.
+DROP POLICY IF EXISTS "Authenticated users can read food image hashes" ON public.food_image_hashes;
+CREATE POLICY "Authenticated users can read food image hashes" ON public.food_image_hashes
+  FOR SELECT USING (auth.role() = 'authenticated');
@@ -0,0 +1,18 @@
+-- ================================================
+-- Nutrient estimates for food logs
+-- ================================================
+-- Filled by scripts/food_nutrients.py (python main.py nutrients) from the
+-- bundled table in scripts/data/food_composition.csv. Shape of nutrients:
+--   {"version": 1,
+--    "items": [{"name", "matched", "score", "grams", "energy_kcal", "protein_g",
+--               "fat_g", "carbs_g", "fibre_g", "sodium_mg"}, ...],
+--    "total": {"energy_kcal", ...},
+--    "unmatched": ["food name", ...]}
+
+ALTER TABLE food_logs ADD COLUMN IF NOT EXISTS nutrients JSONB;
+ALTER TABLE food_logs ADD COLUMN IF NOT EXISTS nutrients_at TIMESTAMPTZ;
+
+-- The job's work queue: logs not enriched yet
+CREATE INDEX IF NOT EXISTS idx_food_logs_nutrients_pending
+    ON food_logs(created_at, id)
+    WHERE nutrients_at IS NULL;
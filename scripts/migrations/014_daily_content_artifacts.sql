@@ -0,0 +1,18 @@
+-- ================================================
+-- Pre-rendered lesson artifacts
+-- ================================================
+-- Filled by scripts/import_book_content.py (python main.py import).
+-- content keeps the markdown source; the reader shows content_html, which is
+-- sanitized at import time, and /api/lessons/<day> answers If-None-Match
+-- with 304 using the strong ETags. gzip / brotli copies of both variants
+-- are uploaded to the public 'lessons' storage bucket (day-NN/lesson.html.gz ...).
+
+ALTER TABLE daily_content ADD COLUMN IF NOT EXISTS content_html TEXT;
+ALTER TABLE daily_content ADD COLUMN IF NOT EXISTS content_text TEXT;
+ALTER TABLE daily_content ADD COLUMN IF NOT EXISTS content_etag TEXT;
+ALTER TABLE daily_content ADD COLUMN IF NOT EXISTS content_text_etag TEXT;
+
+-- Public bucket for the compressed artifacts (writes use the service role)
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('lessons', 'lessons', true)
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,35 @@
+-- ================================================
+-- Keyword / glossary index across lessons
+-- ================================================
+-- Filled by scripts/lesson_keywords.py at the end of every import
+-- (or python main.py keywords). sections are the 1-based positions of the
+-- top-level blocks of daily_content.content_html that mention the term.
+--   Where else is 膽固醇 taught?  SELECT day_number, frequency FROM lesson_terms WHERE term = '膽固醇';
+--   Concept tags for day 7:       SELECT term FROM lesson_terms WHERE day_number = 7 ORDER BY frequency DESC;
+
+CREATE TABLE IF NOT EXISTS public.lesson_terms (
+    term TEXT NOT NULL,
+    day_number INTEGER NOT NULL CHECK (day_number BETWEEN 1 AND 21),
+    frequency INTEGER NOT NULL,
+    sections SMALLINT[] NOT NULL,
+    PRIMARY KEY (term, day_number)
+);
+
+CREATE INDEX IF NOT EXISTS idx_lesson_terms_day ON public.lesson_terms(day_number, frequency DESC);
+
+-- Which text each day was indexed from (skips unchanged lessons)
+CREATE TABLE IF NOT EXISTS public.lesson_term_sources (
+    day_number INTEGER PRIMARY KEY CHECK (day_number BETWEEN 1 AND 21),
+    source_hash TEXT NOT NULL,
+    term_count INTEGER NOT NULL DEFAULT 0,
+    indexed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Enable Row Level Security
+ALTER TABLE public.lesson_terms ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.lesson_term_sources ENABLE ROW LEVEL SECURITY;
+
+-- Lesson metadata is readable like the lessons themselves (writes use the service role)
+DROP POLICY IF EXISTS "Anyone can read lesson terms" ON public.lesson_terms;
+CREATE POLICY "Anyone can read lesson terms" ON public.lesson_terms
+  FOR SELECT USING (true);
@@ -0,0 +1,94 @@
+-- ================================================
+-- Server-side quiz grading and score rollups
+-- ================================================
+-- The quiz page now also sends the selected answers ('A'..'D', one per
+-- question). scripts/quiz_grading.py (python main.py grade-quizzes) grades
+-- them against quizzes.questions and keeps two rollups current:
+--   quiz_user_scores   one row per user (progress page, leaderboards)
+--   quiz_group_scores  one row per group (group leaderboard)
+-- Responses saved before this migration have no answers; their client
+-- score is taken as the graded score.
+
+ALTER TABLE public.quiz_responses ADD COLUMN IF NOT EXISTS answers TEXT[];
+ALTER TABLE public.quiz_responses ADD COLUMN IF NOT EXISTS graded_score INTEGER;
+ALTER TABLE public.quiz_responses ADD COLUMN IF NOT EXISTS graded_total INTEGER;
+ALTER TABLE public.quiz_responses ADD COLUMN IF NOT EXISTS graded_at TIMESTAMPTZ;
+
+-- Retakes update answered_at, so the job streams on (answered_at, id)
+CREATE INDEX IF NOT EXISTS idx_quiz_responses_answered_id ON public.quiz_responses(answered_at, id);
+CREATE INDEX IF NOT EXISTS idx_quiz_responses_user ON public.quiz_responses(user_id);
+
+-- Same call as before plus the answers; a retake clears the old grade
+DROP FUNCTION IF EXISTS public.save_quiz_response(UUID, INTEGER, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION public.save_quiz_response(
+    p_user_id UUID,
+    p_day_number INTEGER,
+    p_score INTEGER,
+    p_total_questions INTEGER,
+    p_answers TEXT[] DEFAULT NULL
+)
+RETURNS void AS $$
+BEGIN
+    INSERT INTO public.quiz_responses (user_id, day_number, score, total_questions, answers, answered_at)
+    VALUES (p_user_id, p_day_number, p_score, p_total_questions, p_answers, now())
+    ON CONFLICT (user_id, day_number)
+    DO UPDATE SET
+        score = EXCLUDED.score,
+        total_questions = EXCLUDED.total_questions,
+        answers = EXCLUDED.answers,
+        answered_at = now(),
+        graded_score = NULL,
+        graded_total = NULL,
+        graded_at = NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+GRANT EXECUTE ON FUNCTION public.save_quiz_response(UUID, INTEGER, INTEGER, INTEGER, TEXT[]) TO authenticated;
+
+CREATE TABLE IF NOT EXISTS public.quiz_user_scores (
+    user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+    days_completed INTEGER NOT NULL DEFAULT 0,
+    total_correct INTEGER NOT NULL DEFAULT 0,
+    total_questions INTEGER NOT NULL DEFAULT 0,
+    accuracy NUMERIC(5, 4),
+    perfect_days INTEGER NOT NULL DEFAULT 0,
+    -- Score per day, index 0 = day 1 (NULL = not taken)
+    day_scores SMALLINT[] NOT NULL DEFAULT '{}',
+    last_day_number INTEGER,
+    last_answered_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.quiz_group_scores (
+    group_id UUID PRIMARY KEY REFERENCES groups(id) ON DELETE CASCADE,
+    member_count INTEGER NOT NULL DEFAULT 0,
+    participants INTEGER NOT NULL DEFAULT 0,
+    quizzes_completed INTEGER NOT NULL DEFAULT 0,
+    total_correct INTEGER NOT NULL DEFAULT 0,
+    total_questions INTEGER NOT NULL DEFAULT 0,
+    accuracy NUMERIC(5, 4),
+    perfect_days INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_quiz_user_scores_rank ON public.quiz_user_scores(total_correct DESC);
+
+-- Enable Row Level Security (writes use the service role)
+ALTER TABLE public.quiz_user_scores ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.quiz_group_scores ENABLE ROW LEVEL SECURITY;
+
+-- Users see their own scores and those of people in their groups
+DROP POLICY IF EXISTS "Group members can read member quiz scores" ON public.quiz_user_scores;
+CREATE POLICY "Group members can read member quiz scores" ON public.quiz_user_scores
+  FOR SELECT USING (
+    user_id = auth.uid()
+    OR user_id IN (
+      SELECT gm.user_id FROM group_members gm
+      WHERE gm.group_id IN (SELECT group_id FROM group_members WHERE user_id = auth.uid())
+    )
+  );
+
+-- Group totals are compared across groups
+DROP POLICY IF EXISTS "Authenticated users can read group quiz scores" ON public.quiz_group_scores;
+CREATE POLICY "Authenticated users can read group quiz scores" ON public.quiz_group_scores
+  FOR SELECT USING (auth.role() = 'authenticated');
@@ -0,0 +1,44 @@
+-- ================================================
+-- Simplified Chinese variants of lessons and quizzes
+-- ================================================
+-- Filled by scripts/chinese_convert.py (table-driven Traditional ->
+-- Simplified conversion) during the import and quiz generation, or for
+-- everything at once with python main.py variants.
+-- script is a BCP 47 script tag; the originals in daily_content / quizzes
+-- stay Traditional ('zh-Hant').
+--   Day 7 in Simplified:  SELECT title, content_html FROM daily_content_variants
+--                         WHERE day_number = 7 AND script = 'zh-Hans';
+
+CREATE TABLE IF NOT EXISTS public.daily_content_variants (
+    day_number INTEGER NOT NULL CHECK (day_number BETWEEN 1 AND 21),
+    script TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    content_html TEXT,
+    content_text TEXT,
+    content_etag TEXT,
+    content_text_etag TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (day_number, script)
+);
+
+CREATE TABLE IF NOT EXISTS public.quiz_variants (
+    day_number INTEGER NOT NULL CHECK (day_number BETWEEN 1 AND 21),
+    script TEXT NOT NULL,
+    questions JSONB NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (day_number, script)
+);
+
+-- Enable Row Level Security
+ALTER TABLE public.daily_content_variants ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.quiz_variants ENABLE ROW LEVEL SECURITY;
+
+-- Readable like the originals (writes use the service role)
+DROP POLICY IF EXISTS "Anyone can read lesson variants" ON public.daily_content_variants;
+CREATE POLICY "Anyone can read lesson variants" ON public.daily_content_variants
+  FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "Anyone can read quiz variants" ON public.quiz_variants;
+CREATE POLICY "Anyone can read quiz variants" ON public.quiz_variants
+  FOR SELECT USING (true);
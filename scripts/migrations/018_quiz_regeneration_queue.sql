@@ -0,0 +1,34 @@
+-- ================================================
+-- Quiz regeneration queue
+-- ================================================
+-- Filled by scripts/quiz_grounding.py (python main.py verify-quizzes) with
+-- questions whose keyed answer or explanation is not supported by the
+-- lesson text, or where a wrong option is. python main.py generate --queued
+-- regenerates the affected days and marks their rows 'regenerated'.
+-- question_hash identifies the version of the question that was flagged,
+-- so a re-run does not queue it twice and a regenerated question is checked
+-- afresh. Set status = 'dismissed' to accept a flagged question as it is.
+
+CREATE TABLE IF NOT EXISTS public.quiz_regeneration_queue (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    day_number INTEGER NOT NULL CHECK (day_number BETWEEN 1 AND 21),
+    question_index INTEGER NOT NULL,
+    question_hash TEXT NOT NULL,
+    question TEXT,
+    reasons TEXT[] NOT NULL,
+    key_score NUMERIC(5, 4),
+    best_option TEXT,
+    best_score NUMERIC(5, 4),
+    explanation_score NUMERIC(5, 4),
+    option_scores JSONB,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'regenerated', 'dismissed')),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    resolved_at TIMESTAMPTZ,
+    UNIQUE (day_number, question_index, question_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_quiz_regeneration_queue_pending
+    ON public.quiz_regeneration_queue(day_number) WHERE status = 'pending';
+
+-- Only the service role (batch jobs) reads or writes the queue
+ALTER TABLE public.quiz_regeneration_queue ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,34 @@
+-- ================================================
+-- Group announcements (daily digests)
+-- ================================================
+-- Shown on the 最新消息 (announcements) page. scripts/group_digests.py
+-- (python main.py digests) writes one 'daily_digest' per group per club day;
+-- re-running a day replaces its digests. stats keeps the numbers the body
+-- was rendered from.
+--   A group's latest news:  SELECT title, body FROM group_announcements
+--                           WHERE group_id = '...' ORDER BY created_at DESC LIMIT 7;
+
+CREATE TABLE IF NOT EXISTS public.group_announcements (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    group_id UUID NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL DEFAULT 'daily_digest',
+    digest_date DATE NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    stats JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    UNIQUE (group_id, kind, digest_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_group_announcements_group_created
+    ON public.group_announcements(group_id, created_at DESC);
+
+-- Enable Row Level Security (writes use the service role)
+ALTER TABLE public.group_announcements ENABLE ROW LEVEL SECURITY;
+
+-- Members read the announcements of their own groups
+DROP POLICY IF EXISTS "Group members can read announcements" ON public.group_announcements;
+CREATE POLICY "Group members can read announcements" ON public.group_announcements
+  FOR SELECT USING (
+    group_id IN (SELECT group_id FROM group_members WHERE user_id = auth.uid())
+  );
@@ -0,0 +1,26 @@
+-- ================================================
+-- Scheduled maintenance job runs
+-- ================================================
+-- One row per job per scheduled minute, written by scripts/scheduler.py
+-- (python main.py scheduler). The worker that inserts the row first runs
+-- the job, so several instances of the service never run a slot twice; the
+-- same row then records how the run went.
+--   Recent runs:      SELECT job, scheduled_for, status, duration_ms FROM scheduled_job_runs
+--                     ORDER BY scheduled_for DESC LIMIT 50;
+--   Slowest jobs:     SELECT job, avg(duration_ms), max(duration_ms) FROM scheduled_job_runs
+--                     WHERE status = 'succeeded' GROUP BY job;
+
+CREATE TABLE IF NOT EXISTS public.scheduled_job_runs (
+    job TEXT NOT NULL,
+    scheduled_for TIMESTAMPTZ NOT NULL,
+    holder TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'succeeded', 'failed')),
+    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at TIMESTAMPTZ,
+    duration_ms INTEGER,
+    error TEXT,
+    PRIMARY KEY (job, scheduled_for)
+);
+
+-- Only the service role (batch jobs) reads or writes job runs
+ALTER TABLE public.scheduled_job_runs ENABLE ROW LEVEL SECURITY;
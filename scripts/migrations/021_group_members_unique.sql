@@ -0,0 +1,16 @@
+-- ================================================
+-- One membership per group and user
+-- ================================================
+-- scripts/setup_database.sql declares PRIMARY KEY (group_id, user_id), but
+-- databases created from earlier schemas can lack it, and add_user_to_group.py
+-- used to guard against duplicates with a select-then-insert that two
+-- concurrent joins could both pass. With this index the database rejects
+-- the second row and add_user_to_group.py upserts with ignore_duplicates.
+--
+-- Remove existing duplicates first, or creating the index fails
+-- (repair-memberships needs 028_dedupe_group_members.sql):
+--   python main.py repair-memberships --dry-run   (review the report)
+--   python main.py repair-memberships
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_group_members_group_user
+    ON public.group_members(group_id, user_id);
@@ -0,0 +1,28 @@
+-- ================================================
+-- Indexes for per-user exports
+-- ================================================
+-- scripts/user_export.py (python main.py export-user) reads one user's rows
+-- of each table in (created_at, id) order, page by page. With these indexes
+-- every page is an index range scan over that user's rows only, instead of a
+-- filter over the whole table's created_at order.
+
+CREATE INDEX IF NOT EXISTS idx_text_shares_user_created
+    ON text_shares(user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_food_logs_user_created
+    ON food_logs(user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_chat_messages_user_created
+    ON chat_messages(user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_chat_messages_archive_user_created
+    ON public.chat_messages_archive(user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_quiz_responses_user_created
+    ON public.quiz_responses(user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_share_comments_user_created
+    ON share_comments(user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_share_reactions_user_created
+    ON share_reactions(user_id, created_at, id);
@@ -0,0 +1,90 @@
+-- ================================================
+-- Atomic incremental analytics writes
+-- ================================================
+-- scripts/analytics_refresh.py merges new activity into the persisted
+-- group_day_stats rows (old counts + delta). Writing those rows and
+-- advancing the watermarks in separate requests meant a crash in between
+-- added the same delta again on the next run. apply_group_day_stats does
+-- both in one transaction:
+--   p_rows        merged group_day_stats rows (absolute values)
+--   p_watermarks  {source_table: [created_at, id]} read up to in this run
+--   p_previous    the watermarks the run started from
+-- A call whose watermarks are already stored (a retry after a lost
+-- response) writes nothing; a call whose starting watermarks have moved
+-- (another run got there first) raises instead of double counting.
+
+CREATE OR REPLACE FUNCTION public.apply_group_day_stats(
+    p_job TEXT,
+    p_rows JSONB,
+    p_watermarks JSONB,
+    p_previous JSONB
+)
+RETURNS INTEGER AS $$
+DECLARE
+    written INTEGER;
+BEGIN
+    -- One writer per job at a time
+    PERFORM pg_advisory_xact_lock(hashtext('apply_group_day_stats:' || p_job));
+
+    IF p_watermarks <> '{}'::jsonb AND NOT EXISTS (
+        SELECT 1
+        FROM jsonb_each(p_watermarks) AS n(source_table, cursor)
+        LEFT JOIN public.analytics_watermarks w
+            ON w.job = p_job AND w.source_table = n.source_table
+        WHERE (w.last_created_at, w.last_id)
+              IS DISTINCT FROM ((n.cursor ->> 0)::timestamptz, (n.cursor ->> 1)::uuid)
+    ) THEN
+        RETURN 0;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1
+        FROM jsonb_each(p_watermarks) AS n(source_table, cursor)
+        LEFT JOIN public.analytics_watermarks w
+            ON w.job = p_job AND w.source_table = n.source_table
+        WHERE (w.last_created_at, w.last_id)
+              IS DISTINCT FROM ((p_previous -> n.source_table ->> 0)::timestamptz,
+                                (p_previous -> n.source_table ->> 1)::uuid)
+    ) THEN
+        RAISE EXCEPTION 'analytics watermarks of job % moved during the run', p_job;
+    END IF;
+
+    INSERT INTO public.group_day_stats
+    SELECT * FROM jsonb_populate_recordset(NULL::public.group_day_stats, p_rows)
+    ON CONFLICT (group_id, day_number) DO UPDATE SET
+        member_count = EXCLUDED.member_count,
+        active_members = EXCLUDED.active_members,
+        quiz_completions = EXCLUDED.quiz_completions,
+        quiz_score = EXCLUDED.quiz_score,
+        quiz_questions = EXCLUDED.quiz_questions,
+        quiz_accuracy = EXCLUDED.quiz_accuracy,
+        share_count = EXCLUDED.share_count,
+        sharers = EXCLUDED.sharers,
+        food_log_count = EXCLUDED.food_log_count,
+        food_loggers = EXCLUDED.food_loggers,
+        chat_messages = EXCLUDED.chat_messages,
+        completion_rate = EXCLUDED.completion_rate,
+        quiz_completion_rate = EXCLUDED.quiz_completion_rate,
+        share_rate = EXCLUDED.share_rate,
+        food_log_rate = EXCLUDED.food_log_rate,
+        active_rate = EXCLUDED.active_rate,
+        quizzer_ids = EXCLUDED.quizzer_ids,
+        sharer_ids = EXCLUDED.sharer_ids,
+        food_logger_ids = EXCLUDED.food_logger_ids,
+        computed_at = EXCLUDED.computed_at;
+    GET DIAGNOSTICS written = ROW_COUNT;
+
+    INSERT INTO public.analytics_watermarks (job, source_table, last_created_at, last_id, updated_at)
+    SELECT p_job, n.source_table, (n.cursor ->> 0)::timestamptz, (n.cursor ->> 1)::uuid, now()
+    FROM jsonb_each(p_watermarks) AS n(source_table, cursor)
+    ON CONFLICT (job, source_table) DO UPDATE SET
+        last_created_at = EXCLUDED.last_created_at,
+        last_id = EXCLUDED.last_id,
+        updated_at = EXCLUDED.updated_at;
+
+    RETURN written;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only the service role (batch jobs) calls it
+REVOKE EXECUTE ON FUNCTION public.apply_group_day_stats(TEXT, JSONB, JSONB, JSONB) FROM PUBLIC, anon, authenticated;
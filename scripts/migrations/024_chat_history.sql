@@ -0,0 +1,50 @@
+-- ================================================
+-- Chat history across the hot and archive tables
+-- ================================================
+-- scripts/chat_archive.py moves messages older than a group's horizon into
+-- chat_messages_archive. The chat view reads its pages through this
+-- function instead of chat_messages alone, so archived messages are still
+-- there when a member scrolls up ("load older").
+--   Newest page:  SELECT * FROM chat_history('<group_id>');
+--   Older page:   SELECT * FROM chat_history('<group_id>', '<created_at>', '<id>');
+--                 (created_at, id of the oldest message already shown)
+-- SECURITY INVOKER: the RLS policies of both tables still decide what the
+-- caller may read, so non-members get an empty page.
+
+CREATE OR REPLACE FUNCTION public.chat_history(
+    p_group_id UUID,
+    p_before_created_at TIMESTAMPTZ DEFAULT NULL,
+    p_before_id UUID DEFAULT NULL,
+    p_limit INTEGER DEFAULT 50
+)
+RETURNS TABLE (id UUID, group_id UUID, user_id UUID, message TEXT, created_at TIMESTAMPTZ)
+LANGUAGE sql STABLE SECURITY INVOKER
+AS $$
+    WITH hot AS (
+        -- chat_messages.created_at is a plain TIMESTAMP (UTC); compare in its
+        -- own type so the (group_id, created_at, id) index is used
+        SELECT m.id, m.group_id, m.user_id, m.message, m.created_at AT TIME ZONE 'UTC' AS created_at
+        FROM public.chat_messages m
+        WHERE m.group_id = p_group_id
+          AND (p_before_created_at IS NULL
+               OR (m.created_at, m.id) < (p_before_created_at AT TIME ZONE 'UTC', p_before_id))
+        ORDER BY m.created_at DESC, m.id DESC
+        LIMIT LEAST(GREATEST(p_limit, 1), 200)
+    ),
+    cold AS (
+        SELECT a.id, a.group_id, a.user_id, a.message, a.created_at
+        FROM public.chat_messages_archive a
+        WHERE a.group_id = p_group_id
+          AND (p_before_created_at IS NULL
+               OR (a.created_at, a.id) < (p_before_created_at, p_before_id))
+        ORDER BY a.created_at DESC, a.id DESC
+        LIMIT LEAST(GREATEST(p_limit, 1), 200)
+    )
+    -- A message copied but not yet deleted by the archiver is in both tables
+    SELECT DISTINCT ON (u.created_at, u.id) u.id, u.group_id, u.user_id, u.message, u.created_at
+    FROM (SELECT * FROM hot UNION ALL SELECT * FROM cold) u
+    ORDER BY u.created_at DESC, u.id DESC
+    LIMIT LEAST(GREATEST(p_limit, 1), 200);
+$$;
+
+GRANT EXECUTE ON FUNCTION public.chat_history(UUID, TIMESTAMPTZ, UUID, INTEGER) TO authenticated;
@@ -0,0 +1,45 @@
+-- ================================================
+-- Ranked perceptual-hash lookup
+-- ================================================
+-- Replaces the "hash_bands && $1 LIMIT 200" lookup of migration 012, whose
+-- 200 unordered candidates could miss the exact or nearest photo when a
+-- band value is common (dark or flat photos). match_food_image() checks
+-- the exact hash first, then computes the Hamming distance of every band
+-- candidate in SQL and returns the closest one within p_max_distance.
+--   SELECT * FROM match_food_image('8f0e1c3c3c1e0f07', 6);
+-- SECURITY INVOKER: the read policy of food_image_hashes still applies.
+
+CREATE INDEX IF NOT EXISTS idx_food_image_hashes_hash
+    ON public.food_image_hashes(image_hash);
+
+CREATE OR REPLACE FUNCTION public.match_food_image(p_hash TEXT, p_max_distance INTEGER DEFAULT 6)
+RETURNS TABLE (food_log_id UUID, image_hash TEXT, detected_foods JSONB, distance INTEGER)
+LANGUAGE plpgsql STABLE SECURITY INVOKER
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT h.food_log_id, h.image_hash::TEXT, h.detected_foods, 0
+    FROM public.food_image_hashes h
+    WHERE h.image_hash = p_hash::CHAR(16)
+    LIMIT 1;
+    IF FOUND THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT c.food_log_id, c.hash, c.detected_foods, c.bits
+    FROM (
+        SELECT h.food_log_id, h.image_hash::TEXT AS hash, h.detected_foods,
+               bit_count(('x' || h.image_hash)::BIT(64) # ('x' || p_hash)::BIT(64))::INTEGER AS bits
+        FROM public.food_image_hashes h
+        WHERE h.hash_bands && ARRAY(
+            SELECT i * 256 + get_byte(decode(p_hash, 'hex'), i) FROM generate_series(0, 7) AS i
+        )
+    ) c
+    WHERE c.bits <= p_max_distance
+    ORDER BY c.bits, c.food_log_id
+    LIMIT 1;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.match_food_image(TEXT, INTEGER) TO authenticated;
@@ -0,0 +1,29 @@
+-- ================================================
+-- Set-based nutrient write-back
+-- ================================================
+-- scripts/food_nutrients.py (python main.py nutrients) used to upsert
+-- {id, nutrients, nutrients_at} rows into food_logs. That is an INSERT ...
+-- ON CONFLICT, so a food log deleted during the run came back as a row with
+-- no user_id, group_id or image_url. This function only ever UPDATEs
+-- existing rows: one statement per batch, ids that no longer exist are
+-- skipped.
+--   SELECT apply_food_log_nutrients('[{"id": "...", "nutrients": {...},
+--                                      "nutrients_at": "..."}]');
+
+CREATE OR REPLACE FUNCTION public.apply_food_log_nutrients(p_rows JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE public.food_logs f
+    SET nutrients = r.nutrients,
+        nutrients_at = r.nutrients_at
+    FROM jsonb_to_recordset(p_rows) AS r(id UUID, nutrients JSONB, nutrients_at TIMESTAMPTZ)
+    WHERE f.id = r.id;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only the service role (batch jobs) calls it
+REVOKE EXECUTE ON FUNCTION public.apply_food_log_nutrients(JSONB) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,32 @@
+-- ================================================
+-- Set-based, retake-safe quiz grade write-back
+-- ================================================
+-- scripts/quiz_grading.py (python main.py grade-quizzes) used to upsert
+-- whole quiz_responses rows read earlier in the run. A retake saved in
+-- between had its new score overwritten with the old one, and a deleted
+-- response came back. apply_quiz_grades only UPDATEs the graded_* columns,
+-- and only while answered_at still matches the graded version - a newer
+-- retake is left for the next run.
+--   SELECT apply_quiz_grades('[{"id": "...", "answered_at": "...",
+--       "graded_score": 4, "graded_total": 5, "graded_at": "..."}]');
+
+CREATE OR REPLACE FUNCTION public.apply_quiz_grades(p_rows JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE public.quiz_responses q
+    SET graded_score = r.graded_score,
+        graded_total = r.graded_total,
+        graded_at = r.graded_at
+    FROM jsonb_to_recordset(p_rows)
+        AS r(id UUID, answered_at TIMESTAMPTZ, graded_score INTEGER, graded_total INTEGER, graded_at TIMESTAMPTZ)
+    WHERE q.id = r.id
+      AND q.answered_at = r.answered_at;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only the service role (batch jobs) calls it
+REVOKE EXECUTE ON FUNCTION public.apply_quiz_grades(JSONB) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,36 @@
+-- ================================================
+-- Transactional removal of duplicate memberships
+-- ================================================
+-- Used by scripts/membership_repair.py (python main.py repair-memberships).
+-- Deletes every copy of a (group_id, user_id) membership except the earliest
+-- (by joined_at, then physical row) in one statement, so a failure can never
+-- leave a user with no membership at all. Pass group ids to limit it to
+-- those groups, or NULL for every group. Returns the number of rows removed.
+--   SELECT dedupe_group_members(ARRAY['<group_id>']::uuid[]);
+-- Run this before 021_group_members_unique.sql: repair-memberships needs it
+-- to clear the duplicates that would make the unique index fail.
+
+CREATE OR REPLACE FUNCTION public.dedupe_group_members(p_group_ids UUID[] DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    removed INTEGER;
+BEGIN
+    DELETE FROM public.group_members g
+    WHERE g.ctid IN (
+        SELECT d.ctid
+        FROM (
+            SELECT m.ctid,
+                   row_number() OVER (PARTITION BY m.group_id, m.user_id
+                                      ORDER BY m.joined_at NULLS FIRST, m.ctid) AS copy
+            FROM public.group_members m
+            WHERE p_group_ids IS NULL OR m.group_id = ANY(p_group_ids)
+        ) d
+        WHERE d.copy > 1
+    );
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    RETURN removed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only the service role (batch jobs) calls it
+REVOKE EXECUTE ON FUNCTION public.dedupe_group_members(UUID[]) FROM PUBLIC, anon, authenticated;
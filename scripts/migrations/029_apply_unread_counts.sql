@@ -0,0 +1,86 @@
+-- ================================================
+-- Atomic, self-seeding unread count updates
+-- ================================================
+-- scripts/unread_counts.py (python main.py unread) used to upsert
+-- received_count = old + new and then save its chat_messages watermark in
+-- a separate request; a crash in between counted the same messages twice.
+-- apply_unread_counts does both in one transaction (same guard as
+-- apply_group_day_stats, migration 023):
+--   p_rows       [{group_id, user_id, joined_at, received, received_through}]
+--                messages from others counted in this run, per member
+--   p_watermark  [created_at, id] of the last chat_messages row read
+--   p_previous   the watermark the run started from (NULL on the first run)
+-- A member the job has never counted (no cursor, or a cursor the app
+-- created with received_through NULL) is seeded with their history up to
+-- p_previous - messages from others since they joined, hot and archived -
+-- so received_count counts the same messages the app marked as read.
+
+CREATE OR REPLACE FUNCTION public.apply_unread_counts(
+    p_job TEXT,
+    p_rows JSONB,
+    p_watermark JSONB,
+    p_previous JSONB
+)
+RETURNS INTEGER AS $$
+DECLARE
+    stored RECORD;
+    prev_at TIMESTAMPTZ := (p_previous ->> 0)::timestamptz;
+    prev_id UUID := (p_previous ->> 1)::uuid;
+    written INTEGER;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('apply_unread_counts:' || p_job));
+
+    SELECT last_created_at, last_id INTO stored
+    FROM public.analytics_watermarks
+    WHERE job = p_job AND source_table = 'chat_messages';
+
+    -- A retry of a call that already committed
+    IF (stored.last_created_at, stored.last_id)
+       IS NOT DISTINCT FROM ((p_watermark ->> 0)::timestamptz, (p_watermark ->> 1)::uuid) THEN
+        RETURN 0;
+    END IF;
+    IF (stored.last_created_at, stored.last_id) IS DISTINCT FROM (prev_at, prev_id) THEN
+        RAISE EXCEPTION 'unread watermark of job % moved during the run', p_job;
+    END IF;
+
+    INSERT INTO public.chat_read_cursors (group_id, user_id, received_count, received_through, updated_at)
+    SELECT r.group_id, r.user_id,
+           r.received + CASE
+               WHEN c.received_through IS NULL AND prev_at IS NOT NULL THEN
+                   -- chat_messages.created_at is a plain TIMESTAMP (UTC)
+                   (SELECT count(*) FROM public.chat_messages m
+                    WHERE m.group_id = r.group_id
+                      AND m.user_id IS DISTINCT FROM r.user_id
+                      AND m.created_at >= r.joined_at AT TIME ZONE 'UTC'
+                      AND (m.created_at, m.id) <= (prev_at AT TIME ZONE 'UTC', prev_id))
+                 + (SELECT count(*) FROM public.chat_messages_archive a
+                    WHERE a.group_id = r.group_id
+                      AND a.user_id IS DISTINCT FROM r.user_id
+                      AND a.created_at >= r.joined_at
+                      AND a.created_at <= prev_at
+                      AND NOT EXISTS (SELECT 1 FROM public.chat_messages h WHERE h.id = a.id))
+               ELSE 0
+           END,
+           r.received_through, now()
+    FROM jsonb_to_recordset(p_rows)
+        AS r(group_id UUID, user_id UUID, joined_at TIMESTAMPTZ, received INTEGER, received_through TIMESTAMPTZ)
+    LEFT JOIN public.chat_read_cursors c ON c.group_id = r.group_id AND c.user_id = r.user_id
+    ON CONFLICT (group_id, user_id) DO UPDATE SET
+        received_count = chat_read_cursors.received_count + EXCLUDED.received_count,
+        received_through = EXCLUDED.received_through,
+        updated_at = EXCLUDED.updated_at;
+    GET DIAGNOSTICS written = ROW_COUNT;
+
+    INSERT INTO public.analytics_watermarks (job, source_table, last_created_at, last_id, updated_at)
+    VALUES (p_job, 'chat_messages', (p_watermark ->> 0)::timestamptz, (p_watermark ->> 1)::uuid, now())
+    ON CONFLICT (job, source_table) DO UPDATE SET
+        last_created_at = EXCLUDED.last_created_at,
+        last_id = EXCLUDED.last_id,
+        updated_at = EXCLUDED.updated_at;
+
+    RETURN written;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only the service role (batch jobs) calls it
+REVOKE EXECUTE ON FUNCTION public.apply_unread_counts(TEXT, JSONB, JSONB, JSONB) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,13 @@
+-- ================================================
+-- Keyset index for edited shares
+-- ================================================
+-- scripts/buddyshare_feed.py (python main.py feed) also streams text shares
+-- and food logs edited since its last run, ordered by (updated_at, id), so
+-- an edited share reaches buddyshare_feed without a full rebuild.
+-- app/api/shares/route.ts sets updated_at when a share is edited.
+
+ALTER TABLE text_shares ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+ALTER TABLE food_logs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_text_shares_updated_id ON text_shares(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_food_logs_updated_id ON food_logs(updated_at, id);
@@ -0,0 +1,221 @@
+"""
+Offline Nutrient Lookup
+=======================
+Nutrient estimates for the food names the vision model returns, from the
+bundled table scripts/data/food_composition.csv - no API calls.
+
+The CSV is compiled once per process into a compact in-memory index:
+- one array('f') holding every food's nutrients per 100 g, row-major
+- a dict from every normalized name / alias to its row
+- an inverted index from character bigrams (and single characters, for
+  one-character names like 飯) to the aliases containing them
+
+match() then only scores the handful of aliases sharing a bigram with the
+query instead of the whole table:
+1. Exact name or alias                      -> 1.0
+2. Alias contained in the query (烤雞胸肉 ⊃ 雞胸肉) or the query contained
+   in an alias - scored by how much of the longer string it covers
+3. Otherwise the Dice coefficient of the two bigram sets
+
+Usage:
+    db = load_nutrient_db()
+    db.estimate('烤雞胸肉', '1塊 (約150g)')
+    -> {'name': '烤雞胸肉', 'matched': '雞胸肉', 'grams': 150.0, 'energy_kcal': 247.5, ...}
+"""
+
+import csv
+import re
+import unicodedata
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+# ====== CONFIGURATION ======
+DATA_FILE = Path(__file__).resolve().parent / "data" / "food_composition.csv"
+
+NUTRIENTS = ("energy_kcal", "protein_g", "fat_g", "carbs_g", "fibre_g", "sodium_mg")
+
+# Lowest match score accepted as "the same food"
+MIN_SCORE = 0.5
+
+# "200g", "約 150 克", "250ml" ... (ml counted as grams)
+GRAMS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:g|克|公克|ml|毫升)", re.IGNORECASE)
+# Servings: "2片", "1.5碗", "1/2碗", "1 1/2杯", "三分之一碗", "十二粒", "兩個半", "半碗"
+CHINESE_NUMBER = r"[零一二兩三四五六七八九十百]+"
+COUNT_PATTERN = re.compile(
+    r"(?:(?P<whole>\d+)(?:\s+|又))?(?P<num>\d+)\s*[/⁄]\s*(?P<den>\d+)"
+    rf"|(?P<cn_den>{CHINESE_NUMBER})分之(?P<cn_num>{CHINESE_NUMBER})"
+    rf"|(?P<count>\d+(?:\.\d+)?|{CHINESE_NUMBER})(?P<and_half>\s*[^\W\d_]?半)?"
+    r"|(?P<half>半)"
+)
+CHINESE_DIGITS = {"零": 0, "一": 1, "二": 2, "兩": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+CHINESE_UNITS = {"十": 10, "百": 100}
+
+# Portion -> servings, printed as checks by `python nutrient_db.py`
+PORTION_CHECKS = {
+    "2片": 2, "1.5碗": 1.5, "半碗": 0.5, "一碗": 1, "兩個": 2,
+    "1/2碗": 0.5, "½碗": 0.5, "3/4 杯": 0.75, "1 1/2杯": 1.5, "1又1/2碗": 1.5, "三分之一碗": 1 / 3,
+    "十隻": 10, "十二粒": 12, "二十五粒": 25, "兩個半": 2.5, "一碗半": 1.5, "2個半": 2.5,
+}
+
+
+def normalize(name: str) -> str:
+    """Full-width to half-width, lower case, drop spaces, punctuation and bracketed notes"""
+    text = unicodedata.normalize("NFKC", name or "").lower()
+    text = re.sub(r"[(\[（【].*?[)\]）】]", "", text)
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def chinese_number(text: str) -> int:
+    """十 -> 10, 十二 -> 12, 二十五 -> 25, 兩 -> 2"""
+    total = current = 0
+    for ch in text:
+        if ch in CHINESE_UNITS:
+            total += (current or 1) * CHINESE_UNITS[ch]
+            current = 0
+        else:
+            current = CHINESE_DIGITS[ch]
+    return total + current
+
+
+def parse_servings(text: str):
+    """Number of servings written in a portion, or None when there is none"""
+    found = COUNT_PATTERN.search(text)
+    if found is None:
+        return None
+    if found["num"]:
+        if int(found["den"]) == 0:
+            return None
+        return int(found["whole"] or 0) + int(found["num"]) / int(found["den"])
+    if found["cn_den"]:
+        denominator = chinese_number(found["cn_den"])
+        return chinese_number(found["cn_num"]) / denominator if denominator else None
+    if found["count"]:
+        value = found["count"]
+        servings = float(value) if value[0].isdigit() else chinese_number(value)
+        return servings + (0.5 if found["and_half"] else 0)
+    return 0.5
+
+
+def _grams(text: str) -> set:
+    """Character bigrams, or the single character of a one-character name"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class NutrientDB:
+    def __init__(self, rows):
+        self.names = []
+        self.servings = array("f")
+        self.values = array("f")          # len(names) * len(NUTRIENTS)
+        self.keys = []                    # normalized alias -> via key_rows
+        self.key_rows = array("H")
+        self.exact = {}
+        self.index = defaultdict(list)    # bigram / character -> key positions
+
+        for row in rows:
+            position = len(self.names)
+            self.names.append(row["name"])
+            self.servings.append(float(row["serving_g"]))
+            self.values.extend(float(row[n] or 0) for n in NUTRIENTS)
+            aliases = [row["name"]] + [a for a in (row.get("aliases") or "").split("|") if a]
+            for alias in aliases:
+                key = normalize(alias)
+                if not key or key in self.exact:
+                    continue
+                self.exact[key] = position
+                self.index_key(key, position)
+
+    def index_key(self, key: str, position: int):
+        key_id = len(self.keys)
+        self.keys.append(key)
+        self.key_rows.append(position)
+        for gram in _grams(key):
+            self.index[gram].append(key_id)
+
+    def __len__(self):
+        return len(self.names)
+
+    def nutrients(self, position: int) -> dict:
+        """Nutrients per 100 g of one food"""
+        start = position * len(NUTRIENTS)
+        return dict(zip(NUTRIENTS, self.values[start:start + len(NUTRIENTS)]))
+
+    def match(self, name: str):
+        """(row position, matched name, score) of the best match, or None"""
+        query = normalize(name)
+        if not query:
+            return None
+        if query in self.exact:
+            position = self.exact[query]
+            return position, self.names[position], 1.0
+
+        query_grams = _grams(query)
+        candidates = set()
+        for gram in query_grams | set(query):
+            candidates.update(self.index.get(gram, ()))
+
+        best = None
+        for key_id in candidates:
+            key = self.keys[key_id]
+            if key in query:
+                score = 0.6 + 0.4 * len(key) / len(query)
+            elif query in key:
+                score = 0.5 + 0.4 * len(query) / len(key)
+            else:
+                key_grams = _grams(key)
+                score = 2 * len(query_grams & key_grams) / (len(query_grams) + len(key_grams))
+            # Prefer the higher score, then the longer (more specific) alias
+            if best is None or (score, len(key)) > (best[2], len(self.keys[best[3]])):
+                best = (self.key_rows[key_id], self.names[self.key_rows[key_id]], score, key_id)
+
+        if best is None or best[2] < MIN_SCORE:
+            return None
+        return best[:3]
+
+    def portion_grams(self, portion: str, position: int) -> float:
+        """Grams in a portion like '1碗 (約200g)', '2片', '1/2碗' or '兩個半'"""
+        text = unicodedata.normalize("NFKC", portion or "")
+        grams = GRAMS_PATTERN.search(text)
+        if grams:
+            return float(grams.group(1))
+        servings = parse_servings(text)
+        if servings is not None:
+            return servings * self.servings[position]
+        return float(self.servings[position])
+
+    def estimate(self, name: str, portion: str = None):
+        """Nutrient estimate for one detected food, or None when nothing matches"""
+        found = self.match(name)
+        if found is None:
+            return None
+        position, matched, score = found
+        grams = self.portion_grams(portion, position)
+        estimate = {"name": name, "matched": matched, "score": round(score, 2), "grams": grams}
+        for nutrient, per_100g in self.nutrients(position).items():
+            estimate[nutrient] = round(per_100g * grams / 100, 1)
+        return estimate
+
+
+@lru_cache(maxsize=1)
+def load_nutrient_db(path: Path = DATA_FILE) -> NutrientDB:
+    with open(path, encoding="utf-8") as f:
+        lines = (line for line in f if not line.startswith("#"))
+        return NutrientDB(list(csv.DictReader(lines)))
+
+
+if __name__ == "__main__":
+    import sys
+
+    db = load_nutrient_db()
+    print(f"📚 {len(db)} foods, {len(db.keys)} names indexed\n")
+    for query in sys.argv[1:] or ["烤雞胸肉", "白飯", "番茄炒蛋", "蒸石斑", "西蘭花炒牛肉"]:
+        print(f"   {query}: {db.estimate(query)}")
+
+    print("\n🥣 Portions")
+    for portion, expected in PORTION_CHECKS.items():
+        servings = parse_servings(unicodedata.normalize("NFKC", portion))
+        ok = servings is not None and abs(servings - expected) < 1e-9
+        print(f"   {'✓' if ok else '✗'} {portion}: {servings} servings (expected {expected:g})")
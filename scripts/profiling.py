@@ -0,0 +1,241 @@
+"""
+Run Profiling
+=============
+Wraps one CLI run in cProfile and tracemalloc and writes a report that says
+where the time and memory went, before anyone starts optimizing.
+
+What it does:
+1. cProfile on the main thread -> hotspots by own time and by cumulative
+   time, plus own time summed per category (JSON, HTTP, file I/O, Supabase
+   SDK, model APIs, images, waiting ...)
+2. tracemalloc -> peak traced memory and the allocation sites alive near
+   the peak (a snapshot is taken each time usage grows past the last one)
+3. Optionally a sampler over every thread's stack -> a collapsed-stack file
+   ("thread;outer;inner count" per line) for flamegraph.pl / speedscope
+
+Output goes to profiles/<command>-<time>.txt (+ .prof for pstats/snakeviz,
++ .collapsed). Nothing here is imported unless --profile is given, so
+normal runs pay nothing. Worker processes (food-images, food-cache) are
+not followed - profile those with --workers 1.
+
+Usage: python main.py --profile [--profile-stacks] <command> ...
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from env_config import PROJECT_ROOT
+
+# ====== CONFIGURATION ======
+PROFILE_DIR = PROJECT_ROOT / "profiles"
+
+# Rows in each hotspot table
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+
+# Frames kept per allocation (more = slower, attributes allocations to callers)
+TRACEMALLOC_FRAMES = 1
+
+# Seconds between memory checks / stack samples
+MEMORY_POLL_INTERVAL = 0.2
+STACK_SAMPLE_INTERVAL = 0.005
+
+# A new memory snapshot is taken when usage exceeds the last one by this factor
+SNAPSHOT_GROWTH = 1.1
+
+# (category, substrings of the file path or built-in function name), first match wins
+CATEGORIES = [
+    ("JSON", ("/json/", "_json", "orjson", "ujson")),
+    ("HTTP / network", ("/httpx/", "/httpcore/", "/h11/", "/h2/", "/ssl.py", "_ssl", "_socket", "socket.py",
+                        "/urllib3/", "/requests/", "select.", "selectors.py")),
+    ("Supabase SDK", ("/supabase/", "/postgrest/", "/gotrue/", "/supabase_auth/", "/storage3/", "/realtime/")),
+    ("Model APIs", ("/google/", "/grpc/", "/openai/")),
+    ("Images", ("/PIL/", "pillow_heif")),
+    ("Arrow", ("/pyarrow/",)),
+    ("Compression", ("gzip", "zlib", "brotli")),
+    ("File I/O", ("_io.", "posix.", "/pathlib.py", "/codecs.py", "/csv.py", "_csv", "/shutil.py")),
+    ("Waiting (sleep / locks)", ("time.sleep", "acquire", "/threading.py", "/queue.py", "concurrent/futures")),
+    ("Validation (pydantic)", ("/pydantic", "pydantic_core")),
+    ("Project scripts", (os.sep + "scripts" + os.sep, os.sep + "main.py")),
+]
+
+
+def categorize(filename: str, function: str) -> str:
+    text = f"{filename} {function}".replace("\\", "/")
+    for category, needles in CATEGORIES:
+        if any(needle.replace("\\", "/") in text for needle in needles):
+            return category
+    return "Other"
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+
+# ====== SAMPLERS ======
+
+class MemoryWatcher(threading.Thread):
+    """Keeps the tracemalloc snapshot closest to the peak"""
+
+    def __init__(self):
+        super().__init__(name="profile-memory", daemon=True)
+        self.stop_event = threading.Event()
+        self.snapshot = None
+        self.snapshot_size = 0
+
+    def take(self):
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self.snapshot_size * SNAPSHOT_GROWTH:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+
+    def run(self):
+        while not self.stop_event.wait(MEMORY_POLL_INTERVAL):
+            self.take()
+
+
+class StackSampler(threading.Thread):
+    """Counts the collapsed stacks of every other thread at a fixed interval"""
+
+    def __init__(self):
+        super().__init__(name="profile-stacks", daemon=True)
+        self.stop_event = threading.Event()
+        self.stacks = Counter()
+        self.samples = 0
+
+    def run(self):
+        own = {threading.get_ident()}
+        while not self.stop_event.wait(STACK_SAMPLE_INTERVAL):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident in own or names.get(ident, "").startswith("profile-"):
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                parts.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# ====== REPORT ======
+
+def hotspot_report(stats: pstats.Stats, wall_seconds: float) -> str:
+    out = io.StringIO()
+
+    per_category = defaultdict(float)
+    calls = defaultdict(int)
+    for (filename, _, function), (_, total_calls, own_time, _, _) in stats.stats.items():
+        category = categorize(filename, function)
+        per_category[category] += own_time
+        calls[category] += total_calls
+    profiled = sum(per_category.values()) or 1
+
+    out.write(f"Wall time: {wall_seconds:.2f}s   Profiled CPU + wait on main thread: {profiled:.2f}s\n\n")
+    out.write("Own time by category\n")
+    out.write(f"  {'category':<26} {'seconds':>9} {'share':>7} {'calls':>11}\n")
+    for category, seconds in sorted(per_category.items(), key=lambda item: -item[1]):
+        out.write(f"  {category:<26} {seconds:>9.3f} {seconds / profiled:>6.1%} {calls[category]:>11}\n")
+
+    for title, key in (("own time", "tottime"), ("cumulative time", "cumulative")):
+        out.write(f"\nTop {TOP_FUNCTIONS} functions by {title}\n")
+        buffer = io.StringIO()
+        stats.stream = buffer
+        stats.sort_stats(key).print_stats(TOP_FUNCTIONS)
+        # Drop pstats' preamble (ordering / listing lines) but keep the table
+        lines = buffer.getvalue().splitlines()
+        start = next((i for i, line in enumerate(lines) if line.lstrip().startswith("ncalls")), 0)
+        out.write("\n".join(lines[start:]).rstrip() + "\n")
+    return out.getvalue()
+
+
+def memory_report(peak: int, snapshot, final_snapshot) -> str:
+    out = io.StringIO()
+    out.write(f"\nPeak traced memory: {_format_bytes(peak)}\n")
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+    for title, snap in (("near the peak", snapshot), ("at the end", final_snapshot)):
+        if snap is None:
+            continue
+        snap = snap.filter_traces(ignore)
+        total = sum(stat.size for stat in snap.statistics("filename"))
+        out.write(f"\nLargest allocation sites {title} ({_format_bytes(total)} traced)\n")
+        for stat in snap.statistics("lineno")[:TOP_ALLOCATIONS]:
+            frame = stat.traceback[0]
+            out.write(f"  {_format_bytes(stat.size):>11} {stat.count:>9} blocks  {frame.filename}:{frame.lineno}\n")
+
+        by_category = defaultdict(int)
+        for stat in snap.statistics("filename"):
+            by_category[categorize(stat.traceback[0].filename, "")] += stat.size
+        out.write("  By category: " + ", ".join(
+            f"{category} {_format_bytes(size)}" for category, size in sorted(by_category.items(), key=lambda i: -i[1])
+        ) + "\n")
+    return out.getvalue()
+
+
+# ====== MAIN SCRIPT ======
+
+@contextmanager
+def profiled(name: str, output_dir=None, stacks: bool = False):
+    """Profile the enclosed block and write profiles/<name>-<time>.*"""
+    output_dir = output_dir or PROFILE_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(str(output_dir), f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    watcher = MemoryWatcher()
+    watcher.start()
+    sampler = StackSampler() if stacks else None
+    if sampler:
+        sampler.start()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - started
+        watcher.stop_event.set()
+        if sampler:
+            sampler.stop_event.set()
+            sampler.join()
+        watcher.join()
+        watcher.take()
+        _, peak = tracemalloc.get_traced_memory()
+        final_snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        profiler.dump_stats(base + ".prof")
+        stats = pstats.Stats(profiler)
+        report = hotspot_report(stats, wall) + memory_report(peak, watcher.snapshot, final_snapshot)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(f"Profile of '{name}' ({' '.join(sys.argv)})\n\n{report}")
+        if sampler:
+            sampler.write(base + ".collapsed")
+
+        print("\n" + "=" * 50)
+        print(f"📊 Profile: {wall:.2f}s wall, peak memory {_format_bytes(peak)}")
+        print("\n".join("   " + line for line in report.split("\n\n", 2)[1].splitlines()[:8]))
+        print(f"\n   Report:  {base}.txt")
+        print(f"   pstats:  {base}.prof")
+        if sampler:
+            print(f"   Stacks:  {base}.collapsed ({sampler.samples} samples, flamegraph.pl / speedscope)")
@@ -0,0 +1,48 @@
+"""
+Program Day Helpers
+===================
+Maps timestamps to program days the same way the frontend does.
+
+The app treats the first day of the calendar month as Day 1 and caps at
+Day 21 (see lib/hooks/useCurrentDay.ts), and shows dates in Hong Kong time.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+PROGRAM_DAYS = 21
+
+try:
+    from zoneinfo import ZoneInfo
+
+    CLUB_TIMEZONE = ZoneInfo("Asia/Hong_Kong")
+except Exception:  # Python < 3.9 or no tz database
+    CLUB_TIMEZONE = timezone(timedelta(hours=8))
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse a Supabase timestamp into an aware datetime.
+    TIMESTAMP (without time zone) columns are stored in UTC.
+    """
+    text = value.replace("Z", "+00:00")
+    # Older Pythons only accept 0, 3 or 6 fractional digits
+    if "." in text:
+        head, _, rest = text.partition(".")
+        digits = ""
+        while rest and rest[0].isdigit():
+            digits, rest = digits + rest[0], rest[1:]
+        text = f"{head}.{digits[:6].ljust(6, '0')}{rest}"
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def local_date(value: str):
+    """Calendar date (club time zone) of a timestamp string"""
+    return parse_timestamp(value).astimezone(CLUB_TIMEZONE).date()
+
+
+def program_day(value: str) -> int:
+    """Program day (1-21) of a timestamp string"""
+    return min(local_date(value).day, PROGRAM_DAYS)
@@ -0,0 +1,276 @@
+"""
+Quiz Grading and Score Rollups
+==============================
+Grades quiz responses on the server and keeps precomputed scores, so the
+progress page and leaderboards read a few rows instead of re-grading.
+
+What it does:
+1. Loads the answer keys (quizzes.questions[*].correct_answer) once
+2. Streams quiz_responses answered since the last run (retakes included -
+   save_quiz_response bumps answered_at)
+3. Grades a whole page at once with Arrow compute kernels: the answer lists
+   are flattened, each answer is lined up with its key letter by index
+   and compared in one vectorized pass, then summed per response.
+   Responses without answers (saved before migration 016) keep their
+   client score
+4. Writes graded_score / graded_total back with one set-based UPDATE per
+   page (apply_quiz_grades), skipping responses retaken since they were read
+5. Recomputes the rollups of the users and groups those responses touch:
+   quiz_user_scores (per user) and quiz_group_scores (per group)
+6. Only then saves the watermark, so a run that fails before its rollups
+   are written is simply graded again next time
+
+Re-run with --full after a quiz's questions change (e.g. fix_day20_quiz.py).
+
+Run the migrations first: scripts/migrations/016_quiz_scores.sql
+                          scripts/migrations/027_apply_quiz_grades.sql
+Usage: python main.py grade-quizzes [--full]
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from streaming import stream_pages, stream_rows
+from supabase_pool import execute_with_retry, get_client
+from watermarks import load_watermarks, save_watermarks, settle_cutoff
+
+# ====== CONFIGURATION ======
+WATERMARK_JOB = "quiz_grading"
+USER_SCORES_TABLE = "quiz_user_scores"
+GROUP_SCORES_TABLE = "quiz_group_scores"
+PROGRAM_DAYS = 21
+
+# Keys per PostgREST IN filter (they go in the URL)
+IN_FILTER_CHUNK = 100
+
+# Rows per write request (also the page size)
+WRITE_BATCH_SIZE = 500
+
+RESPONSE_COLUMNS = "id, user_id, day_number, score, total_questions, answers, answered_at"
+STREAM_KEY = ("answered_at", "id")
+
+
+def _chunks(items, size=IN_FILTER_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _ratio(part: int, whole: int):
+    return round(part / whole, 4) if whole else None
+
+
+def quiz_questions(value) -> list:
+    """The question list of a quizzes.questions value (stored bare or as {"questions": [...]})"""
+    if isinstance(value, dict):
+        value = value.get("questions")
+    return value if isinstance(value, list) else []
+
+
+def load_answer_keys(supabase) -> dict:
+    """{day_number: ['A', 'C', ...]} from the quizzes table"""
+    result = execute_with_retry(supabase.table("quizzes").select("day_number, questions"))
+    keys = {}
+    for row in result.data or []:
+        questions = quiz_questions(row.get("questions"))
+        keys[row["day_number"]] = [str(q.get("correct_answer") or "").strip().upper() for q in questions]
+    return keys
+
+
+# ====== GRADING ======
+
+def grade_responses(responses: list, answer_keys: dict) -> list:
+    """(graded_score, graded_total) for each response, in order"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    flat_keys, key_starts = [], {}
+    for day_number, key in answer_keys.items():
+        key_starts[day_number] = len(flat_keys)
+        flat_keys.extend(key)
+
+    gradable = [
+        [str(a or "") for a in r["answers"]] if r.get("answers") is not None and answer_keys.get(r["day_number"]) else None
+        for r in responses
+    ]
+    correct_counts = {}
+    if flat_keys and any(answers for answers in gradable if answers):
+        answers = pa.array(gradable, type=pa.list_(pa.string()))
+        flat = pc.list_flatten(answers)
+        owner = pc.list_parent_indices(answers)
+
+        # Position of each answer in its own list: flat index - start of that list
+        starts = pc.take(answers.offsets.cast(pa.int64()), owner)
+        position = pc.subtract(pa.array(range(len(flat)), type=pa.int64()), starts)
+
+        key_start = pa.array([key_starts.get(r["day_number"], 0) for r in responses], type=pa.int64())
+        key_length = pa.array([len(answer_keys.get(r["day_number"], ())) for r in responses], type=pa.int64())
+        in_key = pc.less(position, pc.take(key_length, owner))
+        key_index = pc.if_else(in_key, pc.add(pc.take(key_start, owner), position), 0)
+        expected = pc.take(pa.array(flat_keys, type=pa.string()), key_index)
+
+        given = pc.utf8_upper(pc.utf8_trim_whitespace(flat))
+        correct = pc.and_(in_key, pc.fill_null(pc.equal(given, expected), False))
+        sums = pa.table({"response": owner, "correct": correct.cast(pa.int64())}).group_by("response").aggregate(
+            [("correct", "sum")]
+        )
+        correct_counts = dict(zip(sums["response"].to_pylist(), sums["correct_sum"].to_pylist()))
+
+    graded = []
+    for position, response in enumerate(responses):
+        if gradable[position] is None:
+            graded.append((response["score"], response["total_questions"]))
+        else:
+            graded.append((correct_counts.get(position, 0), len(answer_keys[response["day_number"]])))
+    return graded
+
+
+# ====== ROLLUPS ======
+
+def rollup_users(supabase, user_ids, updated_at: str) -> int:
+    """Recompute quiz_user_scores for some users from their graded responses"""
+    rows = []
+    for chunk in _chunks(user_ids):
+        responses = defaultdict(list)
+        for row in stream_rows(supabase, "quiz_responses",
+                               "user_id, day_number, graded_score, graded_total, score, total_questions, answered_at",
+                               key=STREAM_KEY, filters=[("in_", "user_id", chunk)]):
+            responses[row["user_id"]].append(row)
+
+        for user_id in chunk:
+            days = responses.get(user_id, [])
+            day_scores = [None] * PROGRAM_DAYS
+            correct = questions = perfect = 0
+            for row in days:
+                score = row["graded_score"] if row.get("graded_score") is not None else row["score"]
+                total = row["graded_total"] if row.get("graded_total") is not None else row["total_questions"]
+                correct += score
+                questions += total
+                perfect += total > 0 and score == total
+                if 1 <= row["day_number"] <= PROGRAM_DAYS:
+                    day_scores[row["day_number"] - 1] = score
+            last = max(days, key=lambda r: r["answered_at"]) if days else None
+            rows.append({
+                "user_id": user_id,
+                "days_completed": len(days),
+                "total_correct": correct,
+                "total_questions": questions,
+                "accuracy": _ratio(correct, questions),
+                "perfect_days": perfect,
+                "day_scores": day_scores,
+                "last_day_number": last["day_number"] if last else None,
+                "last_answered_at": last["answered_at"] if last else None,
+                "updated_at": updated_at,
+            })
+
+    for batch in _chunks(rows, WRITE_BATCH_SIZE):
+        execute_with_retry(supabase.table(USER_SCORES_TABLE).upsert(batch, on_conflict="user_id"))
+    return len(rows)
+
+
+def groups_of(supabase, user_ids) -> set:
+    groups = set()
+    for chunk in _chunks(user_ids):
+        result = execute_with_retry(supabase.table("group_members").select("group_id").in_("user_id", chunk))
+        groups.update(row["group_id"] for row in result.data or [])
+    return groups
+
+
+def rollup_groups(supabase, group_ids, updated_at: str) -> int:
+    """Recompute quiz_group_scores from the (already current) user rollups"""
+    members = defaultdict(list)
+    for chunk in _chunks(group_ids):
+        for row in stream_rows(supabase, "group_members", "group_id, user_id", key=("group_id", "user_id"),
+                               filters=[("in_", "group_id", chunk)]):
+            members[row["group_id"]].append(row["user_id"])
+
+    scores = {}
+    for chunk in _chunks({u for users in members.values() for u in users}):
+        result = execute_with_retry(
+            supabase.table(USER_SCORES_TABLE)
+            .select("user_id, days_completed, total_correct, total_questions, perfect_days")
+            .in_("user_id", chunk)
+        )
+        scores.update({row["user_id"]: row for row in result.data or []})
+
+    rows = []
+    for group_id in group_ids:
+        member_scores = [scores[u] for u in members.get(group_id, []) if u in scores]
+        correct = sum(s["total_correct"] for s in member_scores)
+        questions = sum(s["total_questions"] for s in member_scores)
+        rows.append({
+            "group_id": group_id,
+            "member_count": len(members.get(group_id, [])),
+            "participants": sum(1 for s in member_scores if s["days_completed"]),
+            "quizzes_completed": sum(s["days_completed"] for s in member_scores),
+            "total_correct": correct,
+            "total_questions": questions,
+            "accuracy": _ratio(correct, questions),
+            "perfect_days": sum(s["perfect_days"] for s in member_scores),
+            "updated_at": updated_at,
+        })
+
+    for batch in _chunks(rows, WRITE_BATCH_SIZE):
+        execute_with_retry(supabase.table(GROUP_SCORES_TABLE).upsert(batch, on_conflict="group_id"))
+    return len(rows)
+
+
+# ====== MAIN SCRIPT ======
+
+def grade_quizzes(supabase=None, full: bool = False) -> int:
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    answer_keys = load_answer_keys(supabase)
+    print(f"🔑 Answer keys for {len(answer_keys)} days")
+
+    cursors = {} if full else load_watermarks(supabase, WATERMARK_JOB)
+    last_seen = cursors.get("quiz_responses")
+    filters = [("lt", "answered_at", settle_cutoff())]
+
+    graded_count = changed_by_answers = 0
+    touched_users = set()
+    for page in stream_pages(supabase, "quiz_responses", RESPONSE_COLUMNS, key=STREAM_KEY, after=last_seen,
+                             filters=filters, page_size=WRITE_BATCH_SIZE):
+        graded_at = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for response, (score, total) in zip(page, grade_responses(page, answer_keys)):
+            changed_by_answers += response.get("answers") is not None and score != response["score"]
+            # Only the graded columns; answered_at guards against a retake saved meanwhile
+            rows.append({
+                "id": response["id"],
+                "answered_at": response["answered_at"],
+                "graded_score": score,
+                "graded_total": total,
+                "graded_at": graded_at,
+            })
+            touched_users.add(response["user_id"])
+        execute_with_retry(supabase.rpc("apply_quiz_grades", {"p_rows": rows}))
+        graded_count += len(rows)
+        last_seen = (page[-1]["answered_at"], page[-1]["id"])
+        print(f"   ✓ Graded {graded_count} responses")
+
+    if not touched_users:
+        print("✅ No new quiz responses")
+        return 0
+
+    updated_at = datetime.now(timezone.utc).isoformat()
+    users = rollup_users(supabase, touched_users, updated_at)
+    groups = rollup_groups(supabase, groups_of(supabase, touched_users), updated_at)
+
+    # After the rollups: if they fail, the next run grades and rolls these users up again
+    save_watermarks(supabase, WATERMARK_JOB, {"quiz_responses": last_seen}, full_refresh=full)
+    print(f"\n✅ Graded {graded_count} responses ({changed_by_answers} differ from the client score)")
+    print(f"   Rollups updated: {users} users, {groups} groups")
+    return graded_count
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Quiz Grading and Score Rollups")
+    print("=" * 50)
+    print()
+
+    grade_quizzes(full="--full" in sys.argv)
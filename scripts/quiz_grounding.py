@@ -0,0 +1,309 @@
+"""
+Quiz Grounding Check
+====================
+Checks that each generated quiz question is answered by its own lesson: the
+keyed option and the explanation should be found in the day's text, and no
+wrong option should be found there more clearly than the key.
+
+What it does:
+1. Indexes the character bigrams and trigrams of every lesson (plain text,
+   normalized like lesson_keywords.py), weighted by how rare they are
+   across the 21 lessons (IDF), so 的是 counts little and 胡蘿蔔素 a lot
+2. Scores every option and explanation of every quiz in one vectorized
+   Arrow pass: the share of its (weighted) n-grams that occur in its lesson.
+   n-grams an option shares with its question stem are left out, so only
+   what the option adds is scored
+3. Flags questions where:
+   - a wrong option outscores the keyed answer (for "which is NOT ..."
+     questions: where the keyed answer is not the least supported option)
+   - the keyed answer or the explanation barely occurs in the lesson
+4. Queues flagged questions in 'quiz_regeneration_queue'; python main.py
+   generate --queued regenerates just those days
+
+Scores are lexical overlap, not understanding - a flag means "have a
+look", and paraphrased but correct answers can score low.
+
+Run the migration first: scripts/migrations/018_quiz_regeneration_queue.sql
+Usage: python main.py verify-quizzes [--no-queue]
+"""
+
+import hashlib
+import json
+import math
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from lesson_keywords import normalize_text
+from quiz_grading import quiz_questions
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+QUEUE_TABLE = "quiz_regeneration_queue"
+NGRAM_SIZES = (2, 3)
+
+# A wrong option must beat the key by this much to be flagged
+DISTRACTOR_MARGIN = 0.15
+
+# Keys / explanations covering less of their n-gram weight than this are flagged
+MIN_KEY_SCORE = 0.35
+MIN_EXPLANATION_SCORE = 0.4
+
+# Stems asking for the option that is NOT supported by the lesson
+NEGATED_STEM = re.compile(r"不正確|不對|錯誤|不是|不屬於|不包括|不包含|除了|並非")
+
+# "A. 選項" / "A、選項" / "(A) 選項"
+OPTION_LABEL = re.compile(r"^\s*[(（]?([A-Da-d])[)）.．、:：]\s*")
+
+# Letters, digits and CJK; punctuation and whitespace break n-grams
+TEXT_RUNS = re.compile(r"[0-9A-Za-z㐀-鿿]+")
+
+
+def ngrams(text: str) -> set:
+    grams = set()
+    for run in TEXT_RUNS.findall(normalize_text(text or "").lower()):
+        for size in NGRAM_SIZES:
+            grams.update(run[i:i + size] for i in range(len(run) - size + 1))
+    return grams
+
+
+def split_options(options) -> dict:
+    """{'A': text, ...} from a list ("A. ...") or a dict ({'A': ...})"""
+    if isinstance(options, dict):
+        return {str(letter).strip().upper(): str(text) for letter, text in options.items()}
+    parsed = {}
+    for position, option in enumerate(options or []):
+        option = str(option)
+        label = OPTION_LABEL.match(option)
+        letter = label.group(1).upper() if label else "ABCD"[position] if position < 4 else str(position)
+        parsed[letter] = option[label.end():] if label else option
+    return parsed
+
+
+def question_hash(question: dict) -> str:
+    return hashlib.sha256(json.dumps(question, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+# ====== SCORING ======
+
+class LessonIndex:
+    """Vocabulary of n-gram ids, their IDF and which (lesson, n-gram) pairs exist"""
+
+    def __init__(self, lessons: dict):
+        self.days = sorted(lessons)
+        self.row_of_day = {day: row for row, day in enumerate(self.days)}
+        self.ids = {}
+        document_frequency = defaultdict(int)
+        self.lesson_grams = {}
+        for day in self.days:
+            grams = [self.id_of(gram) for gram in ngrams(lessons[day])]
+            self.lesson_grams[day] = grams
+            for gram_id in grams:
+                document_frequency[gram_id] += 1
+        self.document_frequency = document_frequency
+
+    def id_of(self, gram: str) -> int:
+        gram_id = self.ids.get(gram)
+        if gram_id is None:
+            gram_id = self.ids[gram] = len(self.ids)
+        return gram_id
+
+    def arrays(self):
+        """(idf per n-gram id, sorted lesson_row * vocabulary + id keys) as Arrow arrays"""
+        import pyarrow as pa
+
+        lessons = len(self.days)
+        idf = [0.0] * len(self.ids)
+        for gram_id in range(len(self.ids)):
+            # Smoothed IDF; n-grams in no lesson get the highest weight
+            idf[gram_id] = math.log((1 + lessons) / (1 + self.document_frequency.get(gram_id, 0))) + 1
+        vocabulary = len(self.ids)
+        keys = sorted(self.row_of_day[day] * vocabulary + gram_id
+                      for day, grams in self.lesson_grams.items() for gram_id in grams)
+        return pa.array(idf, type=pa.float64()), pa.array(keys, type=pa.int64())
+
+
+def score_texts(index: LessonIndex, texts: list) -> list:
+    """
+    texts: [(day_number, n-gram set), ...]
+    Returns the IDF-weighted share of each text's n-grams found in its lesson
+    (None for texts with no n-grams or no lesson).
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    owner, gram_ids, lesson_rows = [], [], []
+    for position, (day, grams) in enumerate(texts):
+        row = index.row_of_day.get(day)
+        if row is None:
+            continue
+        for gram in grams:
+            owner.append(position)
+            gram_ids.append(index.id_of(gram))
+            lesson_rows.append(row)
+    if not owner:
+        return [None] * len(texts)
+
+    idf, lesson_keys = index.arrays()
+    vocabulary = len(idf)
+    gram_ids = pa.array(gram_ids, type=pa.int64())
+    keys = pc.add(pc.multiply(pa.array(lesson_rows, type=pa.int64()), vocabulary), gram_ids)
+    weight = pc.take(idf, gram_ids)
+    found = pc.if_else(pc.is_in(keys, value_set=lesson_keys), weight, 0.0)
+    sums = pa.table({"text": pa.array(owner, type=pa.int64()), "weight": weight, "found": found}) \
+        .group_by("text").aggregate([("weight", "sum"), ("found", "sum")])
+
+    scores = [None] * len(texts)
+    for position, total, covered in zip(sums["text"].to_pylist(), sums["weight_sum"].to_pylist(),
+                                        sums["found_sum"].to_pylist()):
+        scores[position] = round(covered / total, 4) if total else None
+    return scores
+
+
+def check_quizzes(lessons: dict, quizzes: dict) -> list:
+    """
+    lessons: {day_number: text}, quizzes: {day_number: [question, ...]}
+    Returns one result dict per question (flags empty when it looks grounded).
+    """
+    index = LessonIndex(lessons)
+    questions, texts = [], []
+    for day in sorted(quizzes):
+        for position, question in enumerate(quizzes[day]):
+            stem = ngrams(question.get("question"))
+            options = split_options(question.get("options"))
+            option_texts = {}
+            for letter, text in options.items():
+                grams = ngrams(text)
+                option_texts[letter] = len(texts)
+                texts.append((day, (grams - stem) or grams))
+            explanation_text = len(texts)
+            texts.append((day, ngrams(question.get("explanation"))))
+            questions.append((day, position, question, option_texts, explanation_text))
+
+    scores = score_texts(index, texts)
+    results = []
+    for day, position, question, option_texts, explanation_text in questions:
+        key = str(question.get("correct_answer") or "").strip().upper()
+        option_scores = {letter: scores[i] for letter, i in option_texts.items()}
+        explanation_score = scores[explanation_text]
+        negated = bool(NEGATED_STEM.search(normalize_text(question.get("question") or "")))
+        key_score = option_scores.get(key)
+        others = {letter: s for letter, s in option_scores.items() if letter != key and s is not None}
+
+        flags = []
+        best_letter, best_score = None, None
+        if key_score is None:
+            flags.append("key_missing")
+        elif others:
+            if negated:
+                best_letter = min(others, key=others.get)
+                if others[best_letter] + DISTRACTOR_MARGIN < key_score:
+                    flags.append("distractor_less_supported_than_key")
+            else:
+                best_letter = max(others, key=others.get)
+                if others[best_letter] > key_score + DISTRACTOR_MARGIN:
+                    flags.append("distractor_outscores_key")
+            best_score = others[best_letter]
+            if not negated and key_score < MIN_KEY_SCORE:
+                flags.append("key_ungrounded")
+        if explanation_score is not None and explanation_score < MIN_EXPLANATION_SCORE:
+            flags.append("explanation_ungrounded")
+
+        results.append({
+            "day_number": day,
+            "question_index": position,
+            "question_hash": question_hash(question),
+            "question": question.get("question"),
+            "correct_answer": key,
+            "negated": negated,
+            "option_scores": option_scores,
+            "key_score": key_score,
+            "best_option": best_letter,
+            "best_score": best_score,
+            "explanation_score": explanation_score,
+            "flags": flags,
+        })
+    return results
+
+
+# ====== QUEUE ======
+
+def queue_for_regeneration(supabase, flagged: list) -> int:
+    """Insert flagged questions once; an already queued (or dismissed) version is left as it is"""
+    now = datetime.now(timezone.utc).isoformat()
+    rows = [{
+        "day_number": r["day_number"],
+        "question_index": r["question_index"],
+        "question_hash": r["question_hash"],
+        "question": r["question"],
+        "reasons": r["flags"],
+        "key_score": r["key_score"],
+        "best_option": r["best_option"],
+        "best_score": r["best_score"],
+        "explanation_score": r["explanation_score"],
+        "option_scores": r["option_scores"],
+        "status": "pending",
+        "created_at": now,
+    } for r in flagged]
+    if rows:
+        execute_with_retry(supabase.table(QUEUE_TABLE).upsert(
+            rows, on_conflict="day_number,question_index,question_hash", ignore_duplicates=True
+        ))
+    return len(rows)
+
+
+def pending_days(supabase) -> list:
+    result = execute_with_retry(supabase.table(QUEUE_TABLE).select("day_number").eq("status", "pending"))
+    return sorted({row["day_number"] for row in result.data or []})
+
+
+def mark_regenerated(supabase, days) -> None:
+    if days:
+        execute_with_retry(
+            supabase.table(QUEUE_TABLE)
+            .update({"status": "regenerated", "resolved_at": datetime.now(timezone.utc).isoformat()})
+            .eq("status", "pending")
+            .in_("day_number", list(days))
+        )
+
+
+# ====== MAIN SCRIPT ======
+
+def verify_quiz_grounding(supabase=None, queue: bool = True) -> list:
+    """Score every quiz against its lesson; returns the flagged results"""
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    content = execute_with_retry(supabase.table("daily_content").select("day_number, content, content_text")).data or []
+    lessons = {row["day_number"]: row.get("content_text") or row.get("content") or "" for row in content}
+    rows = execute_with_retry(supabase.table("quizzes").select("day_number, questions")).data or []
+    quizzes = {row["day_number"]: quiz_questions(row.get("questions")) for row in rows}
+
+    results = check_quizzes(lessons, quizzes)
+    flagged = [r for r in results if r["flags"]]
+    print(f"🔎 Checked {len(results)} questions against {len(lessons)} lessons: {len(flagged)} flagged")
+    for r in flagged:
+        scores = " ".join(f"{letter}={'-' if s is None else f'{s:.2f}'}" for letter, s in sorted(r["option_scores"].items()))
+        explanation = "-" if r["explanation_score"] is None else f"{r['explanation_score']:.2f}"
+        print(f"   ⚠️  Day {r['day_number']:2d} Q{r['question_index'] + 1} (key {r['correct_answer']}): "
+              f"{', '.join(r['flags'])}")
+        print(f"       {str(r['question'])[:60]}")
+        print(f"       {scores}  explanation={explanation}")
+
+    if queue and flagged:
+        queue_for_regeneration(supabase, flagged)
+        print(f"\n📥 Queued {len(flagged)} questions in '{QUEUE_TABLE}' - run: python main.py generate --queued")
+    elif not flagged:
+        print("✅ Every keyed answer is supported by its lesson")
+    return flagged
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Quiz Grounding Check")
+    print("=" * 50)
+    print()
+
+    verify_quiz_grounding(queue="--no-queue" not in sys.argv)
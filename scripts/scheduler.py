@@ -0,0 +1,388 @@
+"""
+Maintenance Job Scheduler
+=========================
+One long-lived worker that runs the recurring maintenance jobs on a
+schedule, instead of someone starting each script by hand and every run
+paying for a fresh interpreter, SDK imports and TLS connections.
+
+What it does:
+1. Registers the jobs below with cron-style schedules in club time
+   (Asia/Hong_Kong): lesson import (only when the book files changed),
+   quizzes for lessons that have none, quiz grounding check, quiz grading,
+   analytics refresh and the daily group digests
+2. Wakes once a minute and hands due jobs to a bounded thread pool; all jobs
+   share the process-wide pooled Supabase client (supabase_pool.py)
+3. Never overlaps a job with itself: a run that is still going when the job
+   is due again is skipped. Across instances each (job, minute) is claimed
+   once in 'scheduled_job_runs', so a scaled-out service still runs it once.
+   A claim that fails for any reason other than a missing table skips that
+   run rather than risking a duplicate
+4. Keeps per-job timing (runs, failures, last / average / max seconds) and
+   writes each run's outcome to 'scheduled_job_runs'; with --port it serves
+   them at /metrics and a liveness check at /healthz
+
+Jobs cannot be killed mid-run (they are threads); a run that exceeds its
+timeout is reported as overdue and keeps its slot until it finishes.
+
+Deployed as a sidecar container next to the web app (Dockerfile.worker,
+cloudbuild.yaml).
+
+Run the migration first: scripts/migrations/020_scheduled_job_runs.sql
+Usage: python main.py scheduler [--workers 2] [--port 8081] [--list] [--run JOB]
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from program_days import CLUB_TIMEZONE
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+RUNS_TABLE = "scheduled_job_runs"
+
+# Concurrent jobs (each job uses the shared client pool, see SUPABASE_POOL_SIZE)
+DEFAULT_WORKERS = 2
+
+# Identifies this worker in scheduled_job_runs
+HOLDER = f"{socket.gethostname()}:{os.getpid()}"
+
+# PostgREST / Postgres codes for "table does not exist" (migration 020 not run)
+MISSING_TABLE_CODES = ("PGRST205", "42P01")
+
+
+# ====== CRON SCHEDULES ======
+
+CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6))
+
+
+def _parse_field(text: str, low: int, high: int) -> frozenset:
+    """One cron field: *, */15, 5, 1-5, 1-10/2, or a comma list of those"""
+    values = set()
+    for part in text.split(","):
+        spec, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(v) for v in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError(f"Cron field '{text}' out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """
+    Five-field cron expression (minute hour day month weekday, 0 = Sunday).
+    Unlike classic cron, a restricted day and weekday must both match.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(f"Cron expression '{expression}' needs 5 fields")
+        self.expression = expression
+        self.minute, self.hour, self.day, self.month, self.weekday = (
+            _parse_field(text, low, high) for text, (_, low, high) in zip(fields, CRON_FIELDS)
+        )
+
+    def matches(self, moment: datetime) -> bool:
+        return (moment.minute in self.minute and moment.hour in self.hour and moment.day in self.day
+                and moment.month in self.month and (moment.weekday() + 1) % 7 in self.weekday)
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute after moment (searched minute by minute, at most a year)"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(366 * 24 * 60):
+            if self.matches(candidate):
+                return candidate
+            candidate += timedelta(minutes=1)
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+# ====== JOBS ======
+
+def import_changed_lessons(supabase):
+    """Re-import the book only when a lesson file differs from daily_content"""
+    from import_book_content import CONTENT_DIR, extract_day_number, import_all_content
+
+    stored = execute_with_retry(supabase.table("daily_content").select("day_number, content")).data or []
+    stored = {row["day_number"]: row["content"] for row in stored}
+    files = {extract_day_number(f.name): f.read_text(encoding="utf-8") for f in CONTENT_DIR.glob("第*天*.md")}
+    if files and files != stored:
+        import_all_content(supabase)
+    else:
+        print("✓ Lessons unchanged")
+
+
+def generate_missing_quizzes(supabase):
+    """Generate quizzes only for lessons that have none yet"""
+    from generate_all_quizzes import generate_all_quizzes
+
+    lessons = execute_with_retry(supabase.table("daily_content").select("day_number")).data or []
+    quizzes = execute_with_retry(supabase.table("quizzes").select("day_number")).data or []
+    missing = sorted({row["day_number"] for row in lessons} - {row["day_number"] for row in quizzes})
+    if missing:
+        generate_all_quizzes(supabase, days=missing)
+    else:
+        print("✓ Every lesson has a quiz")
+
+
+def verify_quizzes(supabase):
+    from quiz_grounding import verify_quiz_grounding
+
+    verify_quiz_grounding(supabase, queue=True)
+
+
+def grade_quizzes(supabase):
+    from quiz_grading import grade_quizzes as grade
+
+    grade(supabase)
+
+
+def refresh_analytics(supabase):
+    from analytics_refresh import refresh
+
+    refresh(supabase)
+
+
+def post_digests(supabase):
+    from group_digests import post_digests as post
+
+    post(supabase)
+
+
+class Job:
+    """A registered job plus its timing metrics"""
+
+    def __init__(self, name: str, schedule: str, func, timeout_minutes: int = 30):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.func = func
+        self.timeout = timedelta(minutes=timeout_minutes)
+        self.lock = threading.Lock()
+        self.running_since = None
+        self.overdue_reported = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.claim_errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = None
+        self.last_started = None
+        self.last_error = None
+
+    def metrics(self) -> dict:
+        return {
+            "schedule": self.schedule.expression,
+            "running_since": self.running_since.isoformat() if self.running_since else None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_overlaps": self.skipped,
+            "skipped_claim_errors": self.claim_errors,
+            "last_seconds": self.last_seconds,
+            "avg_seconds": round(self.total_seconds / self.runs, 3) if self.runs else None,
+            "max_seconds": round(self.max_seconds, 3),
+            "last_started": self.last_started.isoformat() if self.last_started else None,
+            "last_error": self.last_error,
+            "next_run": self.schedule.next_after(datetime.now(CLUB_TIMEZONE)).isoformat(),
+        }
+
+
+# Schedules are club time; quiz generation and import are cheap no-ops when nothing changed
+JOBS = [
+    Job("import", "30 3 * * *", import_changed_lessons, timeout_minutes=15),
+    Job("generate", "45 3 * * *", generate_missing_quizzes, timeout_minutes=30),
+    Job("verify-quizzes", "0 4 * * *", verify_quizzes, timeout_minutes=10),
+    Job("grade-quizzes", "*/15 * * * *", grade_quizzes, timeout_minutes=10),
+    Job("analytics", "5 * * * *", refresh_analytics, timeout_minutes=20),
+    Job("digests", "15 0 * * *", post_digests, timeout_minutes=15),
+]
+
+
+# ====== WORKER ======
+
+class Scheduler:
+    def __init__(self, supabase, jobs=None, workers: int = DEFAULT_WORKERS):
+        self.supabase = supabase
+        self.jobs = {job.name: job for job in (jobs or JOBS)}
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.last_slot = None
+        self.stop_event = threading.Event()
+        self.started = datetime.now(timezone.utc)
+        self.claims_enabled = True
+
+    def claim(self, job: Job, slot: datetime) -> bool:
+        """True if this worker is the one to run job for this minute"""
+        if not self.claims_enabled:
+            return True
+        try:
+            result = execute_with_retry(self.supabase.table(RUNS_TABLE).upsert({
+                "job": job.name,
+                "scheduled_for": slot.isoformat(),
+                "holder": HOLDER,
+                "status": "running",
+                "started_at": datetime.now(timezone.utc).isoformat(),
+            }, on_conflict="job,scheduled_for", ignore_duplicates=True))
+        except Exception as e:
+            if str(getattr(e, "code", "")) in MISSING_TABLE_CODES:
+                # No migration yet: run as a single instance rather than not at all
+                print(f"⚠️  '{RUNS_TABLE}' does not exist - assuming a single worker")
+                self.claims_enabled = False
+                return True
+            # Transient failure: another instance may hold the claim, so skip this
+            # slot and claim again next time instead of giving up on claims
+            job.claim_errors += 1  # the caller (submit) holds job.lock
+            print(f"⚠️  Could not claim {job.name} for {slot:%H:%M} ({e}) - skipped")
+            return False
+        return bool(result.data)
+
+    def record(self, job: Job, slot: datetime, seconds: float, error: str = None):
+        if not self.claims_enabled or slot is None:
+            return
+        try:
+            execute_with_retry(
+                self.supabase.table(RUNS_TABLE).update({
+                    "status": "failed" if error else "succeeded",
+                    "finished_at": datetime.now(timezone.utc).isoformat(),
+                    "duration_ms": int(seconds * 1000),
+                    "error": error,
+                }).eq("job", job.name).eq("scheduled_for", slot.isoformat())
+            )
+        except Exception as e:
+            print(f"⚠️  Could not record the {job.name} run - {e}")
+
+    def run_job(self, job: Job, slot: datetime = None):
+        started = time.perf_counter()
+        error = None
+        print(f"▶️  {job.name} started")
+        try:
+            job.func(self.supabase)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        seconds = time.perf_counter() - started
+        with job.lock:
+            job.runs += 1
+            job.failures += error is not None
+            job.total_seconds += seconds
+            job.max_seconds = max(job.max_seconds, seconds)
+            job.last_seconds = round(seconds, 3)
+            job.last_error = error
+            job.running_since = None
+        self.record(job, slot, seconds, error)
+        print(f"{'❌' if error else '✅'} {job.name} finished in {seconds:.1f}s" + (f" - {error}" if error else ""))
+
+    def submit(self, job: Job, slot: datetime = None) -> bool:
+        with job.lock:
+            if job.running_since is not None:
+                job.skipped += 1
+                print(f"⏭️  {job.name} still running since {job.running_since:%H:%M} - skipped")
+                return False
+            if slot is not None and not self.claim(job, slot):
+                return False
+            job.running_since = datetime.now(CLUB_TIMEZONE)
+            job.last_started = job.running_since
+            job.overdue_reported = False
+        self.pool.submit(self.run_job, job, slot)
+        return True
+
+    def tick(self, now: datetime):
+        slot = now.replace(second=0, microsecond=0)
+        # An early wake-up must not start the same minute's jobs twice
+        due = slot != self.last_slot
+        self.last_slot = slot
+        for job in self.jobs.values():
+            if due and job.schedule.matches(slot):
+                self.submit(job, slot)
+            running_since = job.running_since
+            if running_since and not job.overdue_reported and now - running_since > job.timeout:
+                job.overdue_reported = True
+                print(f"⚠️  {job.name} has been running for over {job.timeout} (started {running_since:%H:%M})")
+
+    def run_forever(self):
+        print(f"🕒 Scheduler {HOLDER}: {len(self.jobs)} jobs, {self.workers} workers")
+        for name, job in self.jobs.items():
+            print(f"   {name:<16} {job.schedule.expression:<14} next {job.schedule.next_after(datetime.now(CLUB_TIMEZONE)):%m-%d %H:%M}")
+        try:
+            while not self.stop_event.is_set():
+                now = datetime.now(CLUB_TIMEZONE)
+                self.tick(now)
+                # Sleep to the start of the next minute
+                self.stop_event.wait(60 - now.second - now.microsecond / 1_000_000)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping - waiting for running jobs")
+        finally:
+            self.pool.shutdown(wait=True)
+
+    def metrics(self) -> dict:
+        return {
+            "holder": HOLDER,
+            "started": self.started.isoformat(),
+            "jobs": {name: job.metrics() for name, job in self.jobs.items()},
+        }
+
+
+def serve_metrics(scheduler: Scheduler, port: int):
+    """Background HTTP server: /healthz for the container probe, /metrics as JSON"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/healthz":
+                body, status = b"ok", 200
+            elif self.path == "/metrics":
+                body, status = json.dumps(scheduler.metrics(), ensure_ascii=False).encode("utf-8"), 200
+            else:
+                body, status = b"not found", 404
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json" if self.path == "/metrics" else "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="scheduler-http", daemon=True).start()
+    print(f"📈 Metrics on http://0.0.0.0:{port}/metrics")
+    return server
+
+
+# ====== MAIN SCRIPT ======
+
+def run_scheduler(supabase=None, workers: int = DEFAULT_WORKERS, port: int = None, run: str = None):
+    """Run forever, or just one job now with run='name'"""
+    if supabase is None:
+        supabase = get_client(admin=True)
+
+    scheduler = Scheduler(supabase, workers=workers)
+    if run:
+        if run not in scheduler.jobs:
+            raise SystemExit(f"❌ Unknown job '{run}' - one of: {', '.join(scheduler.jobs)}")
+        scheduler.run_job(scheduler.jobs[run])
+        return scheduler.jobs[run].metrics()
+
+    if port:
+        serve_metrics(scheduler, port)
+    scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("  Maintenance Job Scheduler")
+    print("=" * 50)
+    print()
+
+    run_scheduler(port=int(os.getenv("PORT", "0")) or None)
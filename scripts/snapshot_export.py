@@ -0,0 +1,299 @@
+"""
+Local Columnar Snapshots
+========================
+Streams every club table into compressed Arrow files on disk, so diagnostics
+and analytics can run locally instead of pulling live tables row by row.
+
+What it does:
+1. For each table, reads only rows newer than the last snapshot
+   (keyset pagination on created_at, id)
+2. Spools the pages to a temporary file while widening each column's type
+   over every page (null -> any type, int + float -> float, JSON wins)
+3. Appends them as a new part file: snapshots/<table>/part-000001.arrow, ...
+   (Arrow IPC, zstd-compressed, written one page at a time)
+4. Records the watermark, column types and parts in snapshots/manifest.json
+
+A column that is new, or whose type no longer fits the earlier parts, stops
+the export of that table with a message instead of being dropped or
+mangled; re-export it with --full.
+
+Rows updated in place (lesson edits, quiz retakes, profile renames) are only
+picked up by a full re-export: python main.py snapshot --full
+
+Reading a snapshot (memory-mapped, no network):
+    from snapshot_export import load_table
+    shares = load_table('text_shares')        # pyarrow.Table
+    shares.to_pandas()                        # if pandas is installed
+
+Usage: python main.py snapshot [--full] [--tables text_shares food_logs] [--compression none]
+"""
+
+import json
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+from env_config import PROJECT_ROOT
+from streaming import stream_pages
+from supabase_pool import get_client
+
+# ====== CONFIGURATION ======
+SNAPSHOT_DIR = PROJECT_ROOT / "snapshots"
+
+# table -> keyset pagination key (must increase for new rows)
+SNAPSHOT_TABLES = {
+    "groups": ("created_at", "id"),
+    "group_members": ("joined_at", "user_id"),
+    "daily_content": ("created_at", "id"),
+    "quizzes": ("created_at", "id"),
+    "quiz_responses": ("created_at", "id"),
+    "text_shares": ("created_at", "id"),
+    "food_logs": ("created_at", "id"),
+    "chat_messages": ("created_at", "id"),
+    "share_comments": ("created_at", "id"),
+    "share_reactions": ("created_at", "id"),
+    "user_profiles": ("created_at", "id"),
+}
+
+# Compression for new part files: "zstd", "lz4" or None.
+# Uncompressed files can be memory-mapped with zero copies.
+DEFAULT_COMPRESSION = "zstd"
+
+MANIFEST_NAME = "manifest.json"
+
+
+# ====== MANIFEST ======
+
+def load_manifest(snapshot_dir: Path = SNAPSHOT_DIR) -> dict:
+    path = snapshot_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_manifest(manifest: dict, snapshot_dir: Path = SNAPSHOT_DIR):
+    # Write-then-rename so an interrupted run never leaves a torn manifest
+    path = snapshot_dir / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+# ====== COLUMN TYPES ======
+
+def _infer_type(value) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int64"
+    if isinstance(value, float):
+        return "float64"
+    if isinstance(value, (dict, list)):
+        return "json"
+    return "string"
+
+
+def _widen(current: str, new: str) -> str:
+    """The narrowest type that holds values of both types"""
+    if current in (None, "null") or current == new:
+        return new
+    if new == "null":
+        return current
+    if {current, new} == {"int64", "float64"}:
+        return "float64"
+    if "json" in (current, new):
+        return "json"
+    return "string"
+
+
+def infer_column_types(rows, types: dict = None) -> dict:
+    """
+    Widen {column: type} over more rows ("null" = no value seen yet).
+    Timestamps and uuids stay strings; JSON columns are stored as JSON text.
+    """
+    types = dict(types or {})
+    for row in rows:
+        for column, value in row.items():
+            types[column] = _widen(types.get(column), "null" if value is None else _infer_type(value))
+    return types
+
+
+def final_column_types(types: dict) -> dict:
+    # Columns that were null everywhere
+    return {column: ("string" if t == "null" else t) for column, t in types.items()}
+
+
+def check_column_types(table: str, existing: dict, types: dict) -> dict:
+    """Types for a new part that are still readable alongside the earlier parts"""
+    new_columns = sorted(set(types) - set(existing))
+    if new_columns:
+        raise ValueError(f"new column(s) {', '.join(new_columns)} in {table} - "
+                         f"re-export it: python main.py snapshot --full --tables {table}")
+    changed = sorted(c for c, t in types.items() if _widen(existing[c], t) != existing[c])
+    if changed:
+        details = ", ".join(f"{c} {existing[c]} -> {types[c]}" for c in changed)
+        raise ValueError(f"column type(s) changed in {table} ({details}) - "
+                         f"re-export it: python main.py snapshot --full --tables {table}")
+    return existing
+
+
+def _arrow_schema(column_types: dict):
+    import pyarrow as pa
+
+    arrow_types = {
+        "bool": pa.bool_(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "json": pa.string(),
+        "string": pa.string(),
+    }
+    return pa.schema([(column, arrow_types[t]) for column, t in column_types.items()])
+
+
+def _to_batch(rows, column_types: dict, schema):
+    import pyarrow as pa
+
+    columns = {}
+    for column, t in column_types.items():
+        values = [row.get(column) for row in rows]
+        if t == "json":
+            values = [None if v is None else json.dumps(v, ensure_ascii=False) for v in values]
+        elif t == "string":
+            values = [None if v is None else str(v) for v in values]
+        elif t == "float64":
+            values = [None if v is None else float(v) for v in values]
+        columns[column] = values
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+# ====== EXPORT ======
+
+def export_table(supabase, table: str, manifest: dict, snapshot_dir: Path,
+                 compression=DEFAULT_COMPRESSION) -> int:
+    """Append rows newer than the table's watermark as a new part file"""
+    import pyarrow as pa
+
+    key = SNAPSHOT_TABLES[table]
+    entry = manifest.setdefault(table, {"key": list(key), "watermark": None, "columns": None, "parts": []})
+    table_dir = snapshot_dir / table
+    table_dir.mkdir(parents=True, exist_ok=True)
+
+    part_name = f"part-{len(entry['parts']) + 1:06d}.arrow"
+    part_path = table_dir / part_name
+    tmp_path = part_path.with_suffix(".tmp")
+
+    after = tuple(entry["watermark"]) if entry["watermark"] else None
+    spool_path = part_path.with_suffix(".pages.jsonl")
+    types = {}
+    rows_written = 0
+    last = None
+    writer = None
+    try:
+        # Pass 1: every page to disk, so the types cover all of them
+        with open(spool_path, "w", encoding="utf-8") as spool:
+            for page in stream_pages(supabase, table, "*", key=key, after=after):
+                types = infer_column_types(page, types)
+                spool.write(json.dumps(page, ensure_ascii=False) + "\n")
+                rows_written += len(page)
+                last = page[-1]
+
+        if rows_written:
+            if entry["columns"] is None:
+                entry["columns"] = final_column_types(types)
+            else:
+                entry["columns"] = check_column_types(table, entry["columns"], types)
+            schema = _arrow_schema(entry["columns"])
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            writer = pa.ipc.new_file(str(tmp_path), schema, options=options)
+            # Pass 2: one record batch per page
+            with open(spool_path, encoding="utf-8") as spool:
+                for line in spool:
+                    writer.write_batch(_to_batch(json.loads(line), entry["columns"], schema))
+    finally:
+        if writer is not None:
+            writer.close()
+        if spool_path.exists():
+            spool_path.unlink()
+
+    if rows_written:
+        tmp_path.replace(part_path)
+        entry["parts"].append({
+            "file": part_name,
+            "rows": rows_written,
+            "written_at": datetime.now(timezone.utc).isoformat(),
+        })
+        entry["watermark"] = [last[key[0]], last[key[1]]]
+    elif tmp_path.exists():
+        tmp_path.unlink()
+    return rows_written
+
+
+def export_snapshot(supabase=None, tables=None, full: bool = False,
+                    snapshot_dir: Path = SNAPSHOT_DIR, compression=DEFAULT_COMPRESSION):
+    """Export (or incrementally append to) the local snapshot"""
+    if supabase is None:
+        supabase = get_client(admin=True)
+    tables = tables or list(SNAPSHOT_TABLES)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(snapshot_dir)
+
+    print(f"📦 Snapshot directory: {snapshot_dir}\n")
+    for table in tables:
+        if full and table in manifest:
+            shutil.rmtree(snapshot_dir / table, ignore_errors=True)
+            del manifest[table]
+        try:
+            added = export_table(supabase, table, manifest, snapshot_dir, compression)
+            total = sum(part["rows"] for part in manifest.get(table, {}).get("parts", []))
+            print(f"   ✓ {table}: +{added} rows ({total} total)")
+        except Exception as e:
+            print(f"   ✗ {table}: {e}")
+        # Save after every table so an interrupted run resumes where it stopped
+        save_manifest(manifest, snapshot_dir)
+
+    print("\n✅ Snapshot complete")
+
+
+# ====== READING ======
+
+def load_table(table: str, snapshot_dir: Path = SNAPSHOT_DIR):
+    """Read a table snapshot as one pyarrow.Table (parts are memory-mapped)"""
+    import pyarrow as pa
+
+    entry = load_manifest(snapshot_dir).get(table)
+    if not entry or not entry["parts"]:
+        raise FileNotFoundError(f"No snapshot for '{table}' in {snapshot_dir} - run: python main.py snapshot")
+
+    tables = []
+    for part in entry["parts"]:
+        source = pa.memory_map(str(snapshot_dir / table / part["file"]), "r")
+        tables.append(pa.ipc.open_file(source).read_all())
+    return pa.concat_tables(tables)
+
+
+def iter_rows(table: str, snapshot_dir: Path = SNAPSHOT_DIR):
+    """Yield snapshot rows as dicts (JSON columns decoded), one batch at a time"""
+    import pyarrow as pa
+
+    entry = load_manifest(snapshot_dir).get(table) or {"parts": [], "columns": {}}
+    json_columns = [c for c, t in (entry["columns"] or {}).items() if t == "json"]
+    for part in entry["parts"]:
+        source = pa.memory_map(str(snapshot_dir / table / part["file"]), "r")
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            for row in reader.get_batch(i).to_pylist():
+                for column in json_columns:
+                    if row.get(column) is not None:
+                        row[column] = json.loads(row[column])
+                yield row
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Export Local Snapshot")
+    print("=" * 50)
+    print()
+
+    export_snapshot(full="--full" in sys.argv)
@@ -0,0 +1,84 @@
+"""
+Keyset Pagination Helpers
+=========================
+Stream large Supabase tables page by page without OFFSET.
+
+Each page asks for rows strictly after the last (created_at, id) seen, so
+every page is an index range scan no matter how deep into the table we are,
+and rows inserted during the scan cannot shift pages the way OFFSET does.
+
+Usage:
+    for row in stream_rows(supabase, 'text_shares', 'id, group_id, created_at'):
+        ...
+"""
+
+from supabase_pool import execute_with_retry
+
+# PostgREST's default max-rows is 1000, so larger pages would be truncated
+DEFAULT_PAGE_SIZE = 1000
+
+# Default sort key - every activity table has created_at + a uuid id
+DEFAULT_KEY = ("created_at", "id")
+
+
+def _quote(value) -> str:
+    """Quote a value for a PostgREST logic tree (timestamps contain ':' and '+')"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_filter(key, cursor, descending: bool = False) -> str:
+    """
+    Build the or=(...) filter meaning "(key) > (cursor)" for a two-column key:
+    a > x OR (a = x AND b > y)
+    With descending=True it means "(key) < (cursor)" instead.
+    """
+    (first, second), (first_value, second_value) = key, cursor
+    op = "lt" if descending else "gt"
+    return (
+        f"{first}.{op}.{_quote(first_value)},"
+        f"and({first}.eq.{_quote(first_value)},{second}.{op}.{_quote(second_value)})"
+    )
+
+
+def apply_filters(query, filters):
+    """Apply [(op, column, value), ...] e.g. [('eq', 'user_id', uid)]"""
+    for op, column, value in filters or ():
+        query = getattr(query, op)(column, value)
+    return query
+
+
+def stream_pages(supabase, table, columns="*", key=DEFAULT_KEY, after=None,
+                 filters=None, page_size=DEFAULT_PAGE_SIZE, descending=False):
+    """
+    Yield lists of rows in key order, one page per round trip.
+
+    Args:
+        after: (first, second) key values to resume after, or None for the start
+        filters: extra [(op, column, value), ...] applied to every page
+        descending: newest first (after then means "older than")
+    """
+    if columns != "*":
+        # The key columns are needed to compute the next cursor
+        selected = [c.strip() for c in columns.split(",")]
+        columns = ", ".join(selected + [k for k in key if k not in selected])
+
+    cursor = after
+    while True:
+        query = apply_filters(supabase.table(table).select(columns), filters)
+        if cursor is not None:
+            query = query.or_(keyset_filter(key, cursor, descending))
+        query = query.order(key[0], desc=descending).order(key[1], desc=descending).limit(page_size)
+
+        rows = execute_with_retry(query).data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1][key[0]], rows[-1][key[1]])
+
+
+def stream_rows(supabase, table, columns="*", **kwargs):
+    """Yield rows one at a time (see stream_pages for arguments)"""
+    for page in stream_pages(supabase, table, columns, **kwargs):
+        yield from page
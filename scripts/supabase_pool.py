@@ -0,0 +1,158 @@
+"""
+Shared Supabase Client Pool
+===========================
+One pooled, keep-alive Supabase client per process, shared by every job.
+
+What it does:
+1. get_client() returns the process-wide client (thread-safe, built once per key)
+2. The client's HTTP session keeps connections alive, so a batch job pays the
+   TLS handshake once instead of on every request
+3. Timeouts and pool size come from the shared config
+   (SUPABASE_TIMEOUT, SUPABASE_POOL_SIZE, SUPABASE_RETRIES)
+4. execute_with_retry() retries idempotent reads and upserts with jittered
+   exponential backoff on transient errors (timeouts, 5xx, 429)
+5. With SUPABASE_TELEMETRY set, every request is also logged with its
+   latency (see supabase_telemetry.py)
+
+Only pass idempotent queries (select, upsert, delete/update by key) to
+execute_with_retry - retrying a plain insert can write the row twice.
+"""
+
+import random
+import threading
+import time
+
+from env_config import get_config
+
+# HTTP statuses worth retrying
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Seconds idle connections are kept open for reuse
+KEEPALIVE_EXPIRY = 60.0
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(admin: bool = False):
+    """
+    Return the shared Supabase client.
+    admin=True uses the service role key (bypasses RLS).
+
+    Safe to call from many threads: the client is built once and its
+    httpx connection pool is shared by everyone.
+    """
+    key = "admin" if admin else "anon"
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _build_client(admin)
+    return client
+
+
+def reset_clients():
+    """Close and forget the pooled clients (e.g. after a fork)"""
+    with _lock:
+        for client in _clients.values():
+            session = getattr(client.postgrest, "session", None)
+            if session is not None:
+                session.close()
+        _clients.clear()
+
+
+def _build_client(admin: bool):
+    from supabase import create_client
+
+    try:
+        from supabase import ClientOptions
+    except ImportError:  # supabase < 2.4
+        from supabase.lib.client_options import ClientOptions
+
+    config = get_config()
+    if admin:
+        config.require("supabase_url", "admin_key")
+        key = config.admin_key
+    else:
+        config.require("supabase_url", "supabase_key")
+        key = config.supabase_key
+
+    options = ClientOptions(
+        postgrest_client_timeout=config.http_timeout,
+        storage_client_timeout=int(config.http_timeout),
+    )
+    client = create_client(config.supabase_url, key, options=options)
+    _tune_http_pool(client, config)
+    return client
+
+
+def _tune_http_pool(client, config):
+    """
+    Replace the PostgREST httpx session with one sized for batch jobs.
+    Keeps the base URL and auth headers of the session it replaces.
+    """
+    import httpx
+
+    postgrest = client.postgrest
+    old_session = getattr(postgrest, "session", None)
+    if not isinstance(old_session, httpx.Client):
+        return  # Unknown client layout - keep the library default
+
+    # limits belong to the transport once a transport is passed explicitly
+    transport = httpx.HTTPTransport(limits=httpx.Limits(
+        max_connections=config.pool_size,
+        max_keepalive_connections=config.pool_size,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    ))
+    if config.telemetry_file:
+        from supabase_telemetry import TelemetryTransport, get_telemetry_log
+
+        transport = TelemetryTransport(transport, get_telemetry_log(config.telemetry_file))
+
+    postgrest.session = httpx.Client(
+        base_url=old_session.base_url,
+        headers=old_session.headers,
+        timeout=httpx.Timeout(config.http_timeout, connect=min(10.0, config.http_timeout)),
+        transport=transport,
+        follow_redirects=True,
+    )
+    old_session.close()
+
+
+def is_transient_error(exc: Exception) -> bool:
+    """True for network errors, timeouts and retryable HTTP statuses"""
+    import httpx
+
+    if isinstance(exc, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)):
+        return True
+
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        # postgrest.APIError carries the status (or a PG error code) in .code
+        status = getattr(exc, "code", None)
+    try:
+        return int(status) in TRANSIENT_STATUS
+    except (TypeError, ValueError):
+        return False
+
+
+def execute_with_retry(query, retries: int = None, base_delay: float = 0.5, max_delay: float = 8.0):
+    """
+    Execute an idempotent query, retrying transient failures.
+
+    Backoff is "full jitter": sleep a random time between 0 and
+    base_delay * 2^attempt (capped at max_delay), so concurrent jobs
+    that failed together do not retry together.
+    """
+    if retries is None:
+        retries = get_config().max_retries
+
+    for attempt in range(retries + 1):
+        try:
+            return query.execute()
+        except Exception as e:
+            if attempt >= retries or not is_transient_error(e):
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
@@ -0,0 +1,211 @@
+"""
+Supabase Round-Trip Telemetry
+=============================
+Records every PostgREST request the Python tools make, so the number of
+round trips and where their time goes can be measured instead of guessed.
+
+What it does:
+1. Wraps the HTTP transport of the pooled client (see supabase_pool.py);
+   queries themselves are unchanged
+2. Appends one JSON line per request: table, operation, filter shape
+   (columns and operators, never values), order / limit, rows returned,
+   request and response bytes, status and latency
+3. At exit prints a summary: round trips, time spent waiting on Supabase,
+   the hottest tables and the request shapes repeated many times with
+   one row or less each - the signature of an N+1 loop
+
+Enable with SUPABASE_TELEMETRY=<file.jsonl> or python main.py --telemetry.
+Off by default: without it the client uses the plain httpx transport.
+
+Usage: python main.py --telemetry [FILE] <command> ...
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import unquote
+
+import httpx
+
+# ====== CONFIGURATION ======
+
+# Query parameters that are not filters
+NON_FILTER_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+# Shapes repeated at least this often with <= 1 row each are flagged as N+1
+N_PLUS_ONE_MIN_CALLS = 10
+
+# Rows in each summary table
+TOP_N = 8
+
+
+def describe_request(request: httpx.Request) -> dict:
+    """Table, operation and filter shape of a PostgREST request (no values)"""
+    path = unquote(request.url.path)
+    table = path.split("/rest/v1/", 1)[-1].strip("/") or path
+    prefer = request.headers.get("prefer", "")
+    operation = {
+        "GET": "select",
+        "HEAD": "count",
+        "POST": "upsert" if "resolution=" in prefer else ("rpc" if table.startswith("rpc/") else "insert"),
+        "PATCH": "update",
+        "DELETE": "delete",
+    }.get(request.method, request.method.lower())
+
+    filters, order, limit = [], None, None
+    for key, value in request.url.params.multi_items():
+        if key == "order":
+            order = value
+        elif key == "limit":
+            limit = int(value) if value.isdigit() else value
+        elif key in ("or", "and", "not.or", "not.and"):
+            filters.append(key)
+        elif key not in NON_FILTER_PARAMS:
+            operator = value.split(".", 2)
+            operator = ".".join(operator[:2]) if operator[0] == "not" else operator[0]
+            filters.append(f"{key}:{operator}")
+    return {"table": table, "op": operation, "filters": ",".join(filters), "order": order, "limit": limit}
+
+
+def count_rows(response: httpx.Response):
+    """Rows in a response, from Content-Range when PostgREST sent one"""
+    content_range = response.headers.get("content-range", "")
+    span = content_range.split("/", 1)[0]
+    if "-" in span:
+        start, end = span.split("-", 1)
+        if start.isdigit() and end.isdigit():
+            return int(end) - int(start) + 1
+    if span == "*" and response.request.method in ("GET", "HEAD"):
+        return 0
+    if response.content[:1] == b"[":
+        try:
+            return len(response.json())
+        except ValueError:
+            return None
+    return 1 if response.content[:1] == b"{" else 0
+
+
+def _request_bytes(request: httpx.Request) -> int:
+    try:
+        return len(request.content or b"")
+    except httpx.RequestNotRead:
+        return 0
+
+
+# ====== RECORDING ======
+
+class TelemetryLog:
+    """Thread-safe JSONL writer plus the aggregates for the exit summary"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.tables = defaultdict(lambda: {"calls": 0, "ms": 0.0, "rows": 0, "bytes": 0})
+        self.shapes = defaultdict(lambda: {"calls": 0, "ms": 0.0, "rows": 0})
+        atexit.register(self.close)
+
+    def record(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.calls += 1
+            self.errors += not 0 < entry["status"] < 400
+            self.total_ms += entry["ms"]
+            table = self.tables[entry["table"]]
+            table["calls"] += 1
+            table["ms"] += entry["ms"]
+            table["rows"] += entry["rows"] or 0
+            table["bytes"] += entry["request_bytes"] + entry["response_bytes"]
+            shape = self.shapes[(entry["table"], entry["op"], entry["filters"])]
+            shape["calls"] += 1
+            shape["ms"] += entry["ms"]
+            shape["rows"] += entry["rows"] or 0
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.close()
+        if self.calls:
+            self.print_summary()
+
+    def print_summary(self):
+        wall = time.perf_counter() - self.started
+        print("\n" + "=" * 50)
+        print(f"📡 Supabase telemetry: {self.calls} round trips ({self.errors} errors), "
+              f"{self.total_ms / 1000:.2f}s in requests over {wall:.2f}s")
+
+        print("\n   Hottest tables")
+        print(f"   {'table':<28} {'calls':>7} {'total s':>8} {'avg ms':>8} {'rows':>8} {'KiB':>8}")
+        for name, stats in sorted(self.tables.items(), key=lambda item: -item[1]["ms"])[:TOP_N]:
+            print(f"   {name:<28} {stats['calls']:>7} {stats['ms'] / 1000:>8.2f} "
+                  f"{stats['ms'] / stats['calls']:>8.1f} {stats['rows']:>8} {stats['bytes'] / 1024:>8.1f}")
+
+        repeated = [
+            (key, stats) for key, stats in self.shapes.items()
+            if stats["calls"] >= N_PLUS_ONE_MIN_CALLS and stats["rows"] <= stats["calls"]
+        ]
+        if repeated:
+            print("\n   ⚠️  Repeated single-row requests (possible N+1 - batch them with in_())")
+            for (table, operation, filters), stats in sorted(repeated, key=lambda item: -item[1]["calls"])[:TOP_N]:
+                print(f"   {stats['calls']:>6} x {operation} {table} [{filters or 'no filter'}] "
+                      f"- {stats['ms'] / 1000:.2f}s")
+        print(f"\n   Log: {self.path}")
+
+
+class TelemetryTransport(httpx.BaseTransport):
+    """httpx transport that times and logs each request, then hands back the response"""
+
+    def __init__(self, transport: httpx.BaseTransport, log: TelemetryLog):
+        self.transport = transport
+        self.log = log
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        entry = describe_request(request)
+        try:
+            response = self.transport.handle_request(request)
+            # Read the body inside the timing, like the caller would
+            response.read()
+        except Exception as e:
+            entry.update(status=0, rows=None, request_bytes=_request_bytes(request), response_bytes=0,
+                         ms=round((time.perf_counter() - start) * 1000, 2), error=type(e).__name__)
+            self.log.record({"ts": datetime.now(timezone.utc).isoformat(), **entry})
+            raise
+        response.request = request
+        entry.update(
+            status=response.status_code,
+            rows=count_rows(response),
+            request_bytes=_request_bytes(request),
+            response_bytes=len(response.content),
+            ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+        self.log.record({"ts": datetime.now(timezone.utc).isoformat(), **entry})
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_telemetry_log(path: str) -> TelemetryLog:
+    """One log per file per process, shared by the admin and anon clients"""
+    with _logs_lock:
+        if path not in _logs:
+            _logs[path] = TelemetryLog(path)
+        return _logs[path]
@@ -0,0 +1,215 @@
+"""
+Unread Chat Counts
+==================
+Maintains 'chat_read_cursors': per member, how many messages from others
+they have received and how many of those they have read. The chat badge
+reads unread_count by primary key instead of counting chat_messages.
+
+What it does (incremental, the default):
+1. Streams chat_messages created since the last run (see watermarks.py)
+2. Loads the members of the groups those messages are in
+3. Counts each message for every other member who had joined before it
+   was sent
+4. Adds the counts to received_count / received_through and advances the
+   watermark in one transaction (apply_unread_counts), so a crash can never
+   count the same messages twice. read_count and last_read_at written by
+   the app are never overwritten. A member the job has not counted before
+   is first seeded with their history, so the read_count the app wrote
+   from the same messages lines up
+
+Rebuild (--full) recounts every group from chat_messages and
+chat_messages_archive, derives read_count from each member's last_read_at
+and creates cursors for every member (the backfill for existing clubs).
+It rewrites read_count too, so run it when few members are reading chat.
+
+Run the migrations first: scripts/migrations/010_chat_read_cursors.sql
+                          scripts/migrations/029_apply_unread_counts.sql
+Usage: python main.py unread [--full]
+"""
+
+import bisect
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from program_days import parse_timestamp
+from streaming import stream_rows
+from supabase_pool import execute_with_retry, get_client
+from watermarks import load_watermarks, save_watermarks, settle_cutoff
+
+# ====== CONFIGURATION ======
+CURSOR_TABLE = "chat_read_cursors"
+WATERMARK_JOB = "unread_counts"
+SOURCE_TABLES = ("chat_messages", "chat_messages_archive")
+
+# Ids per `in_` filter
+IN_FILTER_CHUNK = 100
+
+# Rows per upsert request
+WRITE_BATCH_SIZE = 500
+
+MESSAGE_COLUMNS = "id, group_id, user_id, created_at"
+CURSOR_KEY = ("group_id", "user_id")
+
+
+def _chunks(items, size=IN_FILTER_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def load_members(supabase, group_ids=None) -> dict:
+    """{group_id: {user_id: joined_at (datetime)}} for some groups, or all"""
+    members = defaultdict(dict)
+    chunks = _chunks(group_ids) if group_ids is not None else [None]
+    for chunk in chunks:
+        filters = [("in_", "group_id", chunk)] if chunk is not None else None
+        for row in stream_rows(supabase, "group_members", "group_id, user_id, joined_at",
+                               key=CURSOR_KEY, filters=filters):
+            members[row["group_id"]][row["user_id"]] = parse_timestamp(row["joined_at"])
+    return members
+
+
+def load_cursors(supabase, group_ids=None) -> dict:
+    """{(group_id, user_id): cursor row} for some groups, or all"""
+    cursors = {}
+    chunks = _chunks(group_ids) if group_ids is not None else [None]
+    for chunk in chunks:
+        filters = [("in_", "group_id", chunk)] if chunk is not None else None
+        for row in stream_rows(supabase, CURSOR_TABLE,
+                               "group_id, user_id, received_count, read_count, last_read_at",
+                               key=CURSOR_KEY, filters=filters):
+            cursors[(row["group_id"], row["user_id"])] = row
+    return cursors
+
+
+def upsert_cursors(supabase, rows) -> int:
+    written = 0
+    for batch in _chunks(rows, WRITE_BATCH_SIZE):
+        execute_with_retry(supabase.table(CURSOR_TABLE).upsert(batch, on_conflict="group_id,user_id"))
+        written += len(batch)
+    return written
+
+
+# ====== MAIN SCRIPT ======
+
+def refresh_incremental(supabase) -> int:
+    cursors = load_watermarks(supabase, WATERMARK_JOB)
+    previous = last_seen = cursors.get("chat_messages")
+
+    # {group_id: [(sent_at, sender_id), ...]} oldest first
+    new_messages = defaultdict(list)
+    through = {}
+    for row in stream_rows(supabase, "chat_messages", MESSAGE_COLUMNS, after=last_seen,
+                           filters=[("lt", "created_at", settle_cutoff())]):
+        new_messages[row["group_id"]].append((parse_timestamp(row["created_at"]), row["user_id"]))
+        through[row["group_id"]] = row["created_at"]
+        last_seen = (row["created_at"], row["id"])
+
+    if not new_messages:
+        print("✅ No new messages")
+        return 0
+
+    members = load_members(supabase, new_messages)
+
+    rows = []
+    for group_id, messages in new_messages.items():
+        for user_id, joined_at in members.get(group_id, {}).items():
+            rows.append({
+                "group_id": group_id,
+                "user_id": user_id,
+                "joined_at": joined_at.isoformat(),
+                "received": sum(1 for sent_at, sender in messages if sender != user_id and sent_at >= joined_at),
+                "received_through": through[group_id],
+            })
+
+    # Increments are not idempotent on their own - the RPC ties them to the watermark
+    written = execute_with_retry(supabase.rpc("apply_unread_counts", {
+        "p_job": WATERMARK_JOB,
+        "p_rows": rows,
+        "p_watermark": list(last_seen),
+        "p_previous": list(previous) if previous else None,
+    })).data or 0
+    total = sum(len(m) for m in new_messages.values())
+    print(f"✅ Counted {total} new messages in {len(new_messages)} groups, updated {written} cursors")
+    return written
+
+
+def rebuild(supabase) -> int:
+    """Recount every cursor from the full chat history (hot + archive)"""
+    cutoff = settle_cutoff()
+    # Per group: every send time sorted, and each sender's own send times
+    sent = defaultdict(list)
+    sent_by = defaultdict(list)
+    through = {}
+    last_seen = None
+    for table in SOURCE_TABLES:
+        for row in stream_rows(supabase, table, MESSAGE_COLUMNS, filters=[("lt", "created_at", cutoff)]):
+            sent_at = parse_timestamp(row["created_at"])
+            sent[row["group_id"]].append(sent_at)
+            sent_by[(row["group_id"], row["user_id"])].append(sent_at)
+            if row["group_id"] not in through or sent_at > parse_timestamp(through[row["group_id"]]):
+                through[row["group_id"]] = row["created_at"]
+            if table == "chat_messages":
+                last_seen = (row["created_at"], row["id"])
+    for times in list(sent.values()) + list(sent_by.values()):
+        times.sort()
+
+    def received_between(group_id, user_id, start, end=None):
+        """Messages from others with start <= created_at (<= end)"""
+        def count(times):
+            hi = len(times) if end is None else bisect.bisect_right(times, end)
+            return max(hi - bisect.bisect_left(times, start), 0)
+        return count(sent.get(group_id, [])) - count(sent_by.get((group_id, user_id), []))
+
+    members = load_members(supabase)
+    existing = load_cursors(supabase)
+    updated_at = datetime.now(timezone.utc).isoformat()
+
+    rows = []
+    for group_id, group_members in members.items():
+        for user_id, joined_at in group_members.items():
+            old = existing.pop((group_id, user_id), None) or {}
+            last_read_at = old.get("last_read_at")
+            read = received_between(group_id, user_id, joined_at, parse_timestamp(last_read_at)) if last_read_at else 0
+            rows.append({
+                "group_id": group_id,
+                "user_id": user_id,
+                "received_count": received_between(group_id, user_id, joined_at),
+                "received_through": through.get(group_id),
+                "read_count": read,
+                "last_read_at": last_read_at,
+                "updated_at": updated_at,
+            })
+    written = upsert_cursors(supabase, rows)
+
+    # Cursors of members who left their group
+    for group_id, user_id in existing:
+        execute_with_retry(
+            supabase.table(CURSOR_TABLE).delete().eq("group_id", group_id).eq("user_id", user_id)
+        )
+
+    if last_seen is not None:
+        save_watermarks(supabase, WATERMARK_JOB, {"chat_messages": last_seen}, full_refresh=True)
+    print(f"✅ Rebuilt {written} cursors, removed {len(existing)} stale cursors")
+    return written
+
+
+def refresh_unread(supabase=None, full: bool = False):
+    if supabase is None:
+        supabase = get_client(admin=True)
+    if full:
+        print("🔁 Rebuilding unread counts\n")
+        return rebuild(supabase)
+    print("💬 Updating unread counts\n")
+    return refresh_incremental(supabase)
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Unread Chat Counts")
+    print("=" * 50)
+    print()
+
+    refresh_unread(full="--full" in sys.argv)
@@ -0,0 +1,171 @@
+"""
+Per-user Data Export
+====================
+Answers "export everything I posted" with one ZIP per user, streamed
+straight from Supabase into the archive instead of loading whole tables.
+
+What it does:
+1. For each table the user writes to (shares, food logs, chat - hot and
+   archived - quiz responses, comments, reactions) streams only that user's
+   rows with keyset pagination on (created_at, id), one page in memory at a time
+2. Encodes each row as one JSON line and writes it into <table>.jsonl inside
+   the ZIP (deflate-compressed) as it arrives - memory stays constant however
+   much the user posted
+3. Adds profile.json and a manifest.json with row counts per table
+4. Writes to <user_id>.zip.part and renames when done, so a crashed export
+   never looks complete
+
+Batch mode exports many users (one id per line in --users-file, '#' comments
+allowed) on a few threads, skipping users whose ZIP already exists.
+
+Run the migration first: scripts/migrations/022_user_export_indexes.sql
+Usage: python main.py export-user <user_id> ... [--users-file ids.txt] [--out exports] [--workers 4] [--force]
+"""
+
+import json
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from env_config import PROJECT_ROOT
+from streaming import stream_rows
+from supabase_pool import execute_with_retry, get_client
+
+# ====== CONFIGURATION ======
+EXPORT_DIR = PROJECT_ROOT / "exports"
+
+# Tables with a user_id column, exported in this order
+EXPORT_TABLES = (
+    "text_shares",
+    "food_logs",
+    "chat_messages",
+    "chat_messages_archive",
+    "quiz_responses",
+    "share_comments",
+    "share_reactions",
+)
+
+# Rows per page; one page per table is all that is held in memory
+PAGE_SIZE = 1000
+
+# Users exported at once in batch mode
+DEFAULT_WORKERS = 4
+
+
+# ====== STREAMING ======
+
+def user_rows(supabase, table: str, user_id: str):
+    """The user's rows of one table, oldest first"""
+    return stream_rows(supabase, table, "*", filters=[("eq", "user_id", user_id)], page_size=PAGE_SIZE)
+
+
+def jsonl_lines(rows):
+    """Encode rows as UTF-8 JSON lines (timestamps and uuids are already strings)"""
+    for row in rows:
+        yield (json.dumps(row, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def write_member(archive: zipfile.ZipFile, name: str, lines) -> int:
+    """Stream lines into one compressed archive member; returns the line count"""
+    count = 0
+    with archive.open(name, "w", force_zip64=True) as member:
+        for line in lines:
+            member.write(line)
+            count += 1
+    return count
+
+
+def load_profile(supabase, user_id: str):
+    result = execute_with_retry(
+        supabase.table("user_profiles").select("*").eq("user_id", user_id).limit(1)
+    )
+    return (result.data or [None])[0]
+
+
+# ====== EXPORT ======
+
+def export_user(supabase, user_id: str, out_dir=EXPORT_DIR) -> dict:
+    """Write <out_dir>/<user_id>.zip; returns the manifest"""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{user_id}.zip")
+    partial = path + ".part"
+
+    counts = {}
+    try:
+        with zipfile.ZipFile(partial, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for table in EXPORT_TABLES:
+                counts[table] = write_member(archive, f"{table}.jsonl", jsonl_lines(user_rows(supabase, table, user_id)))
+            profile = load_profile(supabase, user_id)
+            archive.writestr("profile.json", json.dumps(profile, ensure_ascii=False, indent=2, default=str))
+            manifest = {
+                "user_id": user_id,
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+                "format": "one JSON object per line, oldest first",
+                "rows": counts,
+            }
+            archive.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, path)
+    return manifest
+
+
+def read_user_ids(path: str) -> list:
+    """One user id per line; blank lines and '#' comments are skipped"""
+    with open(path, encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line))
+
+
+# ====== MAIN SCRIPT ======
+
+def export_users(supabase=None, user_ids=(), out_dir=EXPORT_DIR, workers: int = DEFAULT_WORKERS,
+                 force: bool = False) -> dict:
+    """Export each user to its own ZIP; returns {user_id: manifest or error string}"""
+    if supabase is None:
+        supabase = get_client(admin=True)
+    user_ids = list(dict.fromkeys(user_ids))
+    if not force:
+        done = {u for u in user_ids if os.path.exists(os.path.join(out_dir, f"{u}.zip"))}
+        if done:
+            print(f"⏭️  Skipping {len(done)} users already exported (--force to redo)")
+        user_ids = [u for u in user_ids if u not in done]
+    if not user_ids:
+        print("✅ Nothing to export")
+        return {}
+
+    print(f"📦 Exporting {len(user_ids)} user(s) to {out_dir}")
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(user_ids)))) as pool:
+        futures = {pool.submit(export_user, supabase, user_id, out_dir): user_id for user_id in user_ids}
+        for future in as_completed(futures):
+            user_id = futures[future]
+            try:
+                manifest = future.result()
+            except Exception as e:
+                results[user_id] = f"{type(e).__name__}: {e}"
+                print(f"   ❌ {user_id}: {results[user_id]}")
+                continue
+            results[user_id] = manifest
+            print(f"   ✓ {user_id}: {sum(manifest['rows'].values())} rows")
+
+    failed = sum(1 for r in results.values() if isinstance(r, str))
+    print(f"\n{'⚠️' if failed else '✅'} Exported {len(results) - failed}/{len(results)} users")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    print("=" * 50)
+    print("  Per-user Data Export")
+    print("=" * 50)
+    print()
+
+    if len(sys.argv) < 2:
+        print("Usage: python user_export.py <user_id> ...")
+        sys.exit(1)
+    export_users(user_ids=sys.argv[1:])
@@ -5,42 +5,32 @@ This script checks that all data was imported correctly:
 - 21 days of book content
 - 21 quizzes with questions
 - Shows a sample quiz for quality check
+- Checks every answer key against its lesson text (quiz_grounding.py,
+  report only - python main.py verify-quizzes also queues regeneration)
 
 Time: ~30 seconds to run
 """
 
-import os
-from supabase import create_client, Client
-import json
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+from quiz_grounding import verify_quiz_grounding
+from supabase_pool import execute_with_retry, get_client
 
 # ====== CONFIGURATION ======
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# Validate that environment variables are set
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError(
-        "Missing environment variables! "
-        "Make sure SUPABASE_URL and SUPABASE_KEY are set in .env file"
-    )
+# Supabase credentials are resolved by env_config (SUPABASE_URL, SUPABASE_KEY)
 
 # ====== MAIN SCRIPT ======
 
-def verify_all_data():
+def verify_all_data(supabase=None):
     """Check that all data is properly imported"""
     
-    # Initialize Supabase client
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Initialize Supabase client (the CLI passes in a shared one)
+    if supabase is None:
+        supabase = get_client()
     
     print("🔍 Checking data in Supabase...\n")
     
     # ===== Check Daily Content =====
     try:
-        content_result = supabase.table('daily_content').select('day_number, title').execute()
+        content_result = execute_with_retry(supabase.table('daily_content').select('day_number, title'))
         content_data = content_result.data
         
         print("=" * 60)
@@ -70,7 +60,7 @@ def verify_all_data():
     
     # ===== Check Quizzes =====
     try:
-        quiz_result = supabase.table('quizzes').select('day_number, questions').execute()
+        quiz_result = execute_with_retry(supabase.table('quizzes').select('day_number, questions'))
         quiz_data = quiz_result.data
         
         print("=" * 60)
@@ -122,6 +112,19 @@ def verify_all_data():
             print("⚠️  No questions found in this quiz")
     
     print()
+
+    # ===== Check Answer Grounding =====
+    flagged = []
+    if quiz_data and content_data:
+        print("=" * 60)
+        print("🔎 ANSWER GROUNDING")
+        print("=" * 60)
+        try:
+            flagged = verify_quiz_grounding(supabase, queue=False)
+        except Exception as e:
+            print(f"❌ Error checking grounding: {e}")
+        print()
+    
     print("=" * 60)
     print("✅ VERIFICATION COMPLETE")
     print("=" * 60)
@@ -130,6 +133,8 @@ def verify_all_data():
     print("\nSummary:")
     print(f"  📚 Book Content: {len(content_data)}/21 days")
     print(f"  ❓ Quizzes: {len(quiz_data)}/21 days")
+    if flagged:
+        print(f"  🔎 Questions to review: {len(flagged)}")
     
     if len(content_data) == 21 and len(quiz_data) == 21:
         print("\n🎉 All data imported successfully!")
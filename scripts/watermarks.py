@@ -0,0 +1,84 @@
+"""
+Job Watermarks
+==============
+Remembers how far each incremental job has read into each source table.
+
+A watermark is the (created_at, id) of the last row a job processed, stored
+in the 'analytics_watermarks' table (scripts/migrations/007_analytics_watermarks.sql).
+Pass it as `after=` to streaming.stream_rows to read only newer rows.
+
+Usage:
+    cursors = load_watermarks(supabase, 'cohort_analytics')
+    ... process rows after cursors['text_shares'] ...
+    save_watermarks(supabase, 'cohort_analytics', {'text_shares': (created_at, id)})
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from program_days import parse_timestamp
+from supabase_pool import execute_with_retry
+
+WATERMARK_TABLE = "analytics_watermarks"
+
+# Rows younger than this are left for the next run, so rows from
+# transactions still in flight are not stepped over by the watermark
+SETTLE_SECONDS = 60
+
+
+def settle_cutoff(seconds: int = SETTLE_SECONDS) -> str:
+    """Newest created_at an incremental run should read (use with an 'lt' filter)"""
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat()
+
+
+def load_watermarks(supabase, job: str) -> dict:
+    """Return {source_table: (created_at, id)} for a job (missing = start from scratch)"""
+    result = execute_with_retry(
+        supabase.table(WATERMARK_TABLE)
+        .select("source_table, last_created_at, last_id")
+        .eq("job", job)
+    )
+    return {
+        row["source_table"]: (row["last_created_at"], row["last_id"])
+        for row in result.data or []
+        if row.get("last_created_at") and row.get("last_id")
+    }
+
+
+def save_watermarks(supabase, job: str, cursors: dict, full_refresh: bool = False):
+    """
+    Upsert the cursors of a job. Tables whose cursor is None are skipped.
+    full_refresh=True also stamps last_full_refresh_at (see last_full_refresh).
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for table, cursor in cursors.items():
+        if cursor is None:
+            continue
+        row = {
+            "job": job,
+            "source_table": table,
+            "last_created_at": cursor[0],
+            "last_id": cursor[1],
+            "updated_at": now,
+        }
+        if full_refresh:
+            row["last_full_refresh_at"] = now
+        rows.append(row)
+    if rows:
+        execute_with_retry(supabase.table(WATERMARK_TABLE).upsert(rows, on_conflict="job,source_table"))
+
+
+def clear_watermarks(supabase, job: str):
+    """Forget a job's progress so the next run starts from the beginning"""
+    execute_with_retry(supabase.table(WATERMARK_TABLE).delete().eq("job", job))
+
+
+def last_full_refresh(supabase, job: str):
+    """When the job last ran a full pass (oldest across its tables), or None"""
+    result = execute_with_retry(
+        supabase.table(WATERMARK_TABLE).select("last_full_refresh_at").eq("job", job)
+    )
+    stamps = [row["last_full_refresh_at"] for row in result.data or []]
+    if not stamps or any(stamp is None for stamp in stamps):
+        return None
+    return min(parse_timestamp(stamp) for stamp in stamps)